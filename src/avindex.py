@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# avindex.py
+# Created on October 18, 2026.
+"""
+Converts a Python shelve file with antivirus detection data into a
+compact antivirus detection index.
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+import binascii
+import os
+import shelve
+import sys
+
+import numpy
+
+import dataset_cache
+
+INDEX_VERSION = 1
+
+
+class AVIndex(object):
+    """
+    Antivirus detections of samples, stored as a sorted array of
+    SHA256 digests of samples and a bit-packed matrix with a row for
+    every sample and a column for every antivirus.
+    """
+    def __init__(self, digests, detections, avs):
+        self.digests = digests
+        self.detections = detections
+        self.avs = list(avs)
+
+    @classmethod
+    def from_shelve(cls, avstats_f):
+        """
+        Builds an index from a shelve file mapping SHA256 sums of
+        samples to dictionaries with a 'report' of detections.
+        """
+        avstats_in = shelve.open(avstats_f, flag='r')
+        av_ids = {}
+        keys = []
+        rows = []
+        skipped = 0
+        for fid in avstats_in.keys():
+            try:
+                digest = binascii.unhexlify(fid)
+            except (TypeError, ValueError):
+                digest = b''
+            if len(digest) != 32:
+                skipped += 1
+                continue
+            keys.append(digest)
+            rows.append([av_ids.setdefault(av, len(av_ids))
+                         for av, det in avstats_in[fid]['report'].items()
+                         if det])
+        avstats_in.close()
+        if skipped:
+            print('Skipped {} entries without a SHA256 sum'.format(skipped))
+
+        detections = numpy.zeros((len(keys), len(av_ids)), dtype=bool)
+        for r, row in enumerate(rows):
+            detections[r, row] = True
+        digests = numpy.array(keys, dtype='S32')
+        order = numpy.argsort(digests, kind='mergesort')
+        avs = sorted(av_ids, key=av_ids.get)
+        return cls(digests[order], numpy.packbits(detections[order], axis=1),
+                   avs)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads an index saved with save(), memory-mapped.
+        """
+        arrays, meta = dataset_cache.load_bundle(path)
+        return cls(arrays['digests'], arrays['detections'], meta['avs'])
+
+    def save(self, path, source=None):
+        """
+        Saves the index as a bundle directory at path.
+        """
+        meta = {'version': INDEX_VERSION,
+                'avs': self.avs,
+                'samples': len(self.digests)}
+        if source is not None:
+            meta['source'] = os.path.abspath(source)
+        dataset_cache.save_bundle(path, {'digests': self.digests,
+                                         'detections': self.detections},
+                                  meta)
+
+    def count(self, digests):
+        """
+        Counts detections of every antivirus among the samples with
+        the given SHA256 digests. Returns a dictionary mapping
+        antivirus names to their (non-zero) detection counts, plus
+        the total number of samples under 'Total'.
+        """
+        digests = numpy.asarray(digests, dtype='S32')
+        counts = {'Total': len(digests)}
+        if not len(self.digests) or not len(digests):
+            return counts
+        pos = numpy.searchsorted(self.digests, digests)
+        pos[pos == len(self.digests)] = 0
+        pos = pos[self.digests[pos] == digests]
+        bits = numpy.unpackbits(self.detections[numpy.sort(pos)], axis=1)
+        for av, n in zip(self.avs, bits.sum(axis=0)):
+            if n:
+                counts[av] = int(n)
+        return counts
+
+
+def open_avstats(path):
+    """
+    Opens antivirus detection data, either an index saved with
+    AVIndex.save() or a shelve file, which is converted in memory.
+    """
+    if dataset_cache.load_meta(path) is not None:
+        return AVIndex.load(path)
+    return AVIndex.from_shelve(path)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('shelve',
+                        help='Python shelve file with antivirus '
+                        'detection data.')
+    parser.add_argument('index',
+                        help='Where to save the index.')
+
+    args = parser.parse_args(argv)
+
+    print('Loading antivirus detection data [{}]'.format(args.shelve))
+    index = AVIndex.from_shelve(args.shelve)
+    print('Saving index of {} samples and {} antiviruses [{}]'
+          .format(len(index.digests), len(index.avs), args.index))
+    index.save(args.index, args.shelve)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
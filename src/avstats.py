@@ -8,37 +8,47 @@ Produces a bar plot comparing TPRs of antiviruses to Hidost.
 from __future__ import print_function
 
 from argparse import ArgumentParser
-import pickle
 import sys
 
-import plots
+from results import load_averaged
 
-def main():
+
+def plot_detections(avstats, plotfs, draft=False):
+    """
+    Plots the true positive counts of antiviruses and Hidost.
+    """
+    import plots
+    plots.init_eurasip_style(figure_width=222.5, horizontal=False,
+                             draft=draft)
+    plots.plot_avstats(avstats, plotfs)
+
+
+def main(argv=None):
     parser = ArgumentParser(description=__doc__)
     parser.add_argument('res',
-                        help='Experiment result (res) file.')
+                        help='Experiment result (res) file, or run name '
+                        '(RUN[:VARIANT]) if --db is given.')
+    parser.add_argument('--db',
+                        default=None,
+                        help='Results database to load the run from.')
     parser.add_argument('--plot',
                         required=True,
                         nargs='*',
                         help='Where to save plot.')
+    parser.add_argument('--draft',
+                        default=False,
+                        action='store_true',
+                        help='Render text without LaTeX, for a quick '
+                        'preview.')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     print('Loading previous results [{}]'.format(args.res))
-    input = pickle.load(open(args.res, 'rb'))
-    avstatsl = input['avstats']
-
     print('Averaging results')
-    for i in range(1, len(avstatsl)):
-        for av in set(avstatsl[0].keys() + avstatsl[i].keys()):
-            avstatsl[0][av] += avstatsl[i][av]
-    for av in avstatsl[0].keys():
-        avstatsl[0][av] /= float(len(avstatsl))
-    avstats = avstatsl[0]
+    _, avstats, _ = load_averaged(args.res, args.db)
 
     print('Plotting antivirus detection statistics')
-    plots.init_eurasip_style(figure_width=222.5, horizontal=False)
-    plots.plot_avstats(avstats, args.plot)
+    plot_detections(avstats, args.plot, args.draft)
     return 0
 
 
@@ -0,0 +1,413 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# benchmark.py
+# Created on October 18, 2026.
+"""
+Benchmarks every stage of the pipeline on synthetic datasets (see
+synthetic.py) of several sizes and compares the timings with a
+baseline saved by an earlier run.
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+from collections import OrderedDict
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy
+
+from avindex import open_avstats
+import dataset_cache
+import datasets
+import experiment
+import features
+import memplan
+import metrics
+import synthetic
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+# Modules that no command may import just to print its help
+HEAVY_MODULES = ['matplotlib', 'pylab', 'scipy', 'sklearn']
+STARTUP_CHECK = '''
+import sys
+sys.path.insert(0, {src!r})
+import hidost
+try:
+    hidost.main({argv!r})
+except SystemExit:
+    pass
+sys.stderr.write(' '.join(m for m in {heavy!r} if m in sys.modules))
+'''
+# Commands compressing a file to standard output, by suffix; xz and
+# zstd compress in blocks that can be decompressed in parallel
+COMPRESSORS = {'.gz': [['pigz', '-c'], ['gzip', '-c']],
+               '.xz': [['xz', '-c', '-T0']],
+               '.zst': [['zstd', '-qc', '-T0']]}
+
+
+def stage_startup(ctx):
+    """
+    Prints the help of every hidost.py command in a fresh interpreter
+    and fails if a command imports a heavy module to do so.
+    """
+    import hidost
+    commands = [[]] + [[name, '--help'] for name in hidost.COMMANDS]
+    with open(os.devnull, 'w') as devnull:
+        for argv in commands:
+            proc = subprocess.Popen(
+                [sys.executable, '-c', STARTUP_CHECK.format(
+                    src=SRC_DIR, argv=argv, heavy=HEAVY_MODULES)],
+                stdout=devnull, stderr=subprocess.PIPE)
+            heavy = proc.communicate()[1].decode('utf-8').strip()
+            if heavy:
+                raise RuntimeError('hidost.py {} imports {}'.format(
+                    ' '.join(argv), heavy))
+    return len(commands), 0
+
+
+def stage_parse(ctx):
+    X, y, dates, digests = datasets.scan_libsvm(ctx['train'])
+    ctx['n_features'] = X.shape[1]
+    return X.shape[0], os.path.getsize(ctx['train'])
+
+
+def stage_cache(ctx):
+    for f in (ctx['train'], ctx['test']):
+        dataset_cache.build(f, dataset_cache.cache_path(f, ctx['cache_dir']))
+    X_tr, ctx['y_tr'] = dataset_cache.load_svmlight(
+        ctx['train'], cache_dir=ctx['cache_dir'])
+    X_te, ctx['y_te'], _, ctx['digests'] = dataset_cache.load_dataset(
+        ctx['test'], n_features=X_tr.shape[1], cache_dir=ctx['cache_dir'])
+    ctx['X_tr_csr'], ctx['X_te_csr'] = X_tr, X_te
+    return X_tr.shape[0] + X_te.shape[0], (os.path.getsize(ctx['train']) +
+                                           os.path.getsize(ctx['test']))
+
+
+def stage_densify(ctx):
+    ctx['X_tr'] = ctx['X_tr_csr'].toarray()
+    ctx['X_te'] = ctx['X_te_csr'].toarray()
+    return (ctx['X_tr'].shape[0] + ctx['X_te'].shape[0],
+            ctx['X_tr'].nbytes + ctx['X_te'].nbytes)
+
+
+def stage_fit_rf(ctx):
+    from sklearn.ensemble import RandomForestClassifier as RFC
+    ctx['rf'] = RFC(n_estimators=200, n_jobs=-1).fit(ctx['X_tr'],
+                                                     ctx['y_tr'])
+    return ctx['X_tr'].shape[0], ctx['X_tr'].nbytes
+
+
+def stage_predict_rf(ctx):
+    ctx['y_pr'], ctx['y_val'] = experiment.classify_batches(
+        ctx['rf'], ctx['X_te_csr'], 'RF', False, 'dense64', 10000)
+    return ctx['X_te'].shape[0], ctx['X_te'].nbytes
+
+
+def stage_fit_svm(ctx):
+    from sklearn.svm import SVC
+    ctx['svm'] = SVC(kernel='rbf', gamma=0.0025, C=12).fit(ctx['X_tr'],
+                                                           ctx['y_tr'])
+    return ctx['X_tr'].shape[0], ctx['X_tr'].nbytes
+
+
+def stage_predict_svm(ctx):
+    experiment.classify_batches(ctx['svm'], ctx['X_te_csr'], 'SVM', False,
+                                'dense64', 10000)
+    return ctx['X_te'].shape[0], ctx['X_te'].nbytes
+
+
+def stage_avstats(ctx):
+    avstats_in = open_avstats(ctx['avstats'])
+    mal = numpy.where(ctx['y_te'] > 0.5)
+    ctx['av_counts'] = avstats_in.count(ctx['digests'][mal])
+    ctx['av_counts']['Hidost'] = int(numpy.logical_and(
+        ctx['y_te'] == ctx['y_pr'], ctx['y_te'] > 0.5).sum())
+    return len(mal[0]), 0
+
+
+def stage_bootstrap(ctx):
+    resamples = 1000
+    metrics.bootstrap(ctx['y_te'], ctx['y_pr'], ctx['y_val'],
+                      resamples=resamples)
+    return resamples * len(ctx['y_te']), 0
+
+
+def stage_feat_drift(ctx):
+    series = features.drift_series(ctx['feats'])
+    return (int(series['OLD'].sum() + series['NEW'].sum()),
+            sum(os.path.getsize(f) for f in ctx['feats']))
+
+
+def compress(infile, suffix, outdir):
+    """
+    Compresses infile into directory outdir with a command from
+    COMPRESSORS or, without one, the gzip or lzma module. Returns the
+    path of the compressed file, or None if there is no compressor.
+    """
+    outfile = os.path.join(outdir, os.path.basename(infile) + suffix)
+    for command in COMPRESSORS[suffix]:
+        if datasets.find_command(command[0]):
+            with open(outfile, 'wb') as fout:
+                subprocess.check_call(command + [infile], stdout=fout)
+            return outfile
+    import gzip
+    try:
+        import lzma
+    except ImportError:
+        lzma = None
+    opener = {'.gz': gzip.open, '.xz': lzma and lzma.open}.get(suffix)
+    if not opener:
+        return None
+    with open(infile, 'rb') as fin:
+        with opener(outfile, 'wb') as fout:
+            shutil.copyfileobj(fin, fout)
+    return outfile
+
+
+def drop_cache(path):
+    """
+    Evicts the contents of file path from the page cache, if the
+    platform allows, so that it is read from disk again.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def load_cold(ctx, suffix):
+    """
+    Parses the training file, compressed as given by suffix, after
+    evicting it from the page cache. Returns the number of samples
+    and the size of the uncompressed file.
+    """
+    path = ctx['train']
+    if suffix:
+        if ctx['compressed'].get(suffix) is None:
+            raise RuntimeError('No compressor for {} files'.format(suffix))
+        path = ctx['compressed'][suffix]
+    drop_cache(path)
+    X = datasets.scan_libsvm(path)[0]
+    return X.shape[0], os.path.getsize(ctx['train'])
+
+
+def stage_compress(ctx):
+    ctx['compressed'] = dict((suffix, compress(ctx['train'], suffix,
+                                               ctx['tmp']))
+                             for suffix in sorted(COMPRESSORS))
+    done = [f for f in ctx['compressed'].values() if f]
+    return len(done), len(done) * os.path.getsize(ctx['train'])
+
+
+def stage_load(ctx):
+    return load_cold(ctx, None)
+
+
+def stage_load_gz(ctx):
+    return load_cold(ctx, '.gz')
+
+
+def stage_load_xz(ctx):
+    return load_cold(ctx, '.xz')
+
+
+def stage_load_zst(ctx):
+    return load_cold(ctx, '.zst')
+
+
+def stage_plots(ctx):
+    import plots
+    plot_fs = [os.path.join(ctx['tmp'], 'plot.' + ext)
+               for ext in ('pdf', 'eps')]
+    plots.init_eurasip_style(figure_width=222.5, horizontal=False)
+    periods = 10
+    datas = [[numpy.random.random(periods) for _ in range(4)]
+             for _ in range(4)]
+    plots.sorted_multicomparison(datas=datas,
+                                 methods=['A', 'B', 'C', 'D'],
+                                 legend='best/1',
+                                 ylabels=['AUC', 'acc', 'TPR', 'FPR'],
+                                 xlabel='Retraining period',
+                                 xticklabels=[str(i) for i in
+                                              range(periods)],
+                                 plotfs=plot_fs)
+    plots.init_eurasip_style(figure_width=222.5, figure_height=170.0)
+    plots.plot_avstats(ctx['av_counts'], plot_fs)
+    return 2, sum(os.path.getsize(f) for f in plot_fs)
+
+
+# Stages in order of execution; later stages depend on earlier ones
+STAGES = OrderedDict([('startup', stage_startup),
+                      ('parse', stage_parse),
+                      ('cache', stage_cache),
+                      ('densify', stage_densify),
+                      ('fit_rf', stage_fit_rf),
+                      ('predict_rf', stage_predict_rf),
+                      ('fit_svm', stage_fit_svm),
+                      ('predict_svm', stage_predict_svm),
+                      ('avstats', stage_avstats),
+                      ('bootstrap', stage_bootstrap),
+                      ('feat_drift', stage_feat_drift),
+                      ('plots', stage_plots),
+                      ('compress', stage_compress),
+                      ('load', stage_load),
+                      ('load_gz', stage_load_gz),
+                      ('load_xz', stage_load_xz),
+                      ('load_zst', stage_load_zst)])
+
+
+def run_stages(ctx, stages):
+    """
+    Runs the given stages on the dataset described by ctx. Returns a
+    dictionary mapping stage names to dictionaries with the wall
+    clock time in seconds, the numbers of items and bytes processed
+    and the peak resident set size, or the error of failed stages.
+    """
+    results = OrderedDict()
+    for name, func in STAGES.items():
+        if name not in stages:
+            continue
+        memplan.reset_peak()
+        start = time.time()
+        try:
+            items, nbytes = func(ctx)
+        except Exception as e:
+            results[name] = {'error': '{}: {}'.format(type(e).__name__, e)}
+            continue
+        results[name] = {'time': time.time() - start,
+                         'items': items,
+                         'bytes': nbytes,
+                         'peak': memplan.peak_rss()}
+    return results
+
+
+def print_report(scale, results, baseline, tolerance):
+    """
+    Prints the results of a scale, compared with the baseline results
+    of the same scale. Returns the list of stages slower than the
+    baseline by more than tolerance.
+    """
+    print('\n{:#^79s}'.format(' {} samples per week '.format(scale)))
+    print('{:<12s} {:>9s} {:>12s} {:>10s} {:>10s} {:>9s}'.format(
+        'Stage', 'Time (s)', 'Items/s', 'MB/s', 'Peak RSS', 'Baseline'))
+    slower = []
+    for name, r in results.items():
+        if 'error' in r:
+            print('{:<12s} failed: {}'.format(name, r['error']))
+            continue
+        t = max(r['time'], 1e-6)
+        comparison = ''
+        if name in baseline and 'time' in baseline[name]:
+            ratio = r['time'] / max(baseline[name]['time'], 1e-6)
+            comparison = '{:.2f}x'.format(ratio)
+            if ratio > 1 + tolerance:
+                comparison += ' !'
+                slower.append(name)
+        print('{:<12s} {:>9.3f} {:>12.0f} {:>10.1f} {:>10s} {:>9s}'.format(
+            name, r['time'], r['items'] / t, r['bytes'] / t / (1 << 20),
+            memplan.format_size(r['peak']), comparison))
+    return ['{}/{}'.format(scale, name) for name in slower]
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('--scales',
+                        nargs='+',
+                        type=int,
+                        default=[250, 500, 1000],
+                        help='Dataset sizes, in samples per week.')
+    parser.add_argument('--features',
+                        default=5000,
+                        type=int,
+                        help='How many features are in use at a time.')
+    parser.add_argument('--nnz',
+                        default=100,
+                        type=int,
+                        help='Mean number of features per sample.')
+    parser.add_argument('--stages',
+                        nargs='+',
+                        choices=list(STAGES.keys()),
+                        default=list(STAGES.keys()),
+                        help='Which stages to run (default: all). Stages '
+                        'depend on the ones before them.')
+    parser.add_argument('--data-dir',
+                        default=None,
+                        help='Where to keep generated datasets, which are '
+                        'reused by later runs (default: a temporary '
+                        'directory).')
+    parser.add_argument('--baseline',
+                        default=None,
+                        help='JSON file with baseline results to compare '
+                        'with.')
+    parser.add_argument('--save',
+                        default=None,
+                        help='Where to save results as JSON, e.g. as a new '
+                        'baseline.')
+    parser.add_argument('--tolerance',
+                        default=0.25,
+                        type=float,
+                        help='By how much a stage may be slower than the '
+                        'baseline before it is reported as a regression.')
+
+    args = parser.parse_args(argv)
+    # Stages use the results of all stages before them
+    last = max(list(STAGES.keys()).index(s) for s in args.stages)
+    stages = list(STAGES.keys())[:last + 1]
+
+    baseline = {}
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as fin:
+            baseline = json.load(fin)['results']
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='hidost-bench-')
+    tmp = tempfile.mkdtemp(prefix='hidost-bench-tmp-')
+    output = {'settings': {'features': args.features, 'nnz': args.nnz},
+              'results': {}}
+    slower = []
+    try:
+        for scale in args.scales:
+            print('Generating dataset of {} samples per week'.format(scale))
+            info = synthetic.generate(
+                os.path.join(data_dir, 'scale-{}'.format(scale)),
+                samples=scale, features=args.features,
+                nnz_mean=args.nnz)
+            ctx = {'train': info['train'][0],
+                   'test': info['test'][0],
+                   'feats': info['feats'],
+                   'avstats': info['avstats'],
+                   'cache_dir': os.path.join(tmp, 'cache'),
+                   'tmp': tmp}
+            results = run_stages(ctx, stages)
+            results = OrderedDict((name, r) for name, r in results.items()
+                                  if name in args.stages)
+            output['results'][str(scale)] = results
+            slower += print_report(scale, results,
+                                   baseline.get(str(scale), {}),
+                                   args.tolerance)
+            del ctx
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if args.data_dir is None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.save:
+        print('\nSaving results [{}]'.format(args.save))
+        with open(args.save, 'w') as fout:
+            json.dump(output, fout, indent=1)
+    if slower:
+        print('\nSlower than the baseline: {}'.format(', '.join(slower)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 18, 2026.
+
+Binary cache of LibSVM files. Every LibSVM file is parsed from text
+only once and saved as a bundle of NumPy arrays (CSR data, indices,
+indptr, labels, dates and SHA256 digests of samples) plus JSON
+metadata in a directory. Later loads
+memory-map the arrays, so they take milliseconds and processes
+loading the same file share its pages.
+
+A bundle remembers the size and modification time of its source file
+and is rebuilt as soon as either changes.
+"""
+from __future__ import print_function
+
+import errno
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from datasets import iter_libsvm
+
+CACHE_VERSION = 3
+CACHE_SUFFIX = '.npcache'
+META_FILE = 'meta.json'
+
+# Directory to keep bundles in, None to keep them next to source files
+CACHE_DIR = os.environ.get('HIDOST_CACHE_DIR') or None
+
+
+def cache_path(infile, cache_dir=None):
+    """
+    Returns the path of the bundle directory caching infile. Without
+    cache_dir the bundle is placed next to infile.
+    """
+    if cache_dir is None:
+        return infile + CACHE_SUFFIX
+    key = hashlib.sha1(os.path.abspath(infile).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, '{}-{}{}'.format(
+        key[:16], os.path.basename(infile), CACHE_SUFFIX))
+
+
+def _make_tmp(path):
+    """
+    Creates and returns a temporary directory to build the bundle at
+    path in.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    return tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+
+
+def _commit(tmp, path, meta):
+    """
+    Writes metadata into the temporary bundle directory tmp and
+    atomically moves it to path. If another process has completed
+    the same bundle in the meantime, its bundle is kept.
+    """
+    try:
+        with open(os.path.join(tmp, META_FILE), 'w') as fout:
+            json.dump(meta, fout, indent=1, sort_keys=True)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.rename(tmp, path)
+        except OSError as e:
+            if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                raise
+    finally:
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def save_bundle(path, arrays, meta):
+    """
+    Atomically saves a dictionary of NumPy arrays and a dictionary of
+    JSON-serializable metadata into the bundle directory path.
+    """
+    tmp = _make_tmp(path)
+    try:
+        for name, arr in arrays.items():
+            numpy.save(os.path.join(tmp, name + '.npy'), arr)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    _commit(tmp, path, dict(meta, arrays=sorted(arrays.keys())))
+
+
+def load_meta(path):
+    """
+    Returns the metadata dictionary of a bundle, or None if the
+    bundle does not exist or is incomplete.
+    """
+    try:
+        with open(os.path.join(path, META_FILE), 'r') as fin:
+            return json.load(fin)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def load_bundle(path, names=None, mmap_mode='r'):
+    """
+    Loads the arrays of a bundle, memory-mapped by default. Returns a
+    dictionary of arrays (only those in names, if given) and the
+    metadata dictionary.
+    """
+    meta = load_meta(path)
+    if meta is None:
+        raise IOError('Missing or incomplete bundle: {}'.format(path))
+    if names is None:
+        names = meta['arrays']
+    arrays = dict((name, numpy.load(os.path.join(path, name + '.npy'),
+                                    mmap_mode=mmap_mode))
+                  for name in names)
+    return arrays, meta
+
+
+def source_stamp(infile):
+    """
+    Returns the (size, mtime) pair identifying the current version
+    of infile.
+    """
+    st = os.stat(infile)
+    return st.st_size, st.st_mtime
+
+
+def is_fresh(infile, path):
+    """
+    Returns True if the bundle at path caches the current version of
+    infile.
+    """
+    meta = load_meta(path)
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        return False
+    size, mtime = source_stamp(infile)
+    return meta['source_size'] == size and meta['source_mtime'] == mtime
+
+
+def _finish_array(tmp, name, dtype, count, dtype_out=None, offset=0,
+                  block=1 << 22):
+    """
+    Converts the raw array file name.raw in directory tmp, holding
+    count items of the given dtype, into name.npy of dtype_out with
+    offset added to all items. Works in blocks of bounded size.
+    """
+    raw_f = os.path.join(tmp, name + '.raw')
+    npy_f = os.path.join(tmp, name + '.npy')
+    dtype_out = dtype if dtype_out is None else dtype_out
+    if count == 0:
+        numpy.save(npy_f, numpy.empty(0, dtype=dtype_out))
+    else:
+        out = numpy.lib.format.open_memmap(npy_f, mode='w+',
+                                           dtype=dtype_out, shape=(count,))
+        with open(raw_f, 'rb') as fin:
+            for start in range(0, count, block):
+                arr = numpy.fromfile(fin, dtype=dtype,
+                                     count=min(block, count - start))
+                out[start:start + len(arr)] = arr + offset if offset else arr
+        out.flush()
+        del out
+    os.remove(raw_f)
+
+
+def build(infile, path):
+    """
+    Parses LibSVM file infile and saves it as a bundle at path. The
+    file is parsed in chunks that are written out as soon as they are
+    parsed, so memory consumption does not depend on the file size.
+    """
+    size, mtime = source_stamp(infile)
+    tmp = _make_tmp(path)
+    names = ['data', 'indices', 'indptr', 'labels', 'dates', 'digests']
+    dtypes = {'data': numpy.float64,
+              'indices': numpy.int32,
+              'indptr': numpy.int64,
+              'labels': numpy.float64,
+              'dates': numpy.dtype('datetime64[D]'),
+              'digests': numpy.dtype('S32')}
+    try:
+        outs = dict((name, open(os.path.join(tmp, name + '.raw'), 'wb'))
+                    for name in names)
+        n_samples, nnz = 0, 0
+        min_index, max_index = None, -1
+        numpy.zeros(1, dtype=numpy.int64).tofile(outs['indptr'])
+        for X, y, dates, digests in iter_libsvm(infile):
+            X.sort_indices()
+            arrays = {'data': X.data,
+                      'indices': X.indices,
+                      'indptr': X.indptr[1:].astype(numpy.int64) + nnz,
+                      'labels': y,
+                      'dates': dates,
+                      'digests': digests}
+            for name in names:
+                arrays[name].astype(dtypes[name]).tofile(outs[name])
+            if X.nnz:
+                lo, hi = X.indices.min(), X.indices.max()
+                min_index = lo if min_index is None else min(min_index, lo)
+                max_index = max(max_index, hi)
+            n_samples += X.shape[0]
+            nnz += X.nnz
+        for fout in outs.values():
+            fout.close()
+
+        # One-based feature indices unless index 0 occurs, as in
+        # sklearn.datasets.load_svmlight_file()
+        offset = -1 if min_index is not None and min_index > 0 else 0
+        # Indices and index pointers must have the same type
+        idx_dtype = numpy.int32 if nnz < 2 ** 31 else numpy.int64
+        for name in names:
+            count = n_samples + 1 if name == 'indptr' else \
+                nnz if name in ('data', 'indices') else n_samples
+            _finish_array(tmp, name, dtypes[name], count,
+                          idx_dtype if name in ('indices', 'indptr')
+                          else None,
+                          offset if name == 'indices' else 0)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    meta = {'version': CACHE_VERSION,
+            'source': os.path.abspath(infile),
+            'source_size': size,
+            'source_mtime': mtime,
+            'shape': [n_samples, int(max_index) + 1 + offset],
+            'nnz': nnz,
+            'arrays': sorted(names)}
+    _commit(tmp, path, meta)
+
+
+def ensure(infile, cache_dir=None):
+    """
+    Makes sure that an up-to-date bundle of infile exists and returns
+    its path.
+    """
+    if cache_dir is None:
+        cache_dir = CACHE_DIR
+    path = cache_path(infile, cache_dir)
+    if not is_fresh(infile, path):
+        print('Caching {} [{}]'.format(infile, path))
+        build(infile, path)
+    return path
+
+
+def load_dataset(infile, n_features=None, cache_dir=None):
+    """
+    A cached replacement for datasets.scan_libsvm(). Returns a CSR
+    matrix backed by read-only memory-mapped arrays and memory-mapped
+    arrays of labels, dates and SHA256 digests. If n_features is
+    given, the matrix has exactly that many columns.
+    """
+    import scipy.sparse
+    arrays, meta = load_bundle(ensure(infile, cache_dir))
+    n_samples, n_cols = meta['shape']
+    if n_features is not None:
+        if n_features < n_cols:
+            raise ValueError('n_features was set to {}, but input file '
+                             'contains {} features'.format(n_features,
+                                                           n_cols))
+        n_cols = n_features
+    X = scipy.sparse.csr_matrix((arrays['data'], arrays['indices'],
+                                 arrays['indptr']),
+                                shape=(n_samples, n_cols), copy=False)
+    return X, arrays['labels'], arrays['dates'], arrays['digests']
+
+
+def load_svmlight(infile, n_features=None, cache_dir=None):
+    """
+    A cached replacement for sklearn.datasets.load_svmlight_file().
+    Returns a CSR matrix and an array of labels as load_dataset().
+    """
+    return load_dataset(infile, n_features, cache_dir)[:2]
+
+
+def load_arrays(infile, names, cache_dir=None):
+    """
+    Returns a list of memory-mapped per-sample arrays of LibSVM file
+    infile, any of 'labels', 'dates' and 'digests'.
+    """
+    arrays, _ = load_bundle(ensure(infile, cache_dir), names=names)
+    return [arrays[name] for name in names]
+
+
+def load_labels(infile, cache_dir=None):
+    """
+    Returns the memory-mapped array of labels of LibSVM file infile.
+    """
+    return load_arrays(infile, ['labels'], cache_dir)[0]
+
+
+class FileSource(object):
+    """
+    Loads LibSVM files through their binary caches in cache_dir, with
+    the same methods as samplestore.SampleStore.
+    """
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+
+    def load_dataset(self, infile, n_features=None):
+        return load_dataset(infile, n_features, self.cache_dir)
+
+    def load_svmlight(self, infile, n_features=None):
+        return load_svmlight(infile, n_features, self.cache_dir)
+
+    def load_arrays(self, infile, names):
+        return load_arrays(infile, names, self.cache_dir)
+
+    def load_labels(self, infile):
+        return load_labels(infile, self.cache_dir)
+
+    def source_stamp(self, infile):
+        return source_stamp(infile)
@@ -2,8 +2,123 @@
 Created on November 17, 2014.
 """
 
+import binascii
 import datetime
+import io
+import itertools
+import os
 import re
+import subprocess
+import tempfile
+import warnings
+
+import numpy
+
+DATE_RE = re.compile(br'\d{4}/\d{2}/\d{2}')
+SHA256_RE = re.compile(br'[a-fA-F0-9]{64}')
+COMMENT_RE = re.compile(br'#[^\n]*')
+NO_DATE = numpy.datetime64('NaT', 'D')
+CHUNK_SIZE = 64 * 1024 * 1024
+# Commands decompressing files of every compressed format to standard
+# output, the preferred first; they run in a separate process, in
+# parallel with parsing, and pigz and xz use several threads
+DECOMPRESSORS = {'.gz': [['pigz', '-dc'], ['gzip', '-dc']],
+                 '.xz': [['xz', '-dc', '-T0']],
+                 '.zst': [['zstd', '-dcq']]}
+
+
+def find_command(command):
+    """
+    Returns the path of executable command on the search path, or
+    None if there is none.
+    """
+    for d in os.environ.get('PATH', os.defpath).split(os.pathsep):
+        path = os.path.join(d, command)
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+
+class _Decompressor(object):
+    """
+    A binary file object reading the output of a decompression command
+    run on a file. Decompression errors are raised as IOError when the
+    output has been read to the end and the file object is closed.
+    """
+    def __init__(self, command, infile):
+        self.infile = infile
+        self.errors = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(command + [infile],
+                                     stdout=subprocess.PIPE,
+                                     stderr=self.errors)
+        self.eof = False
+
+    def read(self, size=-1):
+        data = self.proc.stdout.read(size)
+        if not data and size != 0:
+            self.eof = True
+        return data
+
+    def readline(self):
+        line = self.proc.stdout.readline()
+        if not line:
+            self.eof = True
+        return line
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+    def readlines(self):
+        return list(self)
+
+    def close(self):
+        if self.proc is None:
+            return
+        if not self.eof and self.proc.poll() is None:
+            # Closed before the end, the rest is not needed
+            self.proc.kill()
+        self.proc.stdout.close()
+        code = self.proc.wait()
+        self.proc = None
+        self.errors.seek(0)
+        message = self.errors.read().decode('utf-8', 'replace').strip()
+        self.errors.close()
+        if self.eof and code != 0:
+            raise IOError('Cannot decompress {}: {}'.format(self.infile,
+                                                            message))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_input(infile):
+    """
+    Opens infile for reading in binary mode. Files compressed with
+    gzip (.gz), xz (.xz) or Zstandard (.zst) are decompressed while
+    they are read, by a command from DECOMPRESSORS or, without one,
+    by the gzip or lzma module.
+    """
+    suffix = os.path.splitext(infile)[1].lower()
+    if suffix not in DECOMPRESSORS:
+        return open(infile, 'rb')
+    for command in DECOMPRESSORS[suffix]:
+        if find_command(command[0]):
+            return _Decompressor(command, infile)
+    if suffix == '.gz':
+        import gzip
+        return gzip.open(infile, 'rb')
+    if suffix == '.xz':
+        try:
+            import lzma
+        except ImportError:
+            raise IOError('Cannot decompress {}: xz is not installed'
+                          .format(infile))
+        return lzma.open(infile, 'rb')
+    raise IOError('Cannot decompress {}: zstd is not installed'.format(
+        infile))
 
 
 def load_dates(infile):
@@ -12,12 +127,14 @@ def load_dates(infile):
     per line. Returns a list of datetime.date objects, in order of
     encounter.
     """
-    datere = re.compile(r'\d{4}/\d{2}/\d{2}')
+    datere = re.compile(br'\d{4}/\d{2}/\d{2}')
     dates = []
-    for line in open(infile, 'rb'):
-        match = re.search(datere, line)
-        if match:
-            dates.append(datetime.date(*(map(int, match.group().split('/')))))
+    with open_input(infile) as fin:
+        for line in fin:
+            match = re.search(datere, line)
+            if match:
+                dates.append(datetime.date(
+                    *(map(int, match.group().split(b'/')))))
     return dates
 
 
@@ -27,10 +144,207 @@ def load_SHA256_sums(infile):
     characters), at most one per line. Returns them as a list of
     strings, in order of encounter.
     """
-    id_re = re.compile(r'[a-fA-F0-9]{64}')
+    id_re = re.compile(br'[a-fA-F0-9]{64}')
     labels = []
-    for line in open(infile, 'rb'):
-        match = re.search(id_re, line)
-        if match:
-            labels.append(match.group())
+    with open_input(infile) as fin:
+        for line in fin:
+            match = re.search(id_re, line)
+            if match:
+                labels.append(match.group())
     return labels
+
+
+def _first_per_line(regex, chunk, line_ends):
+    """
+    Finds the first match of regex on every line of chunk. Returns the
+    line numbers of matches and a list of matches.
+    """
+    matches = list(regex.finditer(chunk))
+    starts = numpy.fromiter((m.start() for m in matches), numpy.int64,
+                            len(matches))
+    lines = numpy.searchsorted(line_ends, starts)
+    lines, first = numpy.unique(lines, return_index=True)
+    return lines, [matches[i] for i in first]
+
+
+def _parse_dates(text):
+    """
+    Converts the concatenation of dates formatted as YYYY/MM/DD into
+    an array of numpy.datetime64 days.
+    """
+    digits = numpy.frombuffer(text, numpy.uint8).reshape((-1, 10)) \
+        .astype(numpy.int64) - ord('0')
+    years = digits[:, 0:4].dot([1000, 100, 10, 1])
+    months = digits[:, 5:7].dot([10, 1])
+    days = digits[:, 8:10].dot([10, 1])
+    dates = (years - 1970).astype('datetime64[Y]').astype('datetime64[M]')
+    dates = (dates + (months - 1)).astype('datetime64[D]')
+    return dates + (days - 1)
+
+
+def _scan_chunk(chunk):
+    """
+    Parses a chunk of complete LibSVM lines. Returns a CSR matrix with
+    feature indices as they appear in the chunk, labels, dates and
+    SHA256 digests of all samples.
+    """
+    line_ends = numpy.flatnonzero(numpy.frombuffer(chunk, numpy.uint8) ==
+                                  ord('\n'))
+    line_starts = numpy.concatenate(([0], line_ends[:-1] + 1))
+    # A line holds a sample unless it is empty or only a comment
+    firsts = numpy.frombuffer(chunk, numpy.uint8)[line_starts]
+    is_sample = numpy.isin(firsts, numpy.frombuffer(b'#\n\r \t',
+                                                     numpy.uint8),
+                            invert=True)
+    # Imported here, scikit-learn is slow to import and only parsing
+    # (not loading cached data) needs it
+    from sklearn.datasets import load_svmlight_file
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        X, y = load_svmlight_file(io.BytesIO(chunk), zero_based=True)
+    if is_sample.sum() != X.shape[0]:
+        # Leading whitespace, fall back to a slow, exact check
+        is_sample = numpy.array([len(line.split(b'#')[0].strip()) > 0
+                                 for line in chunk.split(b'\n')[:-1]])
+    sample_lines = numpy.flatnonzero(is_sample)
+
+    def to_samples(lines):
+        if not len(sample_lines):
+            # Only comments, none of which belongs to a sample
+            return lines, numpy.zeros(len(lines), dtype=bool)
+        samples = numpy.searchsorted(sample_lines, lines)
+        samples[samples == len(sample_lines)] = 0
+        return samples, sample_lines[samples] == lines
+
+    # Dates and SHA256 sums are searched for only in comments, which
+    # are much shorter than the features
+    comment_lines, comments = _first_per_line(COMMENT_RE, chunk, line_ends)
+    comment_text = b'\n'.join(m.group() for m in comments) + b'\n'
+    text_ends = numpy.flatnonzero(
+        numpy.frombuffer(comment_text, numpy.uint8) == ord('\n'))
+
+    dates = numpy.empty(X.shape[0], dtype='datetime64[D]')
+    dates.fill(NO_DATE)
+    lines, matches = _first_per_line(DATE_RE, comment_text, text_ends)
+    if len(lines):
+        samples, valid = to_samples(comment_lines[lines])
+        text = b''.join(m.group() for m in matches)
+        dates[samples[valid]] = _parse_dates(text)[valid]
+
+    digests = numpy.zeros(X.shape[0], dtype='S32')
+    lines, matches = _first_per_line(SHA256_RE, comment_text, text_ends)
+    if len(lines):
+        samples, valid = to_samples(comment_lines[lines])
+        text = b''.join(m.group() for m in matches)
+        digests[samples[valid]] = numpy.frombuffer(
+            binascii.unhexlify(text), dtype='S32')[valid]
+    return X, y, dates, digests
+
+
+def iter_libsvm(infile, chunk_size=CHUNK_SIZE):
+    """
+    Reads LibSVM file infile in chunks of about chunk_size bytes and
+    yields a tuple (X, y, dates, digests) for every chunk, where X is
+    a CSR matrix with feature indices exactly as they appear in the
+    file, y are labels, dates are numpy.datetime64 days (NaT where
+    a sample has no date) and digests are SHA256 sums as 32-byte
+    strings (zeros where a sample has no SHA256 sum). Compressed files
+    are read as described in open_input().
+    """
+    with open_input(infile) as fin:
+        for chunk in iter_libsvm_stream(fin, chunk_size):
+            yield chunk
+
+
+def iter_libsvm_stream(fin, chunk_size=CHUNK_SIZE):
+    """
+    Like iter_libsvm(), but reads LibSVM data from binary file object
+    fin, e.g. a pipe.
+    """
+    rest = b''
+    while True:
+        block = fin.read(chunk_size)
+        if not block:
+            break
+        block = rest + block
+        cut = block.rfind(b'\n') + 1
+        block, rest = block[:cut], block[cut:]
+        if block:
+            yield _scan_chunk(block)
+    if rest.strip():
+        yield _scan_chunk(rest + b'\n')
+
+
+def iter_libsvm_lines(fin, lines):
+    """
+    Like iter_libsvm_stream(), but parses at most lines lines at a
+    time, so that samples arriving slowly through a pipe are parsed
+    as soon as as many have arrived rather than CHUNK_SIZE bytes.
+    """
+    while True:
+        block = b''.join(itertools.islice(iter(fin.readline, b''), lines))
+        if not block:
+            break
+        if not block.endswith(b'\n'):
+            block += b'\n'
+        yield _scan_chunk(block)
+
+
+def scan_libsvm(infile, n_features=None, zero_based='auto',
+                chunk_size=CHUNK_SIZE):
+    """
+    Parses LibSVM file infile in a single pass. Returns a CSR matrix
+    of features, labels, dates and SHA256 digests of all samples as
+    described in iter_libsvm(). The arguments n_features and
+    zero_based have the same meaning as in
+    sklearn.datasets.load_svmlight_file().
+    """
+    import scipy.sparse
+    datas, indices, indptrs, ys, dates, digests = [], [], [], [], [], []
+    nnz = 0
+    for X, y, d, h in iter_libsvm(infile, chunk_size):
+        datas.append(X.data)
+        indices.append(X.indices)
+        indptrs.append(X.indptr[1:] + nnz)
+        nnz += X.nnz
+        ys.append(y)
+        dates.append(d)
+        digests.append(h)
+    if not ys:
+        raise ValueError('No samples in {}'.format(infile))
+    data = numpy.concatenate(datas)
+    indices = numpy.concatenate(indices)
+    indptr = numpy.concatenate([[0]] + indptrs).astype(indices.dtype)
+    if zero_based is False or (zero_based == 'auto' and len(indices) and
+                               indices.min() > 0):
+        indices -= 1
+    n_cols = indices.max() + 1 if len(indices) else 0
+    if n_features is not None:
+        if n_features < n_cols:
+            raise ValueError('n_features was set to {}, but input file '
+                             'contains {} features'.format(n_features,
+                                                           n_cols))
+        n_cols = n_features
+    X = scipy.sparse.csr_matrix((data, indices, indptr),
+                                shape=(len(indptr) - 1, n_cols))
+    return (X, numpy.concatenate(ys), numpy.concatenate(dates),
+            numpy.concatenate(digests))
+
+
+def digests_to_hex(digests):
+    """
+    Converts an array of 32-byte SHA256 digests into a list of
+    lowercase hexadecimal strings.
+    """
+    text = binascii.hexlify(numpy.ascontiguousarray(digests, dtype='S32')
+                            .tobytes()).decode('ascii')
+    return [text[i:i + 64] for i in range(0, len(text), 64)]
+
+
+def date_range(dates):
+    """
+    Returns the earliest and the latest of an array of
+    numpy.datetime64 dates as datetime.date objects, ignoring NaT.
+    """
+    dates = dates[~numpy.isnat(dates)]
+    return dates.min().tolist(), dates.max().tolist()
@@ -8,19 +8,27 @@ from __future__ import print_function
 
 from argparse import ArgumentParser
 import collections
+import hashlib
+import math
+import multiprocessing
+import os
 import pickle
-import shelve
 import sys
-import warnings
 
 import numpy
-import pylab
-from sklearn import datasets, metrics
-from sklearn.ensemble import RandomForestClassifier as RFC
-from sklearn.svm import SVC
 
-import plots
-from datasets import load_dates, load_SHA256_sums
+from avindex import open_avstats
+import fitcache
+import memplan
+import metrics
+import models
+import samplestore
+import timewindows
+import windowforest
+from datasets import date_range
+from journal import Journal
+from results import ResultStore, average
+from timing import PhaseTimer, write_trace
 
 ###############################################################################
 # code snippet, to be included in 'sitecustomize.py'
@@ -38,119 +46,712 @@ def info(typet, value, tb):
         print
         # ...then start the debugger in post-mortem mode.
         pdb.pm()
-
-sys.excepthook = info
 ###############################################################################
 
+CLASSIFIERS = ['RF', 'SVM', 'RF-inc', 'SGD', 'RF-window']
+# Classifiers trained on training data in chunks of bounded size
+INCREMENTAL = ('RF-inc', 'SGD')
+FORESTS = ('RF', 'RF-inc', 'RF-window')
+# Version of the format of period results, recorded in journals
+RESULT_VERSION = 4
+# Statistics of every period in result files
+STATS = ['neg_tr', 'pos_tr', 'neg_te', 'pos_te'] + metrics.STATS
+
 
-def experiment_stats(y_tr, y_te, y_pr, y_val):
-    cm = metrics.confusion_matrix(y_te, y_pr)
+def experiment_stats(y_tr, y_te, y_pr, y_val, fixed_fpr=metrics.FIXED_FPR):
+    """
+    Prints and returns the statistics of a period, in the order of
+    STATS, for training labels y_tr, test labels y_te, predicted labels
+    y_pr and decision values y_val.
+    """
+    m = dict((stat, values[0, 0, 0]) for stat, values in
+             metrics.evaluate(y_te, y_pr, y_val, fixed_fpr=fixed_fpr).items())
+    tp, fp, tn, fn = [int(m[stat]) for stat in ('tp', 'fp', 'tn', 'fn')]
     print('      TRUE  FALSE')
-    print('POS {tp:>6} {fp:>6}'.format(tp=cm[1][1], fp=cm[0][1]))
-    print('NEG {tn:>6} {fn:>6}'.format(tn=cm[0][0], fn=cm[1][0]))
+    print('POS {tp:>6} {fp:>6}'.format(tp=tp, fp=fp))
+    print('NEG {tn:>6} {fn:>6}'.format(tn=tn, fn=fn))
 
-    neg_tr, neg_te = len(numpy.where(y_tr < 0.5)[0]), cm[0][1] + cm[0][0]
-    assert len(numpy.where(y_te < 0.5)[0]) == neg_te
+    neg_tr, neg_te = len(numpy.where(y_tr < 0.5)[0]), tn + fp
     print('Negatives: train {}; test {}'.format(neg_tr, neg_te))
-    pos_tr, pos_te = len(numpy.where(y_tr > 0.5)[0]), cm[1][1] + cm[1][0]
-    assert len(numpy.where(y_te > 0.5)[0]) == pos_te
+    pos_tr, pos_te = len(numpy.where(y_tr > 0.5)[0]), tp + fn
     print('Positives: train {}; test {}'.format(pos_tr, pos_te))
 
-    TPR = float(cm[1][1]) / pos_te
-    FPR = float(cm[0][1]) / neg_te
+    print('Accuracy:', m['acc'])
+    print('AUROC:', m['AUC'])
+    print('TPR at {:g} FPR: {}'.format(fixed_fpr, m['TPR@FPR']))
+    return numpy.array([neg_tr, pos_tr, neg_te, pos_te] +
+                       [m[stat] for stat in metrics.STATS])
 
-    acc = metrics.accuracy_score(y_te, y_pr)
-    print('Accuracy:', acc)
 
-    fprs, tprs, _ = metrics.roc_curve(y_te, y_val)
-    AUROC = metrics.auc(fprs, tprs)
-    print('AUROC:', AUROC)
-    return numpy.array([neg_tr, pos_tr, neg_te, pos_te, acc, AUROC, TPR, FPR])
+def bootstrap_intervals(scoresl, resamples, level=0.95,
+                        fixed_fpr=metrics.FIXED_FPR, seed=None):
+    """
+    Computes bootstrap confidence intervals of metrics.STATS in every
+    period, averaged over repetitions, from a list with a list of
+    (test labels, predicted labels, decision values) of every period
+    for every repetition. Returns a dictionary with the 'level', the
+    number of 'resamples' and dictionaries mapping statistics to
+    arrays of 'lower' and 'upper' bounds.
+    """
+    periods = scoresl[0]
+    y_true = numpy.concatenate([p[0] for p in periods])
+    groups = numpy.repeat(numpy.arange(len(periods)),
+                          [len(p[0]) for p in periods])
+    y_pred = numpy.vstack([numpy.concatenate([p[1] for p in rep])
+                           for rep in scoresl])
+    y_score = numpy.vstack([numpy.concatenate([p[2] for p in rep])
+                            for rep in scoresl])
+    ci = metrics.bootstrap(y_true, y_pred, y_score, groups, resamples, level,
+                           fixed_fpr, seed)
+    return {'level': level,
+            'resamples': resamples,
+            'lower': dict((stat, ci[stat][0]) for stat in ci),
+            'upper': dict((stat, ci[stat][1]) for stat in ci)}
 
 
-def perform_experiment(train_fs, test_fs, avstats_in, binarize,
-                       classifier='RF', subsample=False):
-    print('Performing experiment')
-    res = []
-    key_dates = []
-    avstats = collections.defaultdict(int)
-    for w, (f_tr, f_te) in enumerate(zip(train_fs, test_fs), start=1):
-        # Load test dates
-        dates = numpy.array(load_dates(f_te))
-        week_s, week_e = dates.min(), dates.max()
-        key_dates.append(week_s)
-        print('\nPeriod {} [{} - {}]'.format(w, week_s, week_e))
+def binarized(X):
+    """
+    Returns a binary version of CSR matrix X, sharing its structure.
+    """
+    import scipy.sparse
+    return scipy.sparse.csr_matrix((numpy.ones(X.nnz), X.indices, X.indptr),
+                                   shape=X.shape, copy=False)
 
-        # Load training data
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            X_tr, y_tr = datasets.load_svmlight_file(f_tr)
-        print(X_tr.shape)
-        if subsample:
-            new_size = int(round(X_tr.shape[0] * subsample))
-            subsam = numpy.random.choice(X_tr.shape[0], new_size)
-            X_tr = X_tr[subsam, :]
-            y_tr = y_tr[subsam]
+
+def subsample_rows(y, subsample, stratified=False, rng=numpy.random):
+    """
+    Returns indices of the samples with labels y to train on: a
+    random sample of the given fraction of them with replacement, a
+    stratified sample without replacement (see stratified_sample())
+    or, if subsample is False, all of them. Samples are drawn from
+    rng, a numpy RandomState, by default the global one.
+    """
+    if subsample and stratified:
+        return stratified_sample(y, subsample, rng)
+    elif subsample:
+        return rng.choice(len(y), int(round(len(y) * subsample)))
+    return numpy.arange(len(y))
+
+
+def stratified_sample(y, fraction, rng=numpy.random):
+    """
+    Returns sorted indices of a random sample of the given fraction of
+    labels y, without replacement and with the same class proportions,
+    drawn from rng as in subsample_rows().
+    """
+    rows = [rng.choice(numpy.where(y == c)[0],
+                       int(round((y == c).sum() * fraction)),
+                       replace=False)
+            for c in numpy.unique(y)]
+    return numpy.sort(numpy.concatenate(rows))
+
+
+def data_matrix(X, representation):
+    """
+    Converts CSR matrix X into representation, one of
+    memplan.REPRESENTATIONS.
+    """
+    if representation == 'dense64':
+        return X.toarray()
+    elif representation == 'dense32':
+        return X.astype(numpy.float32).toarray()
+    return X
+
+
+def training_matrix(X, classifier, binarize, representation):
+    """
+    Converts training data X into the representation that classifier
+    is trained on.
+    """
+    if binarize:
+        X = binarized(X)
+    if representation != 'sparse':
+        return data_matrix(X, representation)
+    elif classifier in FORESTS:
+        # The format RandomForestClassifier.fit() converts to anyway
+        return X.astype(numpy.float32).tocsc()
+    return X
+
+
+def fit_incremental(clf, X_tr, y_tr, rows, classifier, binarize,
+                    representation, chunk_size):
+    """
+    Trains clf on rows of X_tr in random chunks of at most chunk_size
+    rows, so that only one chunk is in memory at a time. A Random
+    Forest grows a share of its trees on every chunk, other
+    classifiers are updated using partial_fit().
+    """
+    classes = numpy.unique(y_tr)
+    order = numpy.random.permutation(rows)
+    n_chunks = int(math.ceil(len(order) / float(chunk_size)))
+    trees = int(math.ceil(200.0 / n_chunks))
+    for k in range(n_chunks):
+        chunk = numpy.sort(order[k * chunk_size:(k + 1) * chunk_size])
+        X = training_matrix(X_tr[chunk], classifier, binarize,
+                            representation)
+        y = y_tr[chunk]
+        print('Training chunk {}/{}: {}'.format(k + 1, n_chunks, X.shape))
+        if classifier == 'RF-inc':
+            if len(numpy.unique(y)) < len(classes):
+                print('Skipping chunk with a single class')
+                continue
+            clf.set_params(n_estimators=len(getattr(clf, 'estimators_',
+                                                    [])) + trees)
+            clf.fit(X, y)
+        else:
+            clf.partial_fit(X, y, classes=classes)
+        del X
+
+
+def classify_batches(clf, X_te, classifier, binarize, representation,
+                     batch_size):
+    """
+    Classifies the rows of CSR matrix X_te with trained classifier clf
+    in batches of at most batch_size rows. Every batch is binarized
+    and converted into representation on its own, so only one batch
+    is ever copied out of the memory-mapped cache. The classifier is
+    evaluated once per batch: predicted labels are derived from the
+    class probabilities of forests and the decision values of other
+    classifiers, as their predict() methods do. Returns the predicted
+    labels and the decision values.
+    """
+    n_samples = X_te.shape[0]
+    y_pr = numpy.empty(n_samples, dtype=clf.classes_.dtype)
+    y_val = numpy.empty(n_samples)
+    for start in range(0, n_samples, batch_size):
+        end = min(start + batch_size, n_samples)
+        X = X_te[start:end]
         if binarize:
-            X_tr.data = numpy.ones_like(X_tr.data)
-        X_tr = X_tr.toarray()
-
-        # Train classifier
-        if classifier == 'RF':
-            clf = RFC(n_estimators=200, n_jobs=1 if subsample else -1)
-        elif classifier == 'SVM':
-            clf = SVC(kernel='rbf', gamma=0.0025, C=12)
+            X = binarized(X)
+        X = data_matrix(X, representation)
+        if classifier in FORESTS:
+            proba = clf.predict_proba(X)
+            y_pr[start:end] = clf.classes_.take(proba.argmax(axis=1))
+            y_val[start:end] = proba[:, 1]
+        else:
+            values = clf.decision_function(X)
+            y_pr[start:end] = clf.classes_.take((values > 0).astype(int))
+            y_val[start:end] = values
+        del X
+    return y_pr, y_val
+
+
+def fit_classifier(X_tr, y_tr, variant, representation, n_jobs, chunk_size,
+                   timer, seed=None, fit_cache=None, train_digest=None):
+    """
+    Trains the classifier of a variant on X_tr as described in
+    train_and_classify(). Returns the training rows actually used and
+    the trained classifier.
+    """
+    classifier = variant['classifier']
+    subsample = variant['subsample']
+    binarize = variant['binarize']
+    rows = subsample_rows(y_tr, subsample, variant.get('stratified'))
+
+    # scikit-learn is slow to import, so only training imports it
+    if classifier == 'RF':
+        from sklearn.ensemble import RandomForestClassifier as RFC
+        clf = RFC(n_estimators=200, n_jobs=n_jobs, random_state=seed)
+    elif classifier == 'SVM':
+        from sklearn.svm import SVC
+        clf = SVC(kernel='rbf', gamma=0.0025, C=12, random_state=seed)
+    elif classifier == 'RF-inc':
+        from sklearn.ensemble import RandomForestClassifier as RFC
+        clf = RFC(warm_start=True, n_jobs=n_jobs, random_state=seed)
+    elif classifier == 'SGD':
+        from sklearn.linear_model import SGDClassifier
+        clf = SGDClassifier(random_state=seed)
+    key = None
+    if fit_cache is not None and seed is not None:
+        params = clf.get_params()
+        del params['n_jobs']  # Does not change the trained classifier
+        key = fitcache.fit_key(
+            train=train_digest, classifier=classifier, binarize=binarize,
+            subsample=subsample, stratified=bool(variant.get('stratified')),
+            representation=representation, params=params, seed=seed,
+            chunk_size=chunk_size if classifier in INCREMENTAL else None)
+        with timer.phase('fit_cache'):
+            cached = fit_cache.get(key)
+        if cached is not None:
+            print('Using cached classifier {}'.format(key[:12]))
+            return rows, cached
+    if classifier in INCREMENTAL:
+        print('Training set size: {}'.format((len(rows), X_tr.shape[1])))
+        with timer.phase('fit'):
+            fit_incremental(clf, X_tr, y_tr, rows, classifier, binarize,
+                            representation, chunk_size)
+    else:
+        with timer.phase('densify'):
+            if subsample:
+                X_tr = X_tr[rows, :]
+                y_tr = y_tr[rows]
+            X_tr = training_matrix(X_tr, classifier, binarize,
+                                   representation)
         sample_weight = None
         print('Training set size: {}'.format(X_tr.shape))
-        clf.fit(X_tr, y_tr, sample_weight=sample_weight)
-        tr_n_feats = X_tr.shape[1]
+        with timer.phase('fit'):
+            clf.fit(X_tr, y_tr, sample_weight=sample_weight)
         del X_tr
+    if key is not None:
+        with timer.phase('fit_cache'):
+            fit_cache.put(key, clf)
+    return rows, clf
 
-        # Load and classify test data
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            X_te, y_te = datasets.load_svmlight_file(f_te, n_features=tr_n_feats)
-        if binarize:
-            X_te.data = numpy.ones_like(X_te.data)
-        X_te = X_te.toarray()
-        print('Test set size: {}'.format(X_te.shape))
-        y_pr = clf.predict(X_te)
-        if classifier == 'RF':
-            y_val = clf.predict_proba(X_te)[:, 1]
-        elif classifier == 'SVM':
-            y_val = clf.decision_function(X_te)
-        del X_te
+
+def fit_window_forest(X_tr, y_tr, variant, representation, n_jobs, timer,
+                      window, fit_cache=None):
+    """
+    Trains a windowforest.WindowForest on X_tr: a Random Forest of
+    window['trees'] trees for every week of the sliding window (see
+    windowforest.week_groups()), subsampled as the variant says. The
+    sub-forests of weeks with the same samples are trained only once
+    per process and looked up in and saved into FitCache fit_cache.
+    Every sub-forest is seeded by the samples of its week, so that it
+    is the same whichever period trains it, even in unseeded
+    experiments. window is a dictionary with the
+    'dates' and 'digests' of training samples, the 'start' date of the
+    test period, the feature 'ids' of the columns of X_tr (see
+    windowforest.feature_ids()), the 'retention' policy, the 'seed' of
+    the experiment and the 'repetition'. Returns the training rows
+    actually used and the forest.
+    """
+    from sklearn.ensemble import RandomForestClassifier as RFC
+    classes = numpy.unique(y_tr)
+    seed = window['seed']
+    forests, columns, keys, used = [], [], [], []
+    for week, rows in windowforest.week_groups(
+            window['dates'], y_tr, window['start'], window['retention']):
+        if len(numpy.unique(y_tr[rows])) < len(classes):
+            print('Week of {}: skipping {} samples of a single class'
+                  .format(week, len(rows)))
+            continue
+        digest = windowforest.group_digest(window['digests'], y_tr, rows)
+        # Seeded by the samples of the week rather than the period, so
+        # that every period sharing the week trains the same sub-forest
+        sub_seed = variant_seed(seed, window['repetition'],
+                                'week-' + digest, variant)
+        rng = numpy.random.RandomState(sub_seed)
+        rows = rows[subsample_rows(y_tr[rows], variant['subsample'],
+                                   variant.get('stratified'), rng)]
+        clf = RFC(n_estimators=window['trees'], n_jobs=n_jobs,
+                  random_state=rng)
+        params = clf.get_params()
+        del params['n_jobs']
+        params['random_state'] = sub_seed
+        key = fitcache.fit_key(
+            samples=digest, classifier=variant['classifier'],
+            binarize=variant['binarize'], subsample=variant['subsample'],
+            stratified=bool(variant.get('stratified')),
+            representation=representation, params=params, seed=seed,
+            repetition=window['repetition'])
+        with timer.phase('fit_cache'):
+            found = windowforest.lookup(key, fit_cache)
+        if found is None:
+            with timer.phase('densify'):
+                X = training_matrix(X_tr[rows], 'RF-window',
+                                    variant['binarize'], representation)
+            with timer.phase('fit', week=str(week)):
+                clf.fit(X, y_tr[rows])
+            del X
+            with timer.phase('fit_cache'):
+                windowforest.store(key, clf, window['ids'], fit_cache)
+            found = (clf, window['ids'])
+        print('Week of {}: {} {} samples'.format(
+            week, 'reusing' if found[0] is not clf else 'trained on',
+            len(rows)))
+        forests.append(found[0])
+        columns.append(windowforest.column_map(found[1], window['ids']))
+        keys.append(key)
+        used.append(rows)
+    if not forests:
+        raise ValueError('No week of the training window has samples of '
+                         'every class')
+    return (numpy.unique(numpy.concatenate(used)),
+            windowforest.WindowForest(forests, columns, classes, keys))
+
+
+def train_and_classify(X_tr, y_tr, X_te, variant, representation='dense64',
+                       batch_size=10000, n_jobs=None, chunk_size=100000,
+                       timer=None, seed=None, fit_cache=None,
+                       train_digest=None, window=None):
+    """
+    Trains the classifier of a variant (a dictionary with keys
+    'classifier', 'binarize' and 'subsample', and optionally
+    'stratified' for stratified subsampling without replacement) on
+    X_tr and classifies X_te, with data converted into representation
+    (one of memplan.REPRESENTATIONS). The data matrices are not
+    modified. Incremental classifiers are trained on chunks of at
+    most chunk_size samples and X_te is classified in batches of
+    batch_size samples (see classify_batches()). Phases of work are
+    timed with PhaseTimer timer, if given. The classifier is seeded
+    with seed, if given. Seeded classifiers are looked up in, and
+    saved into, FitCache fit_cache under a key made of train_digest,
+    the digest of the training data, and everything else training
+    depends on. 'RF-window' forests are trained per week of the
+    sliding window described by the dictionary window (see
+    fit_window_forest()). Returns the training labels actually used,
+    predicted test labels, test decision values and the trained
+    classifier.
+    """
+    timer = timer or PhaseTimer()
+    if n_jobs is None:
+        n_jobs = 1 if variant['subsample'] else -1
+    if variant['classifier'] == 'RF-window':
+        rows, clf = fit_window_forest(X_tr, y_tr, variant, representation,
+                                      n_jobs, timer, window, fit_cache)
+    else:
+        rows, clf = fit_classifier(X_tr, y_tr, variant, representation,
+                                   n_jobs, chunk_size, timer, seed,
+                                   fit_cache, train_digest)
+
+    # Classify test data
+    print('Test set size: {}'.format(X_te.shape))
+    with timer.phase('predict'):
+        y_pr, y_val = classify_batches(clf, X_te, variant['classifier'],
+                                       variant['binarize'], representation,
+                                       batch_size)
+    return y_tr[rows], y_pr, y_val, clf
+
+
+def variant_seed(seed, i, w, variant):
+    """
+    Returns the seed of the random number generators for repetition i
+    and period w of a variant, derived from the seed of the experiment
+    so that every period and variant is reproducible on its own,
+    whichever process performs it and in whatever order.
+    """
+    text = '{}/{}/{}/{}'.format(seed, i, w, variant_name(variant))
+    return int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:8], 16)
+
+
+def model_name(variant, i, w):
+    """
+    Returns the name of the model of repetition i and period w of a
+    variant in a model store: the base name of the variant's result
+    file, or else its description, followed by /rII/wWW.
+    """
+    if variant['res_out']:
+        base = os.path.splitext(os.path.basename(variant['res_out']))[0]
+    else:
+        base = variant_name(variant).replace(', ', '-').replace(' ', '-')
+    return '{}/r{:02d}/w{:02d}'.format(base, i, w)
+
+
+def perform_period(w, f_tr, f_te, avstats_in, variants, cache_dir=None,
+                   sparse=False, batch_size=10000, n_jobs=None,
+                   chunk_size=100000, memory_budget=None, model_store=None,
+                   repetition=1, seed=None, fit_cache=None,
+                   fit_cache_size=None, feature_f=None, retention='window',
+                   week_trees=50, fixed_fpr=metrics.FIXED_FPR,
+                   sample_store=None, windows=None, keep_scores=False):
+    """
+    Trains on training file f_tr and evaluates on test file f_te of
+    period w, once for every variant in the list variants. The data
+    is loaded only once for all variants. Antivirus detections are
+    looked up in AVIndex avstats_in. With a memory budget in bytes,
+    the representation of the data and subsampling are planned to
+    fit into it. With a model store directory, trained classifiers
+    are saved into it (see models.ModelStore) under model_name().
+    With a seed, every variant is trained with random numbers seeded
+    by variant_seed(), and trained classifiers are cached in the
+    fit_cache directory, at most fit_cache_size bytes of them (see
+    fitcache.FitCache); the sub-forests of 'RF-window' are cached
+    there with or without a seed. 'RF-window' forests grow week_trees
+    trees per week with the given retention policy (see
+    windowforest.RETENTION), in the feature space of feature list file
+    feature_f, if given.
+    Returns a list with an array of statistics, the first date of the
+    test period, a dictionary of antivirus detection counts, the
+    memory plan (see memplan.plan()) with the measured 'peak', a list
+    of timed phases (see PhaseTimer), the digest of the saved
+    classifier (None if not saved) and, if keep_scores, the test
+    labels, predicted labels and decision values (else None) for every
+    variant. True positive rates
+    are also measured at a false positive rate of fixed_fpr. Data is
+    loaded from the sample store directory sample_store, if given
+    (see samplestore.SampleStore). With windows, f_tr and f_te are
+    the same pool of dated samples, from which the training and test
+    sets of period w are chosen as described by the dictionary
+    windows: the first days of all test periods ('starts'), the
+    length of test periods and the retention of benign and malicious
+    samples (see timewindows.split()).
+    """
+    timer = PhaseTimer()
+    with timer.phase('load'):
+        source = samplestore.open_source(cache_dir, sample_store)
+        # Load test dates and file IDs
+        if windows is None:
+            dates, digests = source.load_arrays(f_te, ['dates', 'digests'])
+        else:
+            X, y, pool_dates, pool_digests = source.load_dataset(f_te)
+            tr_rows, te_rows = timewindows.split(
+                pool_dates, y, windows['starts'][w - 1],
+                windows['test_weeks'], windows['benign'],
+                windows['malicious'])
+            if not len(te_rows):
+                raise ValueError('No samples in the test set of period {} '
+                                 '[{}]'.format(w, windows['starts'][w - 1]))
+            dates, digests = pool_dates[te_rows], pool_digests[te_rows]
+        week_s, week_e = date_range(dates)
+        print('\nPeriod {} [{} - {}]'.format(w, week_s, week_e))
+
+        # Load training and test data
+        if windows is None:
+            X_tr, y_tr = source.load_svmlight(f_tr)
+            X_te, y_te = source.load_svmlight(f_te,
+                                              n_features=X_tr.shape[1])
+        else:
+            X_tr, y_tr = X[tr_rows], y[tr_rows]
+            X_te, y_te = X[te_rows], y[te_rows]
+        print(X_tr.shape)
+
+    # AV detection results of malicious samples
+    with timer.phase('avstats'):
+        av_counts = avstats_in.count(digests[numpy.where(y_te > 0.5)])
+    cache = train_digest = None
+    # Sub-forests of RF-window are reusable in unseeded experiments too
+    if fit_cache and (seed is not None or
+                      any(v['classifier'] == 'RF-window' for v in variants)):
+        cache = fitcache.FitCache(fit_cache, fit_cache_size)
+    if cache is not None and seed is not None:
+        with timer.phase('data_digest'):
+            if sample_store:
+                train_digest = source.digest(f_tr)
+            else:
+                train_digest = cache.data_digest(f_tr)
+            if windows is not None:
+                # The training set is a selection of samples of the pool
+                sha = hashlib.sha256(train_digest.encode('ascii'))
+                sha.update(numpy.ascontiguousarray(
+                    tr_rows, dtype=numpy.int64).tobytes())
+                train_digest = sha.hexdigest()
+    window = None
+    if any(v['classifier'] == 'RF-window' for v in variants):
+        with timer.phase('load'):
+            if windows is None:
+                tr_dates, tr_digests = source.load_arrays(
+                    f_tr, ['dates', 'digests'])
+                start = week_s
+            else:
+                tr_dates = pool_dates[tr_rows]
+                tr_digests = pool_digests[tr_rows]
+                start = windows['starts'][w - 1]
+            window = {'dates': tr_dates,
+                      'digests': tr_digests,
+                      'start': numpy.datetime64(start, 'D'),
+                      'ids': windowforest.feature_ids(feature_f,
+                                                      X_tr.shape[1]),
+                      'retention': retention,
+                      'trees': week_trees,
+                      'seed': seed,
+                      'repetition': repetition}
+    shared = timer.records
+
+    results = []
+    window_keys = []
+    for variant in variants:
+        print('\nVariant: {}'.format(variant_name(variant)))
+        jobs = n_jobs
+        if jobs is None:
+            jobs = 1 if variant['subsample'] else -1
+        mplan = memplan.plan(
+            variant['classifier'], X_tr.shape, X_tr.nnz, X_te.shape,
+            X_te.nnz, memory_budget, 'sparse' if sparse else 'dense64',
+            variant['subsample'], batch_size, jobs,
+            chunk_size if variant['classifier'] in INCREMENTAL else None)
+        print('Memory plan: {}, subsample {}, estimated peak {}'.format(
+            mplan['representation'], mplan['subsample'],
+            memplan.format_size(mplan['estimate'])))
+        planned = dict(variant, subsample=mplan['subsample'],
+                       stratified=mplan['stratified'])
+        vseed = None
+        if seed is not None:
+            vseed = variant_seed(seed, repetition, w, variant)
+            numpy.random.seed(vseed)
+        timer = PhaseTimer()
+        y_tr_used, y_pr, y_val, clf = train_and_classify(
+            X_tr, y_tr, X_te, planned, mplan['representation'], batch_size,
+            n_jobs, chunk_size, timer, vseed, cache, train_digest, window)
+        mplan['peak'] = max(r['peak'] for r in timer.records)
+        digest = None
+        if model_store:
+            with timer.phase('save_model'):
+                meta = {'classifier': variant['classifier'],
+                        'binarize': variant['binarize'],
+                        'representation': mplan['representation'],
+                        'n_features': X_tr.shape[1],
+                        'train': os.path.abspath(f_tr),
+                        'test': os.path.abspath(f_te),
+                        'week_start': week_s.isoformat(),
+                        'repetition': repetition,
+                        'period': w}
+                if windows is not None:
+                    meta['windows'] = windows
+                digest = models.ModelStore(model_store).put(
+                    clf, meta, model_name(variant, repetition, w))
+            print('Saved model {}'.format(digest))
+        if variant['classifier'] == 'RF-window':
+            window_keys += clf.keys
+        del clf
+        print('Peak memory: estimated {}, measured {}'.format(
+            memplan.format_size(mplan['estimate']),
+            memplan.format_size(mplan['peak'])))
 
         # Evaluate experimental results
-        res.append(experiment_stats(y_tr, y_te, y_pr, y_val))
-
-        # Load file IDs
-        fileIDs = numpy.array(
-            load_SHA256_sums(f_te))[numpy.where(y_te > 0.5)]
-
-        # Update AV detection results
-        for fid in fileIDs:
-            avstats['Total'] += 1
-            if fid in avstats_in:
-                for av, det in avstats_in[fid]['report'].iteritems():
-                    if det:
-                        avstats[av] += 1
-        del fileIDs
-        avstats['Hidost'] += numpy.logical_and(y_te == y_pr, y_te > 0.5).sum()
-    res = numpy.concatenate(res)
-    return res, key_dates, avstats
-
-
-def main():
+        with timer.phase('evaluate'):
+            res = experiment_stats(y_tr_used, y_te, y_pr, y_val, fixed_fpr)
+            avstats = collections.defaultdict(int, av_counts)
+            avstats['Hidost'] += numpy.logical_and(y_te == y_pr,
+                                                   y_te > 0.5).sum()
+        phases = shared + timer.records
+        print('Phases: {}'.format(', '.join(
+            '{} {:.1f} s'.format(r['phase'], r['wall']) for r in phases)))
+        # Per-sample scores are only needed for bootstrap intervals
+        scores = None
+        if keep_scores:
+            scores = ((y_te > 0.5).astype(numpy.int8),
+                      (y_pr > 0.5).astype(numpy.int8), y_val)
+        results.append((res, week_s, avstats, mplan, phases, digest,
+                        scores))
+    # Sub-forests of the weeks of this period may be reused by the next
+    windowforest.retain_only(window_keys)
+    return results
+
+
+def merge_avstats(avstatsl):
+    """
+    Sums a list of dictionaries of antivirus detection counts.
+    """
+    avstats = collections.defaultdict(int)
+    for d in avstatsl:
+        for av, count in d.items():
+            avstats[av] += count
+    return avstats
+
+
+def perform_experiment(train_fs, test_fs, avstats_in, binarize,
+                       classifier='RF', subsample=False, cache_dir=None,
+                       sparse=False, batch_size=10000, n_jobs=None):
+    print('Performing experiment')
+    variant = {'classifier': classifier,
+               'binarize': binarize,
+               'subsample': subsample}
+    periods = [perform_period(w, f_tr, f_te, avstats_in, [variant],
+                              cache_dir, sparse, batch_size, n_jobs)[0]
+               for w, (f_tr, f_te) in enumerate(zip(train_fs, test_fs),
+                                                start=1)]
+    res, key_dates, avstatsl = list(zip(*periods))[:3]
+    return numpy.concatenate(res), list(key_dates), merge_avstats(avstatsl)
+
+
+def parse_variant(spec, defaults):
+    """
+    Parses a variant specification, a comma-separated list of
+    KEY=VALUE pairs, where KEY is one of classifier, binarize,
+    subsample, count and res-out. A bare 'binarize' stands for
+    'binarize=1'. Returns a dictionary with missing values taken from
+    the dictionary defaults.
+    """
+    variant = dict(defaults)
+    for item in spec.split(','):
+        key, _, value = item.strip().partition('=')
+        key = key.replace('-', '_')
+        if key == 'binarize':
+            variant[key] = value.lower() not in ('0', 'false', 'no')
+        elif key == 'classifier':
+            if value not in CLASSIFIERS:
+                raise ValueError('Unknown classifier: {}'.format(value))
+            variant[key] = value
+        elif key == 'subsample':
+            variant[key] = float(value) if float(value) else False
+        elif key == 'count':
+            variant[key] = int(value)
+        elif key == 'res_out':
+            variant[key] = value
+        else:
+            raise ValueError('Unknown variant setting: {}'.format(item))
+    return variant
+
+
+def variant_name(variant):
+    """
+    Returns a short description of a variant.
+    """
+    name = variant['classifier']
+    if variant['binarize']:
+        name += ', binary'
+    if variant['subsample']:
+        name += ', subsample {:g}'.format(variant['subsample'])
+    return name
+
+
+# Antivirus detection data opened by the current (worker) process
+_avstats_in = None
+
+
+def _init_worker(avstats_f):
+    global _avstats_in
+    # Forked workers must not share the state of the parent's RNG
+    numpy.random.seed()
+    _avstats_in = open_avstats(avstats_f)
+
+
+def _perform_task(task):
+    """
+    Performs one period of one repetition of the experiment, as
+    described by task.
+    """
+    i, w, f_tr, f_te, f_feat, variants, kwargs = task
+    print('\n\n{:#^79s}'.format(' Experiment {}, period {} '.format(i, w)))
+    selected = [vi for vi, v in enumerate(variants) if v['count'] >= i]
+    results = perform_period(w, f_tr, f_te, _avstats_in,
+                             [variants[vi] for vi in selected],
+                             repetition=i, feature_f=f_feat, **kwargs)
+    return (i, w), dict(zip(selected, results))
+
+
+def main(argv=None):
     parser = ArgumentParser(description=__doc__)
     parser.add_argument('--train',
                         nargs='+',
-                        required=True,
                         help='Training data file(s).')
     parser.add_argument('--test',
                         nargs='+',
-                        required=True,
                         help='Test data file(s).')
+    parser.add_argument('--pool',
+                        help='A single data file of dated samples to choose '
+                        'the training and test sets of all periods from, '
+                        'instead of --train and --test.')
+    parser.add_argument('--window-weeks',
+                        default=4,
+                        type=int,
+                        help='With --pool, how many weeks before a test set '
+                        'to train on (default: %(default)s).')
+    parser.add_argument('--benign-weeks',
+                        default=None,
+                        help='With --pool, how many weeks before a test set '
+                        'benign samples are trained on, or \'all\' '
+                        '(default: --window-weeks).')
+    parser.add_argument('--malicious-weeks',
+                        default=None,
+                        help='With --pool, how many weeks before a test set '
+                        'malicious samples are trained on, or \'all\' as in '
+                        'SWF-KeepMal (default: --window-weeks).')
+    parser.add_argument('--test-weeks',
+                        default=1,
+                        type=int,
+                        help='With --pool, how many weeks every test set '
+                        'covers (default: %(default)s).')
+    parser.add_argument('--first-test',
+                        default=None,
+                        help='With --pool, the first day of the first test '
+                        'set, YYYY-MM-DD (default: --window-weeks after the '
+                        'first sample).')
+    parser.add_argument('--periods',
+                        default=None,
+                        type=int,
+                        help='With --pool, the number of periods (default: '
+                        'until the last sample).')
     parser.add_argument('-c', '--count',
                         type=int,
                         default=1,
@@ -158,8 +759,9 @@ def main():
                         help='How many times to perform the experiment.')
     parser.add_argument('-s', '--avstats',
                         required=True,
-                        help='Python shelve file with antivirus '
-                        'detection data.')
+                        help='Antivirus detection index (see avindex.py) '
+                        'or Python shelve file with antivirus detection '
+                        'data.')
     parser.add_argument('--binarize',
                         default=False,
                         action='store_true',
@@ -170,58 +772,346 @@ def main():
                         'all results/statistics.')
     parser.add_argument('--classifier',
                         default='RF',
-                        choices=['RF', 'SVM'],
-                        help='Classifier (RF or SVM)')
+                        choices=CLASSIFIERS,
+                        help='Classifier (RF or SVM; RF-inc and SGD are '
+                        'trained incrementally on chunks of training data; '
+                        'RF-window combines forests trained per week of '
+                        'the sliding training window, reusing those of '
+                        'weeks shared with the previous period)')
     parser.add_argument('--subsample',
                         default=False,
                         type=float,
                         help='Training set subsampling percentage')
+    parser.add_argument('--cache-dir',
+                        default=None,
+                        help='Where to keep binary caches of data files '
+                        '(default: next to the data files).')
+    parser.add_argument('--sample-store',
+                        default=samplestore.SAMPLE_STORE,
+                        help='Sample store to load the data files from '
+                        'instead (see samplestore.py; default: '
+                        '$HIDOST_SAMPLE_STORE, if set).')
+    parser.add_argument('--sparse',
+                        default=False,
+                        action='store_true',
+                        help='Keep data in sparse matrices instead of '
+                        'converting them to dense arrays.')
+    parser.add_argument('--batch-size',
+                        default=10000,
+                        type=int,
+                        help='How many test samples to classify at once.')
+    parser.add_argument('--chunk-size',
+                        default=100000,
+                        type=int,
+                        help='How many training samples to train '
+                        'incremental classifiers on at once.')
+    parser.add_argument('--memory-budget',
+                        default=None,
+                        type=memplan.parse_size,
+                        help='Memory available to every period, e.g. 16G. '
+                        'Data is converted into the representation that '
+                        'fits, subsampling the training set if needed.')
+    parser.add_argument('-w', '--workers',
+                        default=1,
+                        type=int,
+                        help='How many periods to perform in parallel.')
+    parser.add_argument('--cpus',
+                        default=None,
+                        type=int,
+                        help='How many CPU cores to use in total (default: '
+                        'all for Random Forests without subsampling).')
+    parser.add_argument('--journal',
+                        default=None,
+                        help='Where to record the results of every '
+                        'period as soon as it is done (default: '
+                        'RES_OUT.journal).')
+    parser.add_argument('--resume',
+                        default=False,
+                        action='store_true',
+                        help='Skip periods already recorded in the journal.')
+    parser.add_argument('--variant',
+                        action='append',
+                        help='Evaluate a variant of the experiment on the '
+                        'same data, given as comma-separated KEY=VALUE '
+                        'pairs with keys classifier, binarize, subsample, '
+                        'count and res-out; missing values are taken from '
+                        'the options above. Can be given multiple times.')
+    parser.add_argument('--trace',
+                        default=None,
+                        help='JSON-lines file to append the time and peak '
+                        'memory of every phase of every period to (see '
+                        'timing.py).')
+    parser.add_argument('--db',
+                        default=None,
+                        help='Results database to store results in.')
+    parser.add_argument('--run',
+                        default=None,
+                        help='Run name of results in the database (default: '
+                        'base name of RES_OUT).')
+    parser.add_argument('--model-store',
+                        default=models.MODEL_STORE,
+                        help='Directory to save the trained classifier of '
+                        'every period into, to score other samples with '
+                        'later (see score.py; default: $HIDOST_MODEL_STORE, '
+                        'if set).')
+    parser.add_argument('--features',
+                        nargs='+',
+                        default=None,
+                        help='Feature list file (.nppf) of every training '
+                        'file, to map the feature spaces of periods onto '
+                        'each other for RF-window (default: all periods '
+                        'share one feature space).')
+    parser.add_argument('--retention',
+                        default='window',
+                        choices=windowforest.RETENTION,
+                        help='Which samples RF-window trains the forest of '
+                        'a week on: its own (window) or also the '
+                        'malicious samples retained from before its '
+                        'window (keepmal).')
+    parser.add_argument('--week-trees',
+                        default=50,
+                        type=int,
+                        help='How many trees RF-window grows per week of '
+                        'training data.')
+    parser.add_argument('--fixed-fpr',
+                        default=metrics.FIXED_FPR,
+                        type=float,
+                        help='False positive rate at which to measure the '
+                        'true positive rate (TPR@FPR).')
+    parser.add_argument('--bootstrap',
+                        default=0,
+                        type=int,
+                        help='How many bootstrap resamples of test samples '
+                        'to compute confidence intervals of metrics from '
+                        '(default: none).')
+    parser.add_argument('--ci-level',
+                        default=0.95,
+                        type=float,
+                        help='Confidence level of the intervals.')
+    parser.add_argument('--seed',
+                        default=None,
+                        type=int,
+                        help='Seed of all random numbers, to make the '
+                        'experiment reproducible (default: unseeded).')
+    parser.add_argument('--fit-cache',
+                        default=fitcache.FIT_CACHE,
+                        help='Directory to cache trained classifiers in, '
+                        'to reuse them when the experiment is repeated '
+                        'with the same training data, settings and '
+                        '--seed, and the forests of weeks of RF-window, '
+                        'also without --seed, to share them between '
+                        'worker processes (default: $HIDOST_FIT_CACHE, '
+                        'if set).')
+    parser.add_argument('--fit-cache-size',
+                        default='20G',
+                        type=memplan.parse_size,
+                        help='Largest size of the fit cache; least '
+                        'recently used classifiers are removed beyond it.')
+    parser.add_argument('--pdb',
+                        default=False,
+                        action='store_true',
+                        help='Start the debugger on uncaught exceptions.')
+
+    args = parser.parse_args(argv)
+    if args.pool:
+        assert args.train is None and args.test is None, (
+            '--pool replaces --train and --test')
+        assert args.features is None, 'A pool has a single feature space'
+        assert args.window_weeks >= 1 and args.test_weeks >= 1
+    else:
+        assert args.train and args.test, ('Training and test files or a '
+                                          'pool are required')
+        assert len(args.train) == len(args.test), ('There must be an equal '
+                                                   'number of training and '
+                                                   'test files')
+        assert args.features is None or len(args.features) == len(
+            args.train)
+    assert args.workers >= 1
+    if args.pdb:
+        sys.excepthook = info
+    defaults = {'classifier': args.classifier,
+                'binarize': args.binarize,
+                'subsample': args.subsample,
+                'count': args.count,
+                'res_out': args.res_out}
+    if args.variant:
+        variants = [parse_variant(spec, defaults) for spec in args.variant]
+    else:
+        variants = [defaults]
+    for variant in variants:
+        if variant['subsample']:
+            assert variant['subsample'] > 0.0 and variant['subsample'] <= 1.0
+        assert 1 <= variant['count'] <= args.count
+
+    # Split CPU cores between parallel periods and Random Forest trees
+    if args.cpus is not None:
+        n_jobs = max(1, args.cpus // args.workers)
+    elif args.workers > 1:
+        n_jobs = max(1, multiprocessing.cpu_count() // args.workers)
+    else:
+        n_jobs = None
+    kwargs = {'cache_dir': args.cache_dir,
+              'sample_store': args.sample_store,
+              'sparse': args.sparse,
+              'batch_size': args.batch_size,
+              'n_jobs': n_jobs,
+              'chunk_size': args.chunk_size,
+              'memory_budget': args.memory_budget,
+              'model_store': args.model_store,
+              'seed': args.seed,
+              'fit_cache': args.fit_cache,
+              'fit_cache_size': args.fit_cache_size,
+              'retention': args.retention,
+              'week_trees': args.week_trees,
+              'fixed_fpr': args.fixed_fpr,
+              'keep_scores': bool(args.bootstrap)}
+    train_fs, test_fs = args.train, args.test
+    if args.pool:
+        # Sets are chosen from the pool by every period itself
+        source = samplestore.open_source(args.cache_dir, args.sample_store)
+        pool_dates = source.load_arrays(args.pool, ['dates'])[0]
+        retention = [args.window_weeks if weeks is None else
+                     timewindows.parse_weeks(weeks)
+                     for weeks in (args.benign_weeks, args.malicious_weeks)]
+        kwargs['windows'] = {
+            'starts': timewindows.test_starts(
+                pool_dates, args.window_weeks, args.test_weeks,
+                args.first_test, args.periods),
+            'test_weeks': args.test_weeks,
+            'benign': retention[0],
+            'malicious': retention[1]}
+        train_fs = test_fs = [args.pool] * len(kwargs['windows']['starts'])
+        print('{} periods from {}'.format(len(train_fs), args.pool))
+    weeks = len(train_fs)
+    feature_fs = args.features or [None] * weeks
+    tasks = [(i, w, f_tr, f_te, f_feat, variants, kwargs)
+             for i in range(1, args.count + 1)
+             for w, (f_tr, f_te, f_feat) in enumerate(
+                 zip(train_fs, test_fs, feature_fs), start=1)]
+
+    # Record results in a journal to be able to resume the experiment
+    journal_f = args.journal
+    if journal_f is None and variants[0]['res_out']:
+        journal_f = variants[0]['res_out'] + '.journal'
+    done = {}
+    if journal_f:
+        source = samplestore.open_source(args.cache_dir, args.sample_store)
+        header = {'train': [(f, source.source_stamp(f))
+                            for f in train_fs],
+                  'test': [(f, source.source_stamp(f))
+                           for f in test_fs],
+                  'variants': [(v['classifier'], v['binarize'],
+                                v['subsample'], v['count'])
+                               for v in variants],
+                  'memory_budget': args.memory_budget,
+                  'fixed_fpr': args.fixed_fpr,
+                  'version': RESULT_VERSION}
+        if args.seed is not None:
+            header['seed'] = args.seed
+        # Periods journaled without scores cannot be bootstrapped
+        if args.bootstrap:
+            header['scores'] = True
+        if args.pool:
+            header['windows'] = kwargs['windows']
+        if any(v['classifier'] == 'RF-window' for v in variants):
+            header['window'] = (args.features, args.retention,
+                                args.week_trees)
+        journal = Journal(journal_f, header, args.resume)
+        done = journal.records
+        if done:
+            print('Resuming, {} periods already done [{}]'
+                  .format(len(done), journal_f))
+        tasks = [task for task in tasks if task[:2] not in journal]
 
-    args = parser.parse_args()
-    assert len(args.train) == len(args.test), ('There must be an equal '
-                                               'number of training and '
-                                               'test files')
-    if args.subsample:
-        assert args.subsample > 0.0 and args.subsample <= 1.0
-    resl = []
-    avstatsl = []
-    key_dates = []
-    print('Loading antivirus detection data')
-    avstats_in = shelve.open(args.avstats)
     print('Running {} experiments'.format(args.count))
-    for i in range(1, args.count + 1):
-        print('\n\n{:#^79s}'.format(' Experiment {} '.format(i)))
-        res, key_dates, avstats = perform_experiment(args.train,
-                                                     args.test,
-                                                     avstats_in,
-                                                     args.binarize,
-                                                     args.classifier,
-                                                     args.subsample)
-        resl.append(res)
-        avstatsl.append(avstats)
-    resl = numpy.vstack(resl)
-    avstats_in.close()
-    if args.res_out:
-        print('Saving results [{}]'.format(args.res_out))
+    if args.workers > 1:
+        print('Using {} worker processes'.format(args.workers))
+        if (not args.fit_cache and
+                any(v['classifier'] == 'RF-window' for v in variants)):
+            print('Warning: without --fit-cache, every worker process '
+                  'trains the forests of the weeks its periods share '
+                  'with periods of other processes again')
+        pool = multiprocessing.Pool(args.workers, _init_worker,
+                                    (args.avstats,))
+        results = pool.imap_unordered(_perform_task, tasks, chunksize=1)
+    else:
+        print('Loading antivirus detection data')
+        _init_worker(args.avstats)
+        results = (_perform_task(task) for task in tasks)
+    if args.trace:
+        trace = open(args.trace, 'a')
+    for key, result in results:
+        if journal_f:
+            journal.append(key, result)
+        else:
+            done[key] = result
+        if args.trace:
+            for vi, r in result.items():
+                write_trace(trace, r[4], repetition=key[0], week=key[1],
+                            variant=variant_name(variants[vi]),
+                            res_out=variants[vi]['res_out'])
+    if args.trace:
+        trace.close()
+    if args.workers > 1:
+        pool.close()
+        pool.join()
+    if journal_f:
+        journal.close()
+
+    if args.db:
+        store = ResultStore(args.db)
+    for vi, variant in enumerate(variants):
+        # Assemble the results of periods into repetitions
+        resl = []
+        avstatsl = []
+        memoryl = []
+        phasesl = []
+        modelsl = []
+        scoresl = []
+        for i in range(1, variant['count'] + 1):
+            res, key_dates, avstats, memory, phases, digests, scores = zip(
+                *[done[(i, w)][vi] for w in range(1, weeks + 1)])
+            resl.append(numpy.concatenate(res))
+            avstatsl.append(merge_avstats(avstats))
+            memoryl.append(list(memory))
+            phasesl.append(list(phases))
+            modelsl.append(list(digests))
+            scoresl.append(scores)
+        key_dates = list(key_dates)
+        resl = numpy.vstack(resl)
         output = {'res': resl,
                   'avstats': avstatsl,
                   'key_dates': key_dates,
-                  'stats': ['neg_tr', 'pos_tr', 'neg_te', 'pos_te',
-                            'acc', 'AUC', 'TPR', 'FPR']}
-        pickle.dump(output, open(args.res_out, 'wb+'))
-
-    print('Averaging results')
-    means = numpy.mean(resl, axis=0)
-    weeks = len(args.train)
-    means = means.reshape((weeks, len(means) / weeks))
-    neg_tr, pos_tr, neg_te, pos_te, acc, AUC, TPR, FPR = zip(*means)
-    for i in range(1, len(avstatsl)):
-        for av in set(avstatsl[0].keys() + avstatsl[i].keys()):
-            avstatsl[0][av] += avstatsl[i][av]
-    for av in avstatsl[0].keys():
-        avstatsl[0][av] /= float(len(avstatsl))
-    avstats = avstatsl[0]
-    del resl, means, weeks, avstatsl
+                  'memory': memoryl,
+                  'phases': phasesl,
+                  'models': modelsl,
+                  'fixed_fpr': args.fixed_fpr,
+                  'stats': STATS}
+        if args.bootstrap:
+            print('Bootstrapping confidence intervals ({}, {} resamples)'
+                  .format(variant_name(variant), args.bootstrap))
+            output['ci'] = bootstrap_intervals(scoresl, args.bootstrap,
+                                               args.ci_level, args.fixed_fpr,
+                                               args.seed)
+        del scoresl
+        if variant['res_out']:
+            print('Saving results [{}]'.format(variant['res_out']))
+            pickle.dump(output, open(variant['res_out'], 'wb+'))
+        if args.db:
+            run = args.run or 'experiment'
+            if args.run is None and variant['res_out']:
+                run = os.path.splitext(
+                    os.path.basename(variant['res_out']))[0]
+            print('Saving results as run {} [{}]'.format(run, args.db))
+            store.add(run, output, variant_name(variant))
+
+        print('Averaging results ({})'.format(variant_name(variant)))
+        means, avstats, _ = average(output)
+        for stat in output['stats'][4:]:
+            print('{:>4s}: {}'.format(stat, numpy.mean(means[stat])))
+        del resl, means, avstatsl
+    if args.db:
+        store.close()
 
     print('Dates ranging from {} to {}'.format(key_dates[0], key_dates[-1]))
     print('Total days: {}'.format((key_dates[-1] - key_dates[0]).days + 1))
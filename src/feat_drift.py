@@ -9,32 +9,11 @@ from __future__ import print_function
 
 from argparse import ArgumentParser
 from collections import OrderedDict
-import pickle
 import sys
 
 import numpy
 
-import plots
-
-
-def get_nppf(f_in):
-    return open(f_in, 'rb').read().replace('\0\0', '') \
-        .replace('\0', '/').split('\n')[1:-1]
-
-
-def get_pickle(f_in):
-    return pickle.load(open(f_in, 'rb'))
-
-
-def get_feats(f_in):
-    try:
-        return get_pickle(f_in)
-    except:
-        try:
-            return get_nppf(f_in)
-        except:
-            print('File {}: unknown format'.format(f_in))
-            sys.exit(1)
+import features
 
 
 def print_table(data, stats):
@@ -52,11 +31,101 @@ def print_table(data, stats):
         print(lf.format(*fields))
 
 
-def main():
-    stats = ['OLD', 'Add', 'Del', 'Same', 'NEW']
-    metric_names = {'Add': 'New features',
-                    'Del': 'Obsolete features',
-                    'Same': 'Unchanged features'}
+def print_matrix(matrix, fmt):
+    n = len(matrix)
+    print('     ' + ''.join('{:>7d}'.format(c) for c in range(1, n + 1)))
+    for r in range(n):
+        print('{:>4d} '.format(r + 1) +
+              ''.join(fmt.format(v) for v in matrix[r]))
+
+
+METRIC_NAMES = {'Add': 'New features',
+                'Del': 'Obsolete features',
+                'Same': 'Unchanged features'}
+
+
+def drift_matrices(feats, methods, plotfs, draft=False,
+                   load=features.load_hashes):
+    """
+    Prints the all-pairs feature drift of every method with feature
+    files and plots heatmaps of their Jaccard similarities. Feature
+    files are loaded by load (see features.drift_series()).
+    """
+    import plots
+    matrices = []
+    for files, method in zip(feats, methods):
+        if not files:
+            continue
+        try:
+            dm = features.drift_matrix(files, load)
+        except ValueError as e:
+            print(e)
+            return 1
+        print('{:#^79s}'.format(' {} '.format(method)))
+        for stat, fmt in (('Same', '{:>7d}'), ('Add', '{:>7d}'),
+                          ('Del', '{:>7d}'), ('Jaccard', '{:>7.3f}')):
+            print('{} (from row to column period):'.format(stat))
+            print_matrix(dm[stat], fmt)
+        print()
+        matrices.append(dm['Jaccard'])
+
+    plots.init_eurasip_style(figure_width=222.5 * len(matrices),
+                             horizontal=True, draft=draft)
+    ticklabels = [str(i) for i in range(1, max(len(m) for m in matrices) + 1)]
+    plots.plot_drift_matrix(matrices, methods[:len(matrices)], ticklabels,
+                            plotfs)
+    return 0
+
+
+def drift_series(feats, methods, load=features.load_hashes):
+    """
+    Prints the feature drift between consecutive periods of every
+    method. Returns an ordered dictionary mapping methods to their
+    drift series (see features.drift_series()).
+    """
+    dd = OrderedDict()
+    for files, method in zip(feats, methods):
+        dd[method] = features.drift_series(files, load)
+
+    for m, d in dd.items():
+        print('{:#^79s}'.format(' {} '.format(m)))
+        print_table(d, features.DRIFT_STATS)
+        print()
+    return dd
+
+
+def plot_drift(dd, metrics, legend, plotfs, draft=False):
+    """
+    Plots the feature drift series dd, as returned by drift_series(),
+    on metrics, relative to the numbers of old features.
+    """
+    import plots
+    plots.init_eurasip_style(figure_width=222.5,
+                             figure_height=265.0,
+                             horizontal=len(metrics) < 2,
+                             draft=draft)
+    methods = list(dd.keys())
+    old = features.DRIFT_STATS[0]
+    datas = []
+    for metric in metrics:
+        datas.append([dd[method][metric].astype(numpy.float32) /
+                      dd[method][old]
+                      for method in methods])
+    ylabels = [METRIC_NAMES[msn] for msn in metrics]
+    xticklabels = [str(p) for p in
+                   range(2, len(dd[methods[0]][old]) + 2)]
+
+    plots.sorted_multicomparison(datas=datas,
+                                 methods=methods,
+                                 legend=legend,
+                                 ylabels=ylabels,
+                                 xlabel='Retraining period',
+                                 xticklabels=xticklabels,
+                                 plotfs=plotfs,
+                                 autofmt_xdate=False)
+
+
+def main(argv=None):
     parser = ArgumentParser(description=__doc__)
     parser.add_argument('--first',
                         nargs='+',
@@ -64,7 +133,7 @@ def main():
                         help='Feature files of the first method.')
     parser.add_argument('--second',
                         nargs='+',
-                        required=True,
+                        default=[],
                         help='Feature files of the second method.')
     parser.add_argument('--methods',
                         nargs='+',
@@ -72,10 +141,16 @@ def main():
                         help='Names of all methods, in the same '
                         'order as result files.')
     parser.add_argument('--metrics',
-                        choices=metric_names.keys(),
+                        choices=METRIC_NAMES.keys(),
                         nargs='+',
-                        required=True,
+                        default=None,
                         help='Which metrics to compare on.')
+    parser.add_argument('--matrix',
+                        default=False,
+                        action='store_true',
+                        help='Compare all pairs of periods instead of '
+                        'consecutive ones and plot the Jaccard similarity '
+                        'of their features.')
     parser.add_argument('--legend',
                         default=False,
                         help='Where to put legend.')
@@ -83,47 +158,24 @@ def main():
                         required=True,
                         nargs='+',
                         help='Where to save plot.')
-    args = parser.parse_args()
-
-    dd = OrderedDict()
-    for feats, method in zip((args.first, args.second), args.methods):
-        data = []
-        for f1, f2 in zip(feats[:-1], feats[1:]):
-            l1, l2 = get_feats(f1), get_feats(f2)
-            tot_old = len(l1)
-            tot_new = len(l2)
-            s1, s2 = set(l1), set(l2)
-            add = len(s2.difference(s1))
-            rem = len(s1.difference(s2))
-            same = len(s1.intersection(s2))
-            data.append([tot_old, add, rem, same, tot_new])
-        dd[method] = dict(zip(stats, [numpy.array(d) for d in zip(*data)]))
-
-    for m, d in dd.iteritems():
-        print('{:#^79s}'.format(' {} '.format(m)))
-        print_table(d, stats)
-        print()
-
-    # Plot setup
-    plots.init_eurasip_style(figure_width=222.5,
-                         figure_height=265.0,
-                         horizontal=len(args.metrics) < 2)
-    datas = []
-    for metric in args.metrics:
-        datas.append([dd[method][metric].astype(numpy.float32) /
-                      dd[method][stats[0]]
-                      for method in args.methods])
-    ylabels = [metric_names[msn] for msn in args.metrics]
-    xticklabels = map(str, range(2, len(args.first) + 1))
+    parser.add_argument('--draft',
+                        default=False,
+                        action='store_true',
+                        help='Render text without LaTeX, for a quick '
+                        'preview.')
+    args = parser.parse_args(argv)
+    if args.matrix:
+        return drift_matrices([args.first, args.second], args.methods,
+                              args.plot, args.draft)
+    if not args.second or not args.metrics:
+        parser.error('--second and --metrics are required')
 
-    plots.sorted_multicomparison(datas=datas,
-                                 methods=args.methods,
-                                 legend=args.legend,
-                                 ylabels=ylabels,
-                                 xlabel='Retraining period',
-                                 xticklabels=xticklabels,
-                                 plotfs=args.plot,
-                                 autofmt_xdate=False)
+    try:
+        dd = drift_series([args.first, args.second], args.methods)
+    except ValueError as e:
+        print(e)
+        return 1
+    plot_drift(dd, args.metrics, args.legend, args.plot, args.draft)
     return 0
 
 
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 18, 2026.
+
+Feature lists of training sets, as compact sorted arrays of 64-bit
+hashes of feature paths, and feature drift between them.
+
+Feature lists come either as .nppf files, a header line followed by
+one feature path per line with path components separated by NUL
+bytes, or as pickled lists of path strings, in both cases possibly
+compressed (see datasets.open_input()).
+"""
+import hashlib
+import pickle
+
+import numpy
+
+from datasets import open_input
+
+NPPF = 'nppf'
+PICKLE = 'pickle'
+CHUNK_SIZE = 16 * 1024 * 1024
+DRIFT_STATS = ['OLD', 'Add', 'Del', 'Same', 'NEW']
+
+
+def detect_format(infile):
+    """
+    Returns the format of feature list file infile, NPPF or PICKLE.
+    Raises ValueError for files in neither format.
+    """
+    with open_input(infile) as fin:
+        head = fin.read(4096)
+    # Pickle protocol 2 and newer start with PROTO, older ones with
+    # MARK or EMPTY_LIST
+    if head[:1] in (b'\x80', b'(', b']'):
+        return PICKLE
+    if b'\n' in head and (b'\0' in head or len(head) < 4096 and
+                          head.count(b'\n') <= 1):
+        return NPPF
+    raise ValueError('Unknown feature list format: {}'.format(infile))
+
+
+def hash_paths(paths):
+    """
+    Returns an array with the 64-bit hashes of an iterable of feature
+    paths given as bytes.
+    """
+    digests = b''.join(hashlib.md5(p).digest()[:8] for p in paths)
+    return numpy.frombuffer(digests, dtype=numpy.uint64)
+
+
+def _pickled_paths(infile):
+    with open_input(infile) as fin:
+        return [p.encode('utf-8') if not isinstance(p, bytes) else p
+                for p in pickle.load(fin)]
+
+
+def iter_nppf(infile, chunk_size=CHUNK_SIZE):
+    """
+    Reads .nppf file infile in chunks of about chunk_size bytes and
+    yields a list of feature paths as bytes, with components
+    separated by slashes, for every chunk.
+    """
+    rest = b''
+    header = True
+    with open_input(infile) as fin:
+        while True:
+            block = fin.read(chunk_size)
+            if not block:
+                break
+            lines = (rest + block).split(b'\n')
+            # The last line is incomplete until terminated
+            rest = lines.pop()
+            if header and lines:
+                lines = lines[1:]
+                header = False
+            yield [line.replace(b'\0\0', b'').replace(b'\0', b'/')
+                   for line in lines]
+
+
+def load_hashes(infile, chunk_size=CHUNK_SIZE):
+    """
+    Loads a feature list file. Returns a sorted array of the unique
+    64-bit hashes of its feature paths and the number of features in
+    the file.
+    """
+    if detect_format(infile) == PICKLE:
+        paths = _pickled_paths(infile)
+        hashes, total = hash_paths(paths), len(paths)
+    else:
+        chunks = []
+        total = 0
+        for paths in iter_nppf(infile, chunk_size):
+            chunks.append(numpy.unique(hash_paths(paths)))
+            total += len(paths)
+        hashes = numpy.concatenate(chunks or [numpy.empty(0, numpy.uint64)])
+    return numpy.unique(hashes), total
+
+
+def load_ordered_hashes(infile, chunk_size=CHUNK_SIZE):
+    """
+    Loads a feature list file. Returns an array of the 64-bit hashes
+    of its feature paths in the order of the file, the i-th of which
+    is the feature in column i of the data.
+    """
+    if detect_format(infile) == PICKLE:
+        paths = _pickled_paths(infile)
+        return hash_paths(paths)
+    chunks = [hash_paths(paths) for paths in iter_nppf(infile, chunk_size)]
+    return numpy.concatenate(chunks or [numpy.empty(0, numpy.uint64)])
+
+
+def drift(old, new):
+    """
+    Compares two feature lists given as (hashes, total) pairs as
+    returned by load_hashes(). Returns a dictionary with the total
+    numbers of old and new features under 'OLD' and 'NEW' and the
+    numbers of added, deleted and unchanged features under 'Add',
+    'Del' and 'Same'.
+    """
+    (h_old, n_old), (h_new, n_new) = old, new
+    same = len(numpy.intersect1d(h_old, h_new, assume_unique=True))
+    return {'OLD': n_old,
+            'Add': len(h_new) - same,
+            'Del': len(h_old) - same,
+            'Same': same,
+            'NEW': n_new}
+
+
+def drift_series(infiles, load=load_hashes):
+    """
+    Computes the feature drift between every two consecutive feature
+    list files in infiles. Returns a dictionary mapping every
+    statistic in DRIFT_STATS to an array of its values. Every file is
+    loaded only once, by load, which defaults to load_hashes().
+    """
+    series = dict((stat, []) for stat in DRIFT_STATS)
+    old = load(infiles[0]) if infiles else None
+    for infile in infiles[1:]:
+        new = load(infile)
+        for stat, value in drift(old, new).items():
+            series[stat].append(value)
+        old = new
+    return dict((stat, numpy.array(values, dtype=int))
+                for stat, values in series.items())
+
+
+def drift_matrix(infiles, load=load_hashes):
+    """
+    Computes the feature drift between all pairs of feature list
+    files in infiles. Every file is loaded once; the numbers of
+    shared features of all pairs come from a single product of a
+    sparse file-by-feature membership matrix with its transpose.
+    Returns a dictionary of N x N arrays, where N is the number of
+    files: 'Same' holds the numbers of shared features, 'Add' and
+    'Del' the numbers of features added and deleted going from the
+    file of the row to the file of the column and 'Jaccard' the
+    Jaccard similarities of the feature sets. Files are loaded by
+    load as in drift_series().
+    """
+    import scipy.sparse
+    hashes = [load(infile)[0] for infile in infiles]
+    vocabulary = numpy.unique(numpy.concatenate(
+        hashes or [numpy.empty(0, numpy.uint64)]))
+    cols = numpy.concatenate([numpy.searchsorted(vocabulary, h)
+                              for h in hashes] or [[]]).astype(numpy.int64)
+    rows = numpy.repeat(numpy.arange(len(hashes)), [len(h) for h in hashes])
+    membership = scipy.sparse.csr_matrix(
+        (numpy.ones(len(cols), dtype=numpy.int64), (rows, cols)),
+        shape=(len(hashes), len(vocabulary)))
+    same = numpy.asarray((membership * membership.T).todense())
+    sizes = numpy.diag(same)
+    union = sizes[:, None] + sizes[None, :] - same
+    return {'Same': same,
+            'Add': sizes[None, :] - same,
+            'Del': sizes[:, None] - same,
+            'Jaccard': numpy.where(union > 0, same / numpy.maximum(
+                union, 1).astype(float), 1.0)}
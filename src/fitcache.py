@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 18, 2026.
+
+A size-bounded on-disk cache of trained classifiers. A classifier is
+cached under a key derived from everything its training depends on:
+the contents of the training file, the training settings, the
+classifier's hyperparameters and the random seed. The least recently
+used classifiers are evicted when the cache grows beyond its size.
+"""
+from __future__ import print_function
+
+import hashlib
+import json
+import os
+import tempfile
+
+import dataset_cache
+import models
+
+FIT_CACHE = os.environ.get('HIDOST_FIT_CACHE') or None
+# Changes whenever training changes in a way the key does not capture
+FIT_VERSION = 2
+
+
+def fit_key(**parts):
+    """
+    Returns the key of a classifier trained as described by the
+    keyword arguments, which must be serializable as JSON.
+    """
+    text = json.dumps(dict(parts, version=FIT_VERSION), sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class FitCache(object):
+    """
+    Classifiers saved with joblib in directory root, at most max_size
+    bytes of them.
+    """
+    def __init__(self, root, max_size):
+        self.root = root
+        self.max_size = max_size
+        self.tmp = os.path.join(root, 'tmp')
+        self.digests = os.path.join(root, 'digests')
+        for d in (self.tmp, self.digests):
+            if not os.path.isdir(d):
+                models.makedirs(d)
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key + '.joblib')
+
+    def data_digest(self, infile):
+        """
+        Returns the SHA256 digest of the contents of infile. Digests
+        are remembered until the size or modification time of infile
+        changes.
+        """
+        infile = os.path.abspath(infile)
+        stamp = list(dataset_cache.source_stamp(infile))
+        memo_f = os.path.join(self.digests, hashlib.sha1(
+            infile.encode('utf-8')).hexdigest() + '.json')
+        try:
+            with open(memo_f) as fin:
+                memo = json.load(fin)
+            if memo['stamp'] == stamp:
+                return memo['digest']
+        except (IOError, OSError, ValueError, KeyError):
+            pass
+        digest = models.file_digest(infile)
+        fd, tmp_f = tempfile.mkstemp(dir=self.tmp)
+        with os.fdopen(fd, 'w') as fout:
+            json.dump({'file': infile, 'stamp': stamp, 'digest': digest},
+                      fout)
+        os.rename(tmp_f, memo_f)
+        return digest
+
+    def get(self, key):
+        """
+        Returns the classifier cached under key, or None. A hit makes
+        the classifier the most recently used one.
+        """
+        path = self.path(key)
+        try:
+            clf = models.import_joblib().load(path)
+            os.utime(path, None)
+        except (IOError, OSError, EOFError):
+            return None
+        return clf
+
+    def put(self, key, clf):
+        """
+        Caches classifier clf under key and evicts the least recently
+        used classifiers beyond the size of the cache.
+        """
+        fd, tmp_f = tempfile.mkstemp(dir=self.tmp, suffix='.joblib')
+        os.close(fd)
+        try:
+            models.import_joblib().dump(clf, tmp_f)
+            if not os.path.isdir(os.path.dirname(self.path(key))):
+                models.makedirs(os.path.dirname(self.path(key)))
+            os.rename(tmp_f, self.path(key))
+        except Exception:
+            if os.path.exists(tmp_f):
+                os.remove(tmp_f)
+            raise
+        self.evict()
+
+    def entries(self):
+        """
+        Returns a list of (last use, size, path) of cached classifiers,
+        least recently used first.
+        """
+        entries = []
+        for d in os.listdir(self.root):
+            if d in ('tmp', 'digests') or not os.path.isdir(
+                    os.path.join(self.root, d)):
+                continue
+            for f in os.listdir(os.path.join(self.root, d)):
+                path = os.path.join(self.root, d, f)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # evicted by another process
+                entries.append((st.st_mtime, st.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# hidost.py
+# Created on October 18, 2026.
+"""
+Runs any of the reproduction scripts as a subcommand, e.g.
+'hidost.py experiment --help'. The module of a subcommand is imported
+only when the subcommand runs and heavy libraries (matplotlib, SciPy,
+scikit-learn) only when it needs them, so that help and quick commands
+start fast.
+"""
+from __future__ import print_function
+
+from collections import OrderedDict
+import importlib
+import os
+import sys
+
+# Subcommands: (module, description)
+COMMANDS = OrderedDict([
+    ('experiment', ('experiment', 'Run experiments.')),
+    ('partition', ('dataset_partitioning', 'Plot dataset partitioning.')),
+    ('compare', ('method_comparison', 'Plot a comparison of methods.')),
+    ('drift', ('feat_drift', 'Plot feature drift.')),
+    ('avstats', ('avstats', 'Plot antivirus detection statistics.')),
+    ('render', ('render', 'Render all plots in one process.')),
+    ('results', ('results', 'Manage the results database.')),
+    ('timing', ('timing', 'Summarize timings of experiment phases.')),
+    ('avindex', ('avindex', 'Build an antivirus detection index.')),
+    ('store', ('samplestore', 'Import data files into a sample store.')),
+    ('score', ('score', 'Score samples with a stored model.')),
+    ('pipeline', ('pipeline', 'Run experiments and plots concurrently.')),
+    ('synthetic', ('synthetic', 'Generate a synthetic dataset.')),
+    ('bench', ('benchmark', 'Benchmark all pipeline stages.'))])
+
+
+def usage(prog):
+    lines = ['usage: {} COMMAND [ARGS...]'.format(prog), '',
+             __doc__.strip(), '', 'commands:']
+    lines += ['  {:<12s} {}'.format(name, description)
+              for name, (_, description) in COMMANDS.items()]
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    prog = os.path.basename(sys.argv[0]) or 'hidost'
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage(prog))
+        return 0
+    command = argv[0]
+    if command not in COMMANDS:
+        print(usage(prog), file=sys.stderr)
+        print('\n{}: unknown command: {}'.format(prog, command),
+              file=sys.stderr)
+        return 2
+    module = importlib.import_module(COMMANDS[command][0])
+    # Subcommand usage and errors read 'hidost.py COMMAND'
+    sys.argv[0] = '{} {}'.format(prog, command)
+    return module.main(argv[1:])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
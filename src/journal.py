@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 18, 2026.
+
+A durable, append-only journal of experiment results. Every record is
+pickled and synced to disk as soon as it is appended, so that a
+crashed or preempted experiment can be resumed without repeating the
+work whose results have already been recorded.
+"""
+from __future__ import print_function
+
+import os
+import pickle
+
+
+class Journal(object):
+    """
+    A journal file starts with a header identifying the experiment,
+    followed by (key, value) records.
+    """
+    def __init__(self, path, header, resume=False):
+        """
+        Opens the journal at path for appending. If resume is True and
+        the journal exists with the same header, its records are kept
+        and available in self.records. Otherwise, a new journal is
+        started.
+        """
+        self.path = path
+        self.records = {}
+        if resume and os.path.exists(path):
+            end = self._read(header)
+            if end is not None:
+                self.fout = open(path, 'r+b')
+                self.fout.truncate(end)  # drop a partially written record
+                self.fout.seek(end)
+                return
+            print('Journal {} belongs to a different experiment, starting '
+                  'over'.format(path))
+        self.fout = open(path, 'wb')
+        self._write(header)
+
+    def _read(self, header):
+        """
+        Reads all complete records if the journal has the given header.
+        Returns the offset after the last complete record, or None if
+        the header does not match.
+        """
+        with open(self.path, 'rb') as fin:
+            try:
+                if pickle.load(fin) != header:
+                    return None
+            except Exception:
+                return None
+            end = fin.tell()
+            while True:
+                try:
+                    key, value = pickle.load(fin)
+                except Exception:
+                    return end
+                self.records[key] = value
+                end = fin.tell()
+
+    def _write(self, obj):
+        pickle.dump(obj, self.fout, protocol=2)
+        self.fout.flush()
+        os.fsync(self.fout.fileno())
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def append(self, key, value):
+        """
+        Durably records value under key.
+        """
+        self._write((key, value))
+        self.records[key] = value
+
+    def close(self):
+        self.fout.close()
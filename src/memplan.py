@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 18, 2026.
+
+Memory planning for experiments. Estimates the peak memory consumption
+of training and evaluating a classifier from the shapes and numbers of
+non-zero values of the data, picks the representation of the data
+that fits into a memory budget and measures the actual peak.
+
+Estimates are deliberately pessimistic (fully grown trees, a full
+kernel cache), since underestimating costs a crashed experiment.
+"""
+from __future__ import print_function
+
+import multiprocessing
+import resource
+import sys
+
+# Data representations, from the most to the least memory-hungry
+REPRESENTATIONS = ['dense64', 'dense32', 'sparse']
+
+# Size of a decision tree node plus its two-class value array
+TREE_NODE_BYTES = 72
+# Working memory of a tree being grown, per training sample
+TREE_SAMPLE_BYTES = 32
+# Default kernel cache size of SVC
+SVM_CACHE_BYTES = 200 << 20
+# Size of a LibSVM sparse node (index and value)
+SVM_NODE_BYTES = 16
+
+SIZE_SUFFIXES = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+
+
+def parse_size(s):
+    """
+    Parses a size in bytes with an optional suffix K, M, G or T, as
+    in '16G'.
+    """
+    s = s.strip().upper().rstrip('B')
+    if s and s[-1] in SIZE_SUFFIXES:
+        return int(float(s[:-1]) * SIZE_SUFFIXES[s[-1]])
+    return int(float(s))
+
+
+def format_size(n):
+    """
+    Formats a size in bytes for humans.
+    """
+    for suffix in ('T', 'G', 'M', 'K'):
+        if n >= SIZE_SUFFIXES[suffix]:
+            return '{:.1f} {}B'.format(n / float(SIZE_SUFFIXES[suffix]),
+                                       suffix)
+    return '{} B'.format(int(n))
+
+
+def _status_field(field):
+    """
+    Returns a field of /proc/self/status in bytes, or None if not
+    available.
+    """
+    try:
+        with open('/proc/self/status') as fin:
+            for line in fin:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError):
+        pass
+    return None
+
+
+def _maxrss():
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def current_rss():
+    """
+    Returns the current resident set size of this process in bytes.
+    """
+    rss = _status_field('VmRSS')
+    return _maxrss() if rss is None else rss
+
+
+def reset_peak():
+    """
+    Resets the peak resident set size of this process, where the
+    operating system supports it (Linux 4.0 and newer).
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as fout:
+            fout.write('5')
+    except (IOError, OSError):
+        pass
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in bytes since
+    it started or since the last reset_peak().
+    """
+    peak = _status_field('VmHWM')
+    return _maxrss() if peak is None else peak
+
+
+def estimate(classifier, representation, n_train, n_features, nnz_train,
+             n_test, nnz_test, batch_size=10000, n_jobs=1):
+    """
+    Estimates how many bytes training classifier ('RF', 'SVM',
+    'RF-inc', 'RF-window' or 'SGD') on n_train samples with nnz_train non-zero
+    values and classifying n_test samples with nnz_test non-zero
+    values takes in addition to the memory already in use, if the data
+    is converted into representation (one of REPRESENTATIONS).
+    """
+    forest = classifier in ('RF', 'RF-inc', 'RF-window')
+    # Memory-mapped CSR data and indices are paged in, the training
+    # rows are copied when subsampled or binarized
+    mapped = 12 * (2 * nnz_train + nnz_test)
+    dense = n_train * n_features
+
+    # Training
+    if representation == 'dense64':
+        train = 8 * dense
+        if forest:
+            train += 4 * dense  # converted to float32 by the forest
+    elif representation == 'dense32':
+        train = 4 * dense
+        if classifier == 'SVM':
+            train += 8 * dense  # converted to float64 by LibSVM
+    else:
+        train = 8 * nnz_train + 4 * (n_features + 1)
+        if classifier == 'SVM':
+            train += SVM_NODE_BYTES * nnz_train
+    if forest:
+        n_jobs = multiprocessing.cpu_count() if n_jobs < 0 else n_jobs
+        model = 200 * 2 * n_train * TREE_NODE_BYTES
+        train += n_jobs * n_train * TREE_SAMPLE_BYTES
+    elif classifier == 'SVM':
+        model = SVM_CACHE_BYTES + train  # support vectors
+    else:
+        model = 8 * n_features
+    train += model
+
+    # Classification of test data, one batch at a time, and its
+    # predicted labels and decision values
+    batch = min(batch_size, n_test)
+    if representation == 'sparse':
+        test = 12 * nnz_test * batch // max(n_test, 1)
+    else:
+        itemsize = 8 if representation == 'dense64' else 4
+        test = (itemsize + 8) * batch * n_features
+    test += 16 * n_test
+    return int(mapped + max(train, model + test))
+
+
+def plan(classifier, shape_train, nnz_train, shape_test, nnz_test,
+         budget=None, representation='dense64', subsample=False,
+         batch_size=10000, n_jobs=1, chunk_size=None):
+    """
+    Plans the representation of the data and training set subsampling
+    for an experiment. Estimates of the peak memory consumption include
+    the memory this process already uses, which thus counts against the
+    budget. Without a budget, the given representation and subsampling
+    fraction are kept. Otherwise, the first of REPRESENTATIONS that
+    fits into budget bytes is chosen, and if none fits, the training
+    set is subsampled (stratified, without replacement) to the largest
+    fraction that fits. If chunk_size is given, the classifier is
+    trained on chunks of that many samples and only the representation
+    is chosen. Returns a dictionary with the representation, the
+    subsampling fraction (False for none), whether subsampling is
+    stratified and the estimated peak memory consumption in bytes.
+    Raises ValueError if nothing fits into the budget.
+    """
+    base = current_rss()
+    n_samples, n_features = shape_train
+    n_test = shape_test[0]
+
+    def peak(rep, fraction):
+        fraction = fraction or 1.0
+        n_train = int(round(n_samples * fraction))
+        nnz = int(round(nnz_train * fraction))
+        if chunk_size is not None and n_train > chunk_size:
+            nnz = int(round(nnz * chunk_size / float(n_train)))
+            n_train = chunk_size
+        return base + estimate(classifier, rep, n_train, n_features, nnz,
+                               n_test, nnz_test, batch_size, n_jobs)
+
+    result = {'representation': representation,
+              'subsample': subsample,
+              'stratified': False,
+              'budget': budget}
+    if budget is None:
+        result['estimate'] = peak(representation, subsample)
+        return result
+    for rep in REPRESENTATIONS:
+        if peak(rep, subsample) <= budget:
+            result.update(representation=rep, estimate=peak(rep, subsample))
+            return result
+
+    # Largest fraction of training samples that fits, in 0.1% steps
+    best = None
+    if chunk_size is None:
+        for rep in REPRESENTATIONS:
+            lo, hi = 0, int(round((subsample or 1.0) * 1000))
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if peak(rep, mid / 1000.0) <= budget:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            if lo and (best is None or lo > best[1]):
+                best = rep, lo
+    if best is None:
+        smallest = peak('sparse', subsample if chunk_size else 0.001)
+        raise ValueError('The memory budget of {} is too small: {} are '
+                         'already in use and the estimated peak is at '
+                         'least {}'.format(format_size(budget),
+                                           format_size(base),
+                                           format_size(smallest)))
+    rep, fraction = best[0], best[1] / 1000.0
+    result.update(representation=rep, subsample=fraction, stratified=True,
+                  estimate=peak(rep, fraction))
+    return result
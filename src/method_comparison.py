@@ -8,35 +8,75 @@ Produces a plot comparing different methods on the same dataset.
 from __future__ import print_function
 
 from argparse import ArgumentParser
-import pickle
 import sys
 
-import numpy
+from results import load_averaged, load_intervals
 
-import plots
 
+METRIC_NAMES = {'neg_tr': 'Benign training',
+                'pos_tr': 'Malicious training',
+                'neg_te': 'Benign evaluation',
+                'pos_te': 'Malicious evaluation',
+                'acc': 'Accuracy',
+                'AUC': 'Area under ROC',
+                'TPR': 'True positive rate',
+                'FPR': 'False positive rate',
+                'TPR@FPR': 'TPR at fixed FPR'}
 
-def main():
-    metric_names = {'neg_tr': 'Benign training',
-                    'pos_tr': 'Malicious training',
-                    'neg_te': 'Benign evaluation',
-                    'pos_te': 'Malicious evaluation',
-                    'acc': 'Accuracy',
-                    'AUC': 'Area under ROC',
-                    'TPR': 'True positive rate',
-                    'FPR': 'False positive rate'}
+
+def plot_comparison(results, key_dates, methods, metrics, legend, plotfs,
+                    draft=False, intervals=None):
+    """
+    Plots the averaged results of methods (a list of dictionaries
+    mapping metric names to series, one per method) on metrics over
+    periods starting at key_dates. With intervals, a list of
+    dictionaries mapping metric names to (lower, upper) pairs of
+    series, one per method, confidence intervals are shaded.
+    """
+    import plots
+    plots.init_eurasip_style(figure_width=222.5, horizontal=len(metrics) < 2,
+                             draft=draft)
+    ylabels = [METRIC_NAMES[msn] for msn in metrics]
+    xticklabels = [d.strftime('%b %d') for d in key_dates]
+    years_range = sorted(set([d.strftime('%Y') for d in key_dates]))
+    if len(years_range) > 2:
+        years_range = [years_range[0], years_range[-1]]
+    xlabel = 'Date ({})'.format(' - '.join(years_range))
+    datas = []
+    for metric in metrics:
+        datas.append([res[metric] for res in results])
+    cis = None
+    if intervals is not None:
+        cis = [[ci.get(metric) for ci in intervals] for metric in metrics]
+
+    plots.sorted_multicomparison(datas=datas,
+                                 methods=methods,
+                                 legend=legend,
+                                 ylabels=ylabels,
+                                 xlabel=xlabel,
+                                 xticklabels=xticklabels,
+                                 plotfs=plotfs,
+                                 autofmt_xdate=True,
+                                 intervals=cis)
+
+
+def main(argv=None):
     parser = ArgumentParser(description=__doc__)
     parser.add_argument('--res',
                         nargs='+',
                         required=True,
-                        help='Result files of all methods.')
+                        help='Result files of all methods, or run names '
+                        '(RUN[:VARIANT]) if --db is given.')
+    parser.add_argument('--db',
+                        default=None,
+                        help='Results database to load runs from.')
     parser.add_argument('--methods',
                         nargs='+',
                         required=True,
                         help='Names of all methods, in the same '
                         'order as result files.')
     parser.add_argument('--metrics',
-                        choices=metric_names.keys(),
+                        choices=METRIC_NAMES.keys(),
                         nargs='+',
                         required=True,
                         help='Which metrics to compare on.')
@@ -50,8 +90,18 @@ def main():
                         required=True,
                         nargs='*',
                         help='Where to save plot(s).')
+    parser.add_argument('--ci',
+                        default=False,
+                        action='store_true',
+                        help='Shade the confidence intervals of metrics '
+                        '(see --bootstrap of experiment.py).')
+    parser.add_argument('--draft',
+                        default=False,
+                        action='store_true',
+                        help='Render text without LaTeX, for a quick '
+                        'preview.')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     assert len(args.res) == len(args.methods), ('There must be an equal '
                                                 'number of result and '
@@ -59,52 +109,26 @@ def main():
 
     methods = {}
     key_dates = []
-    stats = []
     for res_f, method in zip(args.res, args.methods):
         print('Loading results for method {} [{}]'.format(method, res_f))
-        input = pickle.load(open(res_f, 'rb'))
-        resl = input['res']
-        avstatsl = input['avstats']
-        key_dates = input['key_dates']
-        stats = input['stats']
-
         print('Averaging results', end='\n\n')
-        means = numpy.mean(resl, axis=0)
-        means = means.reshape((len(means) / len(stats), len(stats)))
-        neg_tr, pos_tr, neg_te, pos_te, acc, AUC, TPR, FPR = zip(*means)
-        for i in range(1, len(avstatsl)):
-            for av in set(avstatsl[0].keys() + avstatsl[i].keys()):
-                avstatsl[0][av] += avstatsl[i][av]
-        for av in avstatsl[0].keys():
-            avstatsl[0][av] /= float(len(avstatsl))
-        avstats = avstatsl[0]
-        methods[method] = {'res': dict(zip(stats, zip(*means))),
+        means, avstats, key_dates = load_averaged(res_f, args.db)
+        methods[method] = {'res': means,
                            'avstats': avstats}
+        if args.ci:
+            methods[method]['ci'] = load_intervals(res_f, args.db)
+            if not methods[method]['ci']:
+                print('No confidence intervals for method {}'.format(method))
 
     print('Dates ranging from {} to {}'.format(key_dates[0], key_dates[-1]))
     print('Total days: {}'.format((key_dates[-1] - key_dates[0]).days + 1))
 
-    # Plot setup
-    plots.init_eurasip_style(figure_width=222.5, horizontal=len(args.metrics) < 2)
-    ylabels = [metric_names[msn] for msn in args.metrics]
-    xticklabels = [d.strftime('%b %d') for d in key_dates]
-    years_range = sorted(set([d.strftime('%Y') for d in key_dates]))
-    if len(years_range) > 2:
-        years_range = [years_range[0], years_range[-1]]
-    xlabel = 'Date ({})'.format(' - '.join(years_range))
-    datas = []
-    for metric in args.metrics:
-        datas.append([methods[method]['res'][metric]
-                      for method in args.methods])
-
-    plots.sorted_multicomparison(datas=datas,
-                                 methods=args.methods,
-                                 legend=args.legend,
-                                 ylabels=ylabels,
-                                 xlabel=xlabel,
-                                 xticklabels=xticklabels,
-                                 plotfs=args.plot,
-                                 autofmt_xdate=True)
+    intervals = None
+    if args.ci:
+        intervals = [methods[method]['ci'] for method in args.methods]
+    plot_comparison([methods[method]['res'] for method in args.methods],
+                    key_dates, args.methods, args.metrics, args.legend,
+                    args.plot, args.draft, intervals)
     return 0
 
 
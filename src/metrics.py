@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 18, 2026.
+
+Classification metrics of all periods and repetitions of an
+experiment at once, and their bootstrap confidence intervals.
+
+The samples of all periods are concatenated and every period is a
+contiguous segment of them, so each metric of every period comes out
+of one sort and a few cumulative sums along the samples. Samples are
+weighted, so that a whole block of bootstrap resamples, given as rows
+of a weight matrix, is evaluated by the same array operations.
+"""
+import warnings
+
+import numpy
+
+# Metrics computed for every period, besides confusion matrix counts
+STATS = ['acc', 'AUC', 'TPR', 'FPR', 'TPR@FPR']
+# False positive rate at which 'TPR@FPR' is measured
+FIXED_FPR = 0.01
+# Memory to use for a block of bootstrap resamples
+BLOCK_BYTES = 256 << 20
+
+
+def _segment_sums(values, starts):
+    return numpy.add.reduceat(values, starts, axis=1)
+
+
+def _evaluate_sorted(pos, pred, score, groups, W, fixed_fpr):
+    """
+    Computes metrics of one repetition for every row of weights W.
+    Returns a dictionary mapping counts and STATS to arrays of shape
+    (resamples, periods).
+    """
+    order = numpy.lexsort((-score, groups))
+    g, s, p, pp = groups[order], score[order], pos[order], pred[order]
+    n = len(order)
+    index = numpy.arange(n)
+    new_group = numpy.r_[True, g[1:] != g[:-1]]
+    starts = numpy.flatnonzero(new_group)
+    ends = numpy.r_[starts[1:], n]
+    seg = numpy.cumsum(new_group) - 1
+    # Runs of tied scores are ranked together
+    new_tie = new_group | numpy.r_[True, s[1:] != s[:-1]]
+    tie_start = numpy.maximum.accumulate(numpy.where(new_tie, index, 0))
+    last_tie = numpy.r_[new_tie[1:], True]
+    tie_end = numpy.minimum.accumulate(
+        numpy.where(last_tie, index, n)[::-1])[::-1] + 1
+
+    Wo = W[:, order]
+    P = Wo * p
+    N = Wo * ~p
+    cumP = numpy.zeros((W.shape[0], n + 1))
+    cumN = numpy.zeros((W.shape[0], n + 1))
+    numpy.cumsum(P, axis=1, out=cumP[:, 1:])
+    numpy.cumsum(N, axis=1, out=cumN[:, 1:])
+    n_pos = cumP[:, ends] - cumP[:, starts]
+    n_neg = cumN[:, ends] - cumN[:, starts]
+
+    res = {'tp': _segment_sums(P * pp, starts),
+           'fp': _segment_sums(N * pp, starts)}
+    res['fn'] = n_pos - res['tp']
+    res['tn'] = n_neg - res['fp']
+
+    # Area under the ROC curve: for every positive sample, the weight
+    # of negatives ranked below it, and half of those tied with it
+    tied = cumN[:, tie_end] - cumN[:, tie_start]
+    below = cumN[:, ends[seg]] - cumN[:, tie_end]
+    auc = _segment_sums(P * (below + 0.5 * tied), starts)
+    del tied, below
+
+    # Best TPR among thresholds between runs of tied scores with a
+    # false positive rate of at most fixed_fpr
+    at_end = tie_end[last_tie]
+    seg_end = seg[last_tie]
+    tpr = (cumP[:, at_end] - cumP[:, starts[seg_end]]) / n_pos[:, seg_end]
+    fpr = (cumN[:, at_end] - cumN[:, starts[seg_end]]) / n_neg[:, seg_end]
+    tpr[~(fpr <= fixed_fpr)] = 0.0
+    res['TPR@FPR'] = numpy.maximum.reduceat(
+        tpr, numpy.searchsorted(seg_end, numpy.arange(len(starts))), axis=1)
+
+    res['acc'] = (res['tp'] + res['tn']) / (n_pos + n_neg)
+    res['AUC'] = auc / (n_pos * n_neg)
+    res['TPR'] = res['tp'] / n_pos
+    res['FPR'] = res['fp'] / n_neg
+    return res
+
+
+def evaluate(y_true, y_pred, y_score, groups=None, weights=None,
+             fixed_fpr=FIXED_FPR):
+    """
+    Evaluates predicted labels y_pred and decision values y_score of
+    samples with true labels y_true, with labels above 0.5 positive.
+    y_pred and y_score are arrays of one row per repetition, or
+    single rows. groups holds the period of every sample, numbered
+    from zero (default: all in one period), and weights the weights
+    of samples, one row per resample (default: all one). Returns a
+    dictionary mapping confusion matrix counts ('tp', 'fp', 'tn',
+    'fn') and STATS to arrays of shape (resamples, repetitions,
+    periods). Metrics undefined for lack of positive or negative
+    samples are NaN.
+    """
+    pos = numpy.asarray(y_true) > 0.5
+    pred = numpy.atleast_2d(y_pred) > 0.5
+    score = numpy.atleast_2d(y_score)
+    if groups is None:
+        groups = numpy.zeros(len(pos), dtype=int)
+    if weights is None:
+        weights = numpy.ones((1, len(pos)))
+    reps = []
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        for r in range(score.shape[0]):
+            reps.append(_evaluate_sorted(pos, pred[r], score[r], groups,
+                                         weights, fixed_fpr))
+    return dict((stat, numpy.stack([res[stat] for res in reps], axis=1))
+                for stat in reps[0])
+
+
+def bootstrap(y_true, y_pred, y_score, groups=None, resamples=1000,
+              level=0.95, fixed_fpr=FIXED_FPR, seed=None,
+              block_bytes=BLOCK_BYTES):
+    """
+    Computes bootstrap confidence intervals of the means of STATS over
+    repetitions in every period, for samples as in evaluate(). Every
+    resample weighs each sample by an independent Poisson(1) count,
+    the same in all repetitions, so resamples are drawn and evaluated
+    a block at a time with at most about block_bytes of memory.
+    Returns a dictionary mapping STATS to (lower, upper) pairs of
+    arrays with the bounds for every period at the given level.
+    """
+    rng = numpy.random.RandomState(seed)
+    n = len(y_true)
+    # Weight matrix and about ten temporaries of the same size
+    block = max(1, min(resamples, block_bytes // (8 * 10 * max(n, 1))))
+    means = dict((stat, []) for stat in STATS)
+    done = 0
+    while done < resamples:
+        size = min(block, resamples - done)
+        W = rng.poisson(1.0, (size, n)).astype(numpy.float64)
+        res = evaluate(y_true, y_pred, y_score, groups, W, fixed_fpr)
+        with warnings.catch_warnings():
+            # Periods without positives or negatives have NaN means
+            warnings.simplefilter('ignore', RuntimeWarning)
+            for stat in STATS:
+                means[stat].append(numpy.nanmean(res[stat], axis=1))
+        done += size
+    alpha = 100.0 * (1.0 - level) / 2.0
+    intervals = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for stat in STATS:
+            lower, upper = numpy.nanpercentile(
+                numpy.concatenate(means[stat]), [alpha, 100.0 - alpha],
+                axis=0)
+            intervals[stat] = (lower, upper)
+    return intervals
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 18, 2026.
+
+A content-addressed store of trained classifiers. Every model is
+saved with joblib, uncompressed so that its arrays can be memory-
+mapped when it is loaded, under the SHA256 digest of the saved file
+and next to a JSON file with its metadata. Names such as
+'swf/r01/w03' refer to models by digest, like references in git:
+
+    STORE/objects/ab/abcdef....joblib
+    STORE/objects/ab/abcdef....json
+    STORE/names/swf/r01/w03
+
+Files only ever appear by atomic renames, so several processes can
+save models into the same store at the same time.
+"""
+from __future__ import print_function
+
+import hashlib
+import json
+import os
+import tempfile
+
+MODEL_STORE = os.environ.get('HIDOST_MODEL_STORE') or None
+BLOCK_SIZE = 1024 * 1024
+
+
+def import_joblib():
+    # Standalone joblib, or the copy bundled with older scikit-learn
+    try:
+        import joblib
+    except ImportError:
+        from sklearn.externals import joblib
+    return joblib
+
+
+def makedirs(d):
+    # Other processes may create the same directory at the same time
+    try:
+        os.makedirs(d)
+    except OSError:
+        if not os.path.isdir(d):
+            raise
+
+
+def file_digest(path):
+    """
+    Returns the hexadecimal SHA256 digest of the contents of a file.
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fin:
+        for block in iter(lambda: fin.read(BLOCK_SIZE), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class ModelStore(object):
+    """
+    A directory of models saved by content.
+    """
+    def __init__(self, root=None):
+        self.root = root or MODEL_STORE
+        if self.root is None:
+            raise ValueError('No model store given (set '
+                             'HIDOST_MODEL_STORE)')
+        self.objects = os.path.join(self.root, 'objects')
+        self.names_dir = os.path.join(self.root, 'names')
+        self.tmp = os.path.join(self.root, 'tmp')
+        for d in (self.objects, self.names_dir, self.tmp):
+            if not os.path.isdir(d):
+                makedirs(d)
+
+    def path(self, digest, ext='.joblib'):
+        return os.path.join(self.objects, digest[:2], digest + ext)
+
+    def _publish(self, tmp_f, path):
+        # Temporary files are private, stored ones readable by all
+        os.chmod(tmp_f, 0o644)
+        if not os.path.isdir(os.path.dirname(path)):
+            makedirs(os.path.dirname(path))
+        os.rename(tmp_f, path)
+
+    def put(self, model, meta, name=None):
+        """
+        Saves model with a dictionary of metadata and, optionally,
+        under name. Returns the digest of the model.
+        """
+        fd, tmp_f = tempfile.mkstemp(dir=self.tmp, suffix='.joblib')
+        os.close(fd)
+        try:
+            import_joblib().dump(model, tmp_f)
+            digest = file_digest(tmp_f)
+            if os.path.exists(self.path(digest)):
+                os.remove(tmp_f)
+            else:
+                meta = dict(meta, digest=digest,
+                            size=os.path.getsize(tmp_f))
+                fd, meta_f = tempfile.mkstemp(dir=self.tmp, suffix='.json')
+                with os.fdopen(fd, 'w') as fout:
+                    json.dump(meta, fout, indent=1, sort_keys=True)
+                self._publish(meta_f, self.path(digest, '.json'))
+                self._publish(tmp_f, self.path(digest))
+        except Exception:
+            if os.path.exists(tmp_f):
+                os.remove(tmp_f)
+            raise
+        if name:
+            self.set_name(name, digest)
+        return digest
+
+    def set_name(self, name, digest):
+        fd, tmp_f = tempfile.mkstemp(dir=self.tmp)
+        with os.fdopen(fd, 'w') as fout:
+            fout.write(digest + '\n')
+        self._publish(tmp_f, os.path.join(self.names_dir, name))
+
+    def names(self):
+        """
+        Returns a dictionary mapping all names to digests.
+        """
+        names = {}
+        for dirpath, _, filenames in os.walk(self.names_dir):
+            for f in filenames:
+                path = os.path.join(dirpath, f)
+                with open(path) as fin:
+                    names[os.path.relpath(path, self.names_dir)] = \
+                        fin.read().strip()
+        return names
+
+    def resolve(self, ref):
+        """
+        Returns the digest of the model that ref refers to: a name, a
+        digest or a unique prefix of at least six digits of a digest.
+        Raises KeyError if there is no such model.
+        """
+        name_f = os.path.join(self.names_dir, ref)
+        if os.path.isfile(name_f):
+            with open(name_f) as fin:
+                return fin.read().strip()
+        if len(ref) >= 6 and os.path.isdir(os.path.join(self.objects,
+                                                        ref[:2])):
+            found = [f[:-len('.joblib')]
+                     for f in os.listdir(os.path.join(self.objects, ref[:2]))
+                     if f.startswith(ref) and f.endswith('.joblib')]
+            if len(found) == 1:
+                return found[0]
+            if len(found) > 1:
+                raise KeyError('Ambiguous model: {}'.format(ref))
+        raise KeyError('No such model: {}'.format(ref))
+
+    def meta(self, ref):
+        with open(self.path(self.resolve(ref), '.json')) as fin:
+            return json.load(fin)
+
+    def load(self, ref, mmap=True):
+        """
+        Loads the model that ref refers to (see resolve()), with its
+        arrays memory-mapped read-only if mmap. Returns the model and
+        its metadata.
+        """
+        digest = self.resolve(ref)
+        model = import_joblib().load(self.path(digest),
+                                     mmap_mode='r' if mmap else None)
+        return model, self.meta(digest)
@@ -0,0 +1,453 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pipeline.py
+# Created on October 18, 2026.
+"""
+Runs the experiments and plotting scripts of the Makefile as a
+pipeline of jobs. Jobs whose dependencies are done run concurrently
+as long as their declared CPU and memory costs fit into the machine.
+Jobs whose inputs, outputs and command have not changed since their
+last successful run are skipped.
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import dataset_cache
+import memplan
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = '.pipeline.json'
+
+# Declared costs of jobs: CPU cores and memory per worker process
+COSTS = {'avindex': (1, '2G'),
+         'swf': (4, '4G'),
+         'swf-keepmal': (4, '4G'),
+         'pdf': (4, '12G'),
+         'pdf-bin': (4, '12G'),
+         'sl2013': (2, '8G'),
+         'plot': (1, '1G')}
+
+
+class Job(object):
+    """
+    A command producing output files from input files, with its cost
+    in CPU cores and bytes of memory.
+    """
+    def __init__(self, name, outputs, inputs, command, cpus=1, memory=0):
+        self.name = name
+        self.outputs = outputs
+        self.inputs = inputs
+        self.command = command
+        self.cpus = cpus
+        self.memory = memory
+
+
+def weekly(directory, prefix, first, last, suffix):
+    return [os.path.join(directory, '{}{:02d}{}'.format(prefix, w, suffix))
+            for w in range(first, last + 1)]
+
+
+def make_jobs(data_dir='data', exper_dir='exper', plot_dir='plots',
+              repetitions=10, subsample=0.2, workers=1, costs=COSTS,
+              budget=False, bootstrap=0):
+    """
+    Returns the list of jobs of the Makefile. Experiments run with
+    the given number of worker processes, each of which gets the
+    memory of the experiment's cost. With budget, experiments are
+    told to keep to that memory. bootstrap is the number of resamples
+    of their confidence intervals.
+    """
+    python = sys.executable
+
+    def script(name):
+        return [python, os.path.join(SRC_DIR, name)]
+
+    def cost(key, n=1):
+        cpus, memory = costs[key]
+        return {'cpus': cpus, 'memory': n * memplan.parse_size(memory)}
+
+    avindex = {}
+    jobs = []
+    for kind in ('pdf', 'swf'):
+        shelve_f = os.path.join(data_dir, 'avstats-{}.shelve'.format(kind))
+        avindex[kind] = os.path.join(data_dir,
+                                     'avstats-{}.avidx'.format(kind))
+        jobs.append(Job('avindex-' + kind, [avindex[kind]], [shelve_f],
+                        script('avindex.py') + [shelve_f, avindex[kind]],
+                        **cost('avindex')))
+
+    # Experiments
+    sets = {
+        'swf': weekly(data_dir + '/swf', 'p', 5, 14, '-{}.libsvm'),
+        'swf-keepmal': weekly(data_dir + '/swf-keepmal', 'p', 5, 14,
+                              '-{}.libsvm'),
+        'pdf': weekly(data_dir + '/pdf', 'w', 5, 14, '-{}.libsvm'),
+        'pdf-bin': weekly(data_dir + '/pdf-bin', 'w', 5, 14, '-{}.libsvm'),
+        'sl2013': weekly(data_dir + '/SL2013', 'w', 1, 10, '-{}.libsvm')}
+    res = dict((name, os.path.join(exper_dir, name + '.pickle'))
+               for name in ('swf', 'swf-bin', 'swf-keepmal',
+                            'swf-keepmal-bin', 'pdf', 'pdf-bin', 'SL2013',
+                            'SL2013-rf'))
+    experiments = [
+        ('swf', 'swf', repetitions,
+         ['--variant', 'res-out=' + res['swf'],
+          '--variant', 'binarize,res-out=' + res['swf-bin']],
+         [res['swf'], res['swf-bin']]),
+        ('swf-keepmal', 'swf', repetitions,
+         ['--variant', 'res-out=' + res['swf-keepmal'],
+          '--variant', 'binarize,res-out=' + res['swf-keepmal-bin']],
+         [res['swf-keepmal'], res['swf-keepmal-bin']]),
+        ('pdf', 'pdf', repetitions, ['--res-out', res['pdf']], [res['pdf']]),
+        ('pdf-bin', 'pdf', repetitions, ['--res-out', res['pdf-bin']],
+         [res['pdf-bin']]),
+        # SVM is evaluated in the first repetition only
+        ('sl2013', 'pdf', 2,
+         ['--subsample', str(subsample),
+          '--variant', 'classifier=SVM,count=1,res-out=' + res['SL2013'],
+          '--variant', 'classifier=RF,res-out=' + res['SL2013-rf']],
+         [res['SL2013'], res['SL2013-rf']])]
+    for name, kind, count, args, outputs in experiments:
+        train = [f.format('train') for f in sets[name]]
+        test = [f.format('test') for f in sets[name]]
+        c = cost(name, workers)
+        command = (script('experiment.py') +
+                   ['--train'] + train + ['--test'] + test +
+                   ['--count', str(count), '--workers', str(workers),
+                    '--cpus', str(c['cpus']), '--resume',
+                    '--avstats', avindex[kind],
+                    '--bootstrap', str(bootstrap)] + args)
+        if budget:
+            command += ['--memory-budget', str(c['memory'] // workers)]
+        jobs.append(Job(name, outputs, train + test + [avindex[kind]],
+                        command, **c))
+
+    # Plots
+    def plot(name, inputs, command):
+        outputs = [os.path.join(plot_dir, name + ext)
+                   for ext in ('.pdf', '.eps')]
+        jobs.append(Job('plot-' + name, outputs, inputs,
+                        command + outputs, **cost('plot')))
+
+    for name, extra in (('swf-data', []),
+                        ('swf-data-keepmal', ['--legend', 'none']),
+                        ('pdf-data', ['--legend', 'none'])):
+        files = sets[{'swf-data': 'swf', 'swf-data-keepmal': 'swf-keepmal',
+                      'pdf-data': 'pdf'}[name]]
+        train = [f.format('train') for f in files]
+        test = [f.format('test') for f in files]
+        plot(name, train + test,
+             script('dataset_partitioning.py') + ['--train'] + train +
+             ['--test'] + test + extra + ['--data-plot'])
+    swf_res = [res['swf-bin'], res['swf'], res['swf-keepmal-bin'],
+               res['swf-keepmal']]
+    plot('swf-comparison', swf_res,
+         script('method_comparison.py') + ['--res'] + swf_res +
+         ['--methods', 'SWF-Normal binary', 'SWF-Normal numerical',
+          'SWF-KeepMal binary', 'SWF-KeepMal numerical',
+          '--metrics', 'AUC', 'acc', 'TPR', 'FPR',
+          '--legend', 'lower right/1', '--plot'])
+    pdf_res = [res['SL2013'], res['SL2013-rf'], res['pdf-bin'], res['pdf']]
+    plot('pdf-comparison', pdf_res,
+         script('method_comparison.py') + ['--res'] + pdf_res +
+         ['--methods', 'SL2013 reproduction', 'SL2013 + Random Forest',
+          'Hidost binary', 'Hidost numerical',
+          '--metrics', 'AUC', 'acc', 'TPR', 'FPR',
+          '--legend', 'best/1', '--plot'])
+    sl2013_feats = weekly(data_dir + '/SL2013', 'w', 1, 10, '.nppf')
+    pdf_feats = weekly(data_dir + '/pdf-bin', 'w', 5, 14, '.nppf')
+    plot('feat-drift', sl2013_feats + pdf_feats,
+         script('feat_drift.py') + ['--first'] + sl2013_feats +
+         ['--second'] + pdf_feats +
+         ['--methods', 'Without SPC', 'With SPC',
+          '--metrics', 'Add', 'Del', 'Same', '--legend', 'best/0', '--plot'])
+    plot('feat-drift-matrix', sl2013_feats + pdf_feats,
+         script('feat_drift.py') + ['--matrix', '--first'] + sl2013_feats +
+         ['--second'] + pdf_feats +
+         ['--methods', 'Without SPC', 'With SPC', '--plot'])
+    for name, r in (('swf-avstats', res['swf-keepmal']),
+                    ('pdf-avstats', res['pdf'])):
+        plot(name, [r], script('avstats.py') + [r, '--plot'])
+    return jobs
+
+
+def stamps(paths):
+    """
+    Returns a dictionary mapping the existing files among paths to
+    their (size, mtime) stamps.
+    """
+    return dict((p, list(dataset_cache.source_stamp(p)))
+                for p in paths if os.path.exists(p))
+
+
+class Pipeline(object):
+    """
+    Schedules jobs onto a machine with the given numbers of CPU cores
+    and bytes of memory. The state of finished jobs is kept in the
+    JSON file state_f.
+    """
+    def __init__(self, jobs, cpus, memory, state_f, log_dir):
+        self.jobs = jobs
+        self.cpus = cpus
+        self.memory = memory
+        self.state_f = state_f
+        self.log_dir = log_dir
+        self.producers = dict((out, job) for job in jobs
+                              for out in job.outputs)
+        try:
+            with open(state_f) as fin:
+                self.state = json.load(fin)
+        except (IOError, OSError, ValueError):
+            self.state = {}
+
+    def save_state(self):
+        tmp = self.state_f + '.tmp'
+        with open(tmp, 'w') as fout:
+            json.dump(self.state, fout, indent=1, sort_keys=True)
+        os.rename(tmp, self.state_f)
+
+    def deps(self, job):
+        """
+        Returns the jobs producing the inputs of job.
+        """
+        return [self.producers[f] for f in job.inputs
+                if f in self.producers]
+
+    def select(self, targets):
+        """
+        Returns the jobs needed for targets (job names or output
+        files, all jobs if empty) in dependency order.
+        """
+        by_name = dict((job.name, job) for job in self.jobs)
+        roots = []
+        for target in targets:
+            job = by_name.get(target) or self.producers.get(target)
+            if job is None:
+                raise KeyError('Unknown target: {}'.format(target))
+            roots.append(job)
+        if not targets:
+            roots = self.jobs
+        order, seen = [], set()
+
+        def visit(job):
+            if job.name in seen:
+                return
+            seen.add(job.name)
+            for dep in self.deps(job):
+                visit(dep)
+            order.append(job)
+        for job in roots:
+            visit(job)
+        return order
+
+    def up_to_date(self, job):
+        """
+        Returns True if job does not need to run: its outputs exist and
+        neither they, its inputs nor its command have changed since it
+        last ran. Outputs that were made without the pipeline (e.g. by
+        make) are up to date if they are newer than all inputs.
+        """
+        if not all(os.path.exists(f) for f in job.outputs):
+            return False
+        state = self.state.get(job.name)
+        if state is None:
+            newest = max([os.path.getmtime(f) for f in job.inputs
+                          if os.path.exists(f)] or [0])
+            if min(os.path.getmtime(f) for f in job.outputs) < newest:
+                return False
+            self.record(job)
+            return True
+        return (state['command'] == job.command and
+                state['inputs'] == stamps(job.inputs) and
+                state['outputs'] == stamps(job.outputs))
+
+    def record(self, job):
+        self.state[job.name] = {'command': job.command,
+                                'inputs': stamps(job.inputs),
+                                'outputs': stamps(job.outputs)}
+        self.save_state()
+
+    def run(self, targets=(), dry_run=False, keep_going=False, poll=1.0):
+        """
+        Runs the jobs needed for targets. Returns the list of names of
+        failed jobs.
+        """
+        pending = self.select(targets)
+        done, failed = set(), []
+        running = {}
+        free_cpus, free_memory = self.cpus, self.memory
+        if not os.path.isdir(self.log_dir):
+            os.makedirs(self.log_dir)
+        while pending or running:
+            for job in list(pending):
+                deps = [d.name for d in self.deps(job)]
+                if any(d in failed for d in deps):
+                    print('Not running {}: a dependency failed'
+                          .format(job.name))
+                    pending.remove(job)
+                    failed.append(job.name)
+                    continue
+                if not all(d in done for d in deps):
+                    continue
+                missing = [f for f in job.inputs if not os.path.exists(f)
+                           and f not in self.producers]
+                if missing and not dry_run:
+                    print('Not running {}: missing {}'.format(
+                        job.name, ', '.join(missing)))
+                    pending.remove(job)
+                    failed.append(job.name)
+                    continue
+                if self.up_to_date(job):
+                    print('Up to date: {}'.format(job.name))
+                    pending.remove(job)
+                    done.add(job.name)
+                    continue
+                if dry_run:
+                    print('Would run {} ({} CPUs, {})'.format(
+                        job.name, job.cpus, memplan.format_size(job.memory)))
+                    pending.remove(job)
+                    done.add(job.name)
+                    continue
+                # A job larger than the machine runs alone
+                cpus = min(job.cpus, self.cpus)
+                memory = min(job.memory, self.memory)
+                if cpus > free_cpus or memory > free_memory:
+                    continue
+                for out in job.outputs:
+                    if not os.path.isdir(os.path.dirname(out) or '.'):
+                        os.makedirs(os.path.dirname(out))
+                log_f = os.path.join(self.log_dir, job.name + '.log')
+                print('Starting {} ({} CPUs, {}) [{}]'.format(
+                    job.name, cpus, memplan.format_size(memory), log_f))
+                log = open(log_f, 'w')
+                proc = subprocess.Popen(job.command, stdout=log,
+                                        stderr=subprocess.STDOUT)
+                running[proc] = (job, cpus, memory, log, time.time())
+                pending.remove(job)
+                free_cpus -= cpus
+                free_memory -= memory
+            if failed and not keep_going:
+                pending = []
+            if not running:
+                if pending:
+                    raise RuntimeError('Cannot schedule: {}'.format(
+                        ', '.join(job.name for job in pending)))
+                break
+            time.sleep(poll)
+            for proc in list(running):
+                if proc.poll() is None:
+                    continue
+                job, cpus, memory, log, start = running.pop(proc)
+                log.close()
+                free_cpus += cpus
+                free_memory += memory
+                elapsed = time.time() - start
+                if proc.returncode == 0:
+                    print('Finished {} in {:.0f} s'.format(job.name,
+                                                           elapsed))
+                    self.record(job)
+                    done.add(job.name)
+                else:
+                    print('Failed {} with exit code {} after {:.0f} s'
+                          .format(job.name, proc.returncode, elapsed))
+                    failed.append(job.name)
+        return failed
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('targets',
+                        nargs='*',
+                        help='Jobs or output files to make (default: all).')
+    parser.add_argument('--cpus',
+                        default=multiprocessing.cpu_count(),
+                        type=int,
+                        help='CPU cores available to jobs (default: all).')
+    parser.add_argument('--memory',
+                        default=None,
+                        type=memplan.parse_size,
+                        help='Memory available to jobs, e.g. 12G (default: '
+                        'all physical memory).')
+    parser.add_argument('--data-dir',
+                        default='data',
+                        help='Directory with datasets.')
+    parser.add_argument('--exper-dir',
+                        default='exper',
+                        help='Directory for experiment results.')
+    parser.add_argument('--plot-dir',
+                        default='plots',
+                        help='Directory for plots.')
+    parser.add_argument('--repetitions',
+                        default=10,
+                        type=int,
+                        help='How many times to perform experiments.')
+    parser.add_argument('--subsample',
+                        default=0.2,
+                        type=float,
+                        help='Training set subsampling percentage of '
+                        'subsampled experiments.')
+    parser.add_argument('--workers',
+                        default=1,
+                        type=int,
+                        help='Worker processes of every experiment.')
+    parser.add_argument('--bootstrap',
+                        default=1000,
+                        type=int,
+                        help='Bootstrap resamples of the confidence '
+                        'intervals of experiment results (0 for none).')
+    parser.add_argument('--cost',
+                        action='append',
+                        default=[],
+                        help='Override the cost of a kind of job, given '
+                        'as NAME=CPUS,MEMORY, e.g. pdf=8,20G. Kinds are '
+                        '{}.'.format(', '.join(sorted(COSTS))))
+    parser.add_argument('--budget',
+                        default=False,
+                        action='store_true',
+                        help='Make experiments keep to their declared '
+                        'memory (see --memory-budget of experiment.py).')
+    parser.add_argument('-k', '--keep-going',
+                        default=False,
+                        action='store_true',
+                        help='Keep running jobs that do not depend on '
+                        'failed ones.')
+    parser.add_argument('-n', '--dry-run',
+                        default=False,
+                        action='store_true',
+                        help='Only print which jobs would run.')
+
+    args = parser.parse_args(argv)
+    costs = dict(COSTS)
+    for spec in args.cost:
+        name, _, value = spec.partition('=')
+        if name not in costs:
+            parser.error('Unknown kind of job: {}'.format(name))
+        cpus, _, memory = value.partition(',')
+        costs[name] = (int(cpus), memory or costs[name][1])
+    memory = args.memory
+    if memory is None:
+        memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+
+    jobs = make_jobs(args.data_dir, args.exper_dir, args.plot_dir,
+                     args.repetitions, args.subsample, args.workers, costs,
+                     args.budget, args.bootstrap)
+    pipeline = Pipeline(jobs, args.cpus, memory,
+                        os.path.join(args.exper_dir, STATE_FILE),
+                        os.path.join(args.exper_dir, 'logs'))
+    print('Running on {} CPUs and {} of memory'.format(
+        args.cpus, memplan.format_size(memory)))
+    failed = pipeline.run(args.targets, args.dry_run, args.keep_going)
+    if failed:
+        print('Failed: {}'.format(', '.join(failed)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,11 +3,17 @@
 import math
 import operator
 
+import matplotlib
 from matplotlib.colors import LogNorm
 from matplotlib.figure import figaspect
 import numpy
 import pylab
 
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
 # A color palette with 4 colors
 colors4 = {'normal': ['#E8392B',   # red
                       '#E8852B',   # orange
@@ -38,7 +44,13 @@ def init_eurasip_style(left_margin=0.10,
                    bottom_margin=0.12,
                    figure_width=422.52348,
                    figure_height=None,
-                   horizontal=True):
+                   horizontal=True,
+                   draft=False):
+    '''
+Sets up the publication style of plots. With draft, text is rendered
+by matplotlib instead of LaTeX and at a lower resolution, which is
+much faster but does not match the paper.
+    '''
     pylab.close("all")
     fig_width_pt = figure_width
     inches_per_pt = 1.0 / 72.27                    # Convert pt to inch
@@ -60,14 +72,14 @@ def init_eurasip_style(left_margin=0.10,
         'lines.markersize': 2,
         'axes.labelsize': 7,
         'axes.titlesize': 7,
-        'text.fontsize': 7,
+        'font.size': 7,
         'legend.fontsize': 7,
         'xtick.labelsize': 7,
         'ytick.labelsize': 7,
         'text.usetex': True,
-        'text.latex.preamble': [
-            r'\usepackage[cm]{sfmath}'
-        ],  # forces use of sans-serif CM font in math mode
+        # Forces use of sans-serif CM font in math mode; a string, as
+        # newer matplotlib versions no longer take a list
+        'text.latex.preamble': r'\usepackage[cm]{sfmath}',
         'figure.subplot.left': left_margin,
         'figure.subplot.right': 1 - right_margin,
         'figure.subplot.bottom': bottom_margin,
@@ -81,7 +93,13 @@ def init_eurasip_style(left_margin=0.10,
         'figure.figsize': fig_size,
         'lines.antialiased': True,
         'lines.linewidth': 0.6}
-    import matplotlib
+    if draft:
+        params.update({'text.usetex': False,
+                       'text.latex.preamble': '',
+                       'figure.dpi': 100,
+                       'font.serif': matplotlib.rcParamsDefault['font.serif'],
+                       'font.sans-serif':
+                       matplotlib.rcParamsDefault['font.sans-serif']})
     matplotlib.rcParams.update(params)
 
 
@@ -93,7 +111,8 @@ def sorted_multicomparison(datas,
                            xticklabels,
                            plotfs,
                            autofmt_xdate=False,
-                           subtitles=None):
+                           subtitles=None,
+                           intervals=None):
     '''
 Plots a sorted comparison of multiple methods' results across
 multiple metrics.
@@ -122,6 +141,10 @@ individual points.
                   should be pretty-formatted
   subtitles - a list of titles, one for every subplot, or
               None for no subtitles
+  intervals - confidence intervals shaded around the results,
+              structured like datas but with a (lower, upper)
+              pair of [1 x p] lists in place of every result
+              (None for a method without intervals), or None
     '''
     c = colors4['normal']  # colors
     mfc = colors4['darkest']  # marker face colors
@@ -140,6 +163,11 @@ individual points.
         x_data = range(len(data[0]))
         for i, (method, y_data) in enumerate(mv):
             mi = methods.index(method)  # color by method order
+            if intervals and intervals[li][mi] is not None:
+                lower, upper = intervals[li][mi]
+                ax.fill_between(x_data, lower, upper, color=c[mi],
+                                alpha=0.25, linewidth=0,
+                                zorder=2 * i / 100.0 + 0.5)
             ax.plot(x_data, y_data, label=method, color=c[mi], marker=m[mi],
                     markerfacecolor='w', markeredgecolor=mec[mi],
                     markersize=2.7, markeredgewidth=1, linewidth=1.25,
@@ -183,8 +211,7 @@ individual points.
 
     # Finalize plot setup
     pylab.tight_layout(pad=0.5, h_pad=0.5, w_pad=0.5, rect=(0, 0, 1, 1))
-    for plot_file in plotfs:
-        pylab.savefig(plot_file)
+    save_figure(plotfs)
 
 
 def plot_avstats(avstats, fnames):
@@ -202,7 +229,7 @@ def plot_avstats(avstats, fnames):
 
     # Set up y axis
     ax.set_yticks(range(len(avstats)))
-    ax.set_yticklabels(map(operator.itemgetter(0), avstats), rotation=0)
+    ax.set_yticklabels([k for k, _ in avstats], rotation=0)
     ax.set_ylim((0 - bar_width / 2.0 - spacing,
                  len(avstats) - 1 + bar_width / 2.0 + spacing))
 
@@ -220,11 +247,50 @@ def plot_avstats(avstats, fnames):
             colors[i] = '#ff767d'  # watermelon color for Hidost
 
     pylab.barh(range(len(avstats)),
-               map(operator.itemgetter(1), avstats),
+               [v for _, v in avstats],
                bar_width, color=colors, linewidth=0, align='center')
     pylab.tight_layout(pad=0.5, h_pad=0.5, w_pad=0.5, rect=(0, 0, 1, 1))
-    if isinstance(fnames, basestring):
-        fnames = [fnames]
-    for plot_file in fnames:
-        pylab.savefig(plot_file)
+    save_figure(fnames)
+
+
+def plot_drift_matrix(matrices, methods, ticklabels, plotfs,
+                      label='Jaccard similarity'):
+    """
+    Plots heatmaps of all-pairs feature drift, one per method.
 
+    matrices - a list of [N x N] arrays with values between 0 and 1,
+               one for every method
+    methods - a list of method names (strings), used as titles
+    ticklabels - labels of the N periods
+    plotfs - a list of file names in which the plot should be saved
+    label - colorbar label
+    """
+    fig, axes = pylab.subplots(1, len(matrices), squeeze=False)
+    axes = axes[0]
+    for matrix, method, ax in zip(matrices, methods, axes):
+        image = ax.imshow(matrix, vmin=0.0, vmax=1.0, cmap='viridis',
+                          interpolation='nearest', origin='upper')
+        ax.set_title(method)
+        ax.set_xticks(range(len(ticklabels)))
+        ax.set_yticks(range(len(ticklabels)))
+        ax.set_xticklabels(ticklabels)
+        ax.set_yticklabels(ticklabels)
+        ax.set_xlabel('Retraining period')
+    axes[0].set_ylabel('Retraining period')
+    fig.colorbar(image, ax=list(axes), label=label)
+    save_figure(plotfs)
+
+
+def save_figure(plotfs, fig=None):
+    '''
+Saves a figure into several files, e.g. one per format, one after the
+other in this process.
+
+  plotfs - a file name or a list of file names
+  fig - the figure to save, by default the current one
+    '''
+    if isinstance(plotfs, string_types):
+        plotfs = [plotfs]
+    fig = fig or pylab.gcf()
+    for plot_file in plotfs:
+        fig.savefig(plot_file)
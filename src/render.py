@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# render.py
+# Created on October 18, 2026.
+"""
+Renders all figures of the Makefile in a single process: dataset
+partitioning, method comparison, feature drift and antivirus
+statistics. Every result and feature list file is loaded only once
+and every figure is built once and saved in all of its formats.
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+from collections import OrderedDict
+import os
+import sys
+import time
+import traceback
+
+import avstats
+import dataset_partitioning
+import feat_drift
+import features
+import method_comparison
+from pipeline import weekly
+from results import load_averaged
+
+
+class Loader(object):
+    """
+    Loads averaged results and feature lists, remembering them so
+    that figures sharing input files load them only once.
+    """
+    def __init__(self, db=None):
+        self.db = db
+        self.results = {}
+        self.hashes = {}
+
+    def averaged(self, res_f):
+        if res_f not in self.results:
+            print('Loading results [{}]'.format(res_f))
+            self.results[res_f] = load_averaged(res_f, self.db)
+        return self.results[res_f]
+
+    def load_hashes(self, infile):
+        if infile not in self.hashes:
+            self.hashes[infile] = features.load_hashes(infile)
+        return self.hashes[infile]
+
+
+def make_figures(data_dir='data', exper_dir='exper', cache_dir=None,
+                 loader=None):
+    """
+    Returns an ordered dictionary mapping the names of figures to
+    (input files, function) pairs. The function plots the figure into
+    a list of files; it takes the list and whether to use the draft
+    style.
+    """
+    loader = loader or Loader()
+    figures = OrderedDict()
+
+    def files(directory, prefix, first, last):
+        names = weekly(os.path.join(data_dir, directory), prefix, first,
+                       last, '-{}.libsvm')
+        return ([f.format('train') for f in names],
+                [f.format('test') for f in names])
+
+    def data_figure(name, train, test, legend):
+        def render(plotfs, draft):
+            res, key_dates = dataset_partitioning.load_partitioning(
+                train, test, cache_dir)
+            dataset_partitioning.plot_partitioning(res, key_dates, legend,
+                                                   False, plotfs, draft)
+        figures[name] = (train + test, render)
+
+    data_figure('swf-data', *(files('swf', 'p', 5, 14) + (False,)))
+    data_figure('swf-data-keepmal',
+                *(files('swf-keepmal', 'p', 5, 14) + ('none',)))
+    data_figure('pdf-data', *(files('pdf', 'w', 5, 14) + ('none',)))
+
+    def res(name):
+        return os.path.join(exper_dir, name + '.pickle')
+
+    def comparison_figure(name, runs, methods, legend):
+        res_fs = [res(run) for run in runs]
+
+        def render(plotfs, draft):
+            averaged = [loader.averaged(f) for f in res_fs]
+            method_comparison.plot_comparison(
+                [means for means, _, _ in averaged], averaged[-1][2],
+                methods, ['AUC', 'acc', 'TPR', 'FPR'], legend, plotfs,
+                draft)
+        figures[name] = (res_fs, render)
+
+    comparison_figure('swf-comparison',
+                      ['swf-bin', 'swf', 'swf-keepmal-bin', 'swf-keepmal'],
+                      ['SWF-Normal binary', 'SWF-Normal numerical',
+                       'SWF-KeepMal binary', 'SWF-KeepMal numerical'],
+                      'lower right/1')
+    comparison_figure('pdf-comparison',
+                      ['SL2013', 'SL2013-rf', 'pdf-bin', 'pdf'],
+                      ['SL2013 reproduction', 'SL2013 + Random Forest',
+                       'Hidost binary', 'Hidost numerical'],
+                      'best/1')
+
+    feats = [weekly(os.path.join(data_dir, 'SL2013'), 'w', 1, 10, '.nppf'),
+             weekly(os.path.join(data_dir, 'pdf-bin'), 'w', 5, 14, '.nppf')]
+    feat_methods = ['Without SPC', 'With SPC']
+
+    def render_drift(plotfs, draft):
+        dd = feat_drift.drift_series(feats, feat_methods, loader.load_hashes)
+        feat_drift.plot_drift(dd, ['Add', 'Del', 'Same'], 'best/0', plotfs,
+                              draft)
+
+    def render_drift_matrix(plotfs, draft):
+        if feat_drift.drift_matrices(feats, feat_methods, plotfs, draft,
+                                     loader.load_hashes):
+            raise ValueError('Could not load feature lists')
+    figures['feat-drift'] = (feats[0] + feats[1], render_drift)
+    figures['feat-drift-matrix'] = (feats[0] + feats[1], render_drift_matrix)
+
+    def avstats_figure(name, run):
+        def render(plotfs, draft):
+            avstats.plot_detections(loader.averaged(res(run))[1], plotfs,
+                                    draft)
+        figures[name] = ([res(run)], render)
+
+    avstats_figure('swf-avstats', 'swf-keepmal')
+    avstats_figure('pdf-avstats', 'pdf')
+    return figures
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('figures',
+                        nargs='*',
+                        help='Which figures to render (default: all).')
+    parser.add_argument('--data-dir',
+                        default='data',
+                        help='Directory with datasets.')
+    parser.add_argument('--exper-dir',
+                        default='exper',
+                        help='Directory with experiment results.')
+    parser.add_argument('--plot-dir',
+                        default='plots',
+                        help='Where to save plots.')
+    parser.add_argument('--cache-dir',
+                        default=None,
+                        help='Where to keep binary caches of data files '
+                        '(default: next to the data files).')
+    parser.add_argument('--formats',
+                        nargs='+',
+                        default=['pdf', 'eps'],
+                        help='Formats to save every figure in.')
+    parser.add_argument('--draft',
+                        default=False,
+                        action='store_true',
+                        help='Render text without LaTeX, for a quick '
+                        'preview.')
+    parser.add_argument('-k', '--keep-going',
+                        default=False,
+                        action='store_true',
+                        help='Keep rendering after a figure fails.')
+
+    args = parser.parse_args(argv)
+    figures = make_figures(args.data_dir, args.exper_dir, args.cache_dir)
+    unknown = [name for name in args.figures if name not in figures]
+    if unknown:
+        parser.error('Unknown figures: {} (choose from {})'.format(
+            ', '.join(unknown), ', '.join(figures)))
+    if not os.path.isdir(args.plot_dir):
+        os.makedirs(args.plot_dir)
+
+    failed = []
+    for name in args.figures or list(figures):
+        inputs, render = figures[name]
+        missing = [f for f in inputs if not os.path.exists(f)]
+        if missing:
+            print('Not rendering {}: missing {}'.format(
+                name, ', '.join(missing)))
+            failed.append(name)
+            continue
+        plotfs = [os.path.join(args.plot_dir, '{}.{}'.format(name, ext))
+                  for ext in args.formats]
+        print('Rendering {}'.format(name))
+        start = time.time()
+        try:
+            render(plotfs, args.draft)
+        except Exception:
+            traceback.print_exc()
+            failed.append(name)
+            if not args.keep_going:
+                break
+            continue
+        print('Rendered {} in {:.1f} s'.format(name, time.time() - start),
+              end='\n\n')
+    if failed:
+        print('Failed: {}'.format(', '.join(failed)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# results.py
+# Created on October 18, 2026.
+"""
+Imports experiment result files into an SQLite results database and
+lists the runs in it.
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+import collections
+import datetime
+import os
+import pickle
+import sqlite3
+import sys
+
+import numpy
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    run TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    repetitions INTEGER NOT NULL,
+    weeks INTEGER NOT NULL,
+    stats TEXT NOT NULL,
+    PRIMARY KEY (run, variant));
+CREATE TABLE IF NOT EXISTS periods (
+    run TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    week INTEGER NOT NULL,
+    key_date TEXT NOT NULL,
+    PRIMARY KEY (run, variant, week));
+CREATE TABLE IF NOT EXISTS results (
+    run TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    repetition INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run, variant, metric, week, repetition));
+CREATE TABLE IF NOT EXISTS avstats (
+    run TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    repetition INTEGER NOT NULL,
+    av TEXT NOT NULL,
+    count REAL NOT NULL,
+    PRIMARY KEY (run, variant, av, repetition));
+CREATE TABLE IF NOT EXISTS intervals (
+    run TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    week INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    lower REAL,
+    upper REAL,
+    level REAL NOT NULL,
+    PRIMARY KEY (run, variant, metric, week));
+CREATE INDEX IF NOT EXISTS results_metric ON results (metric, run, variant);
+'''
+
+
+# Mean of the values of a metric over repetitions; NULL (NaN) if any of
+# them is NaN, which SQLite stores as NULL, as numpy.mean() of a result
+# file does, rather than the mean of the others
+MEAN = 'CASE WHEN COUNT(value) < COUNT(*) THEN NULL ELSE AVG(value) END'
+
+
+def _real(x):
+    # SQLite stores NaN as NULL
+    return None if numpy.isnan(x) else float(x)
+
+
+def _float(x):
+    return numpy.nan if x is None else x
+
+
+def average(output):
+    """
+    Averages the contents of a result file over repetitions. Returns a
+    dictionary mapping every statistic to an array of its means in
+    all periods, a dictionary mapping detector names to their mean
+    true positive counts and the list of first dates of all periods.
+    """
+    stats = output['stats']
+    means = numpy.mean(output['res'], axis=0)
+    means = means.reshape((len(means) // len(stats), len(stats)))
+    avstats = collections.defaultdict(int)
+    for d in output['avstats']:
+        for av, count in d.items():
+            avstats[av] += count
+    for av in avstats:
+        avstats[av] /= float(len(output['avstats']))
+    return dict(zip(stats, means.T)), avstats, output['key_dates']
+
+
+def intervals(output):
+    """
+    Returns a dictionary mapping statistics to (lower, upper) pairs of
+    arrays with the bounds of their confidence intervals in all
+    periods, as saved in a result file. Result files without
+    confidence intervals have none.
+    """
+    ci = output.get('ci')
+    if ci is None:
+        return {}
+    return dict((stat, (numpy.asarray(ci['lower'][stat]),
+                        numpy.asarray(ci['upper'][stat])))
+                for stat in ci['lower'])
+
+
+def split_name(name):
+    """
+    Splits a result name RUN[:VARIANT] into run and variant, which is
+    None if not given.
+    """
+    run, sep, variant = name.partition(':')
+    return run, variant if sep else None
+
+
+class ResultStore(object):
+    """
+    An SQLite database of experiment results with a row for every
+    (run, variant, repetition, period, metric), a table of
+    antivirus detection counts and one of confidence intervals.
+    """
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def add(self, run, output, variant=''):
+        """
+        Stores the contents of a result file under the given run and
+        variant names, replacing any previous results with the same
+        names.
+        """
+        stats = output['stats']
+        res = numpy.asarray(output['res'])
+        reps, weeks = res.shape[0], res.shape[1] // len(stats)
+        res = res.reshape((reps, weeks, len(stats)))
+        with self.conn:
+            for table in ('runs', 'periods', 'results', 'avstats',
+                          'intervals'):
+                self.conn.execute('DELETE FROM {} WHERE run = ? AND '
+                                  'variant = ?'.format(table),
+                                  (run, variant))
+            self.conn.execute('INSERT INTO runs VALUES (?, ?, ?, ?, ?)',
+                              (run, variant, reps, weeks, ' '.join(stats)))
+            self.conn.executemany(
+                'INSERT INTO periods VALUES (?, ?, ?, ?)',
+                ((run, variant, w, d.isoformat())
+                 for w, d in enumerate(output['key_dates'])))
+            self.conn.executemany(
+                'INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                ((run, variant, i, w, stat, float(res[i, w, s]))
+                 for i in range(reps) for w in range(weeks)
+                 for s, stat in enumerate(stats)))
+            self.conn.executemany(
+                'INSERT INTO avstats VALUES (?, ?, ?, ?, ?)',
+                ((run, variant, i, av, float(count))
+                 for i, d in enumerate(output['avstats'])
+                 for av, count in d.items()))
+            if 'ci' in output:
+                level = output['ci']['level']
+                self.conn.executemany(
+                    'INSERT INTO intervals VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    ((run, variant, w, stat, _real(lower[w]),
+                      _real(upper[w]), level)
+                     for stat, (lower, upper) in intervals(output).items()
+                     for w in range(len(lower))))
+
+    def runs(self):
+        """
+        Returns a list of (run, variant, repetitions, weeks) tuples.
+        """
+        return self.conn.execute('SELECT run, variant, repetitions, weeks '
+                                 'FROM runs ORDER BY run, variant').fetchall()
+
+    def resolve(self, run, variant=None):
+        """
+        Returns variant, or the only variant of run if variant is None.
+        """
+        if variant is not None:
+            return variant
+        rows = self.conn.execute('SELECT variant FROM runs WHERE run = ?',
+                                 (run,)).fetchall()
+        if len(rows) != 1:
+            raise KeyError('Run {!r} has {} variants, one must be chosen'
+                           .format(run, len(rows)))
+        return rows[0][0]
+
+    def _info(self, run, variant):
+        row = self.conn.execute('SELECT repetitions, weeks, stats FROM runs '
+                                'WHERE run = ? AND variant = ?',
+                                (run, variant)).fetchone()
+        if row is None:
+            raise KeyError('No results for run {!r}, variant {!r}'
+                           .format(run, variant))
+        return row[0], row[1], row[2].split()
+
+    def mean_series(self, run, metric, variant=None):
+        """
+        Returns an array with the mean of metric over repetitions in
+        every period, NaN where it is NaN in any repetition.
+        """
+        variant = self.resolve(run, variant)
+        rows = self.conn.execute('SELECT {} FROM results '
+                                 'WHERE run = ? AND variant = ? AND '
+                                 'metric = ? GROUP BY week ORDER BY week'
+                                 .format(MEAN),
+                                 (run, variant, metric)).fetchall()
+        return numpy.array([_float(r[0]) for r in rows])
+
+    def mean_stats(self, run, variant=None):
+        """
+        Returns a dictionary mapping every statistic to an array of its
+        means over repetitions in all periods, as mean_series().
+        """
+        variant = self.resolve(run, variant)
+        _, weeks, stats = self._info(run, variant)
+        means = dict((stat, numpy.zeros(weeks)) for stat in stats)
+        for metric, week, value in self.conn.execute(
+                'SELECT metric, week, {} FROM results '
+                'WHERE run = ? AND variant = ? GROUP BY metric, week'
+                .format(MEAN), (run, variant)):
+            means[metric][week] = _float(value)
+        return means
+
+    def mean_avstats(self, run, variant=None):
+        """
+        Returns a dictionary mapping detector names to their true
+        positive counts averaged over repetitions.
+        """
+        variant = self.resolve(run, variant)
+        reps, _, _ = self._info(run, variant)
+        return collections.defaultdict(int, self.conn.execute(
+            'SELECT av, SUM(count) / ? FROM avstats WHERE run = ? AND '
+            'variant = ? GROUP BY av', (float(reps), run, variant)))
+
+    def key_dates(self, run, variant=None):
+        """
+        Returns the list of first dates of all periods.
+        """
+        variant = self.resolve(run, variant)
+        rows = self.conn.execute('SELECT key_date FROM periods '
+                                 'WHERE run = ? AND variant = ? '
+                                 'ORDER BY week', (run, variant))
+        return [datetime.datetime.strptime(r[0], '%Y-%m-%d').date()
+                for r in rows]
+
+    def intervals(self, run, variant=None):
+        """
+        Same as intervals(), for results in the database.
+        """
+        variant = self.resolve(run, variant)
+        _, weeks, _ = self._info(run, variant)
+        ci = {}
+        for metric, week, lower, upper in self.conn.execute(
+                'SELECT metric, week, lower, upper FROM intervals '
+                'WHERE run = ? AND variant = ?', (run, variant)):
+            if metric not in ci:
+                ci[metric] = (numpy.full(weeks, numpy.nan),
+                              numpy.full(weeks, numpy.nan))
+            ci[metric][0][week] = numpy.nan if lower is None else lower
+            ci[metric][1][week] = numpy.nan if upper is None else upper
+        return ci
+
+    def averaged(self, run, variant=None):
+        """
+        Same as average(), for results in the database.
+        """
+        return (self.mean_stats(run, variant),
+                self.mean_avstats(run, variant),
+                self.key_dates(run, variant))
+
+
+def load_averaged(name, db=None):
+    """
+    Loads averaged results as average() does, either from result file
+    name or, if db is given, from run name (RUN[:VARIANT]) in the
+    results database db.
+    """
+    if db is None:
+        return average(pickle.load(open(name, 'rb')))
+    store = ResultStore(db)
+    try:
+        return store.averaged(*split_name(name))
+    finally:
+        store.close()
+
+
+def load_intervals(name, db=None):
+    """
+    Loads confidence intervals as intervals() does, from a result
+    file or a run in a results database as in load_averaged().
+    """
+    if db is None:
+        return intervals(pickle.load(open(name, 'rb')))
+    store = ResultStore(db)
+    try:
+        return store.intervals(*split_name(name))
+    finally:
+        store.close()
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('db',
+                        help='Results database.')
+    parser.add_argument('--import',
+                        dest='res',
+                        nargs='+',
+                        default=[],
+                        help='Result files to import, stored under their '
+                        'base names without extension.')
+
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.db)
+    for res_f in args.res:
+        run = os.path.splitext(os.path.basename(res_f))[0]
+        print('Importing results [{}] as run {}'.format(res_f, run))
+        store.add(run, pickle.load(open(res_f, 'rb')))
+    print('{:<40s} {:<20s} {:>4s} {:>5s}'.format('Run', 'Variant', 'Reps',
+                                                 'Weeks'))
+    for run, variant, reps, weeks in store.runs():
+        print('{:<40s} {:<20s} {:>4d} {:>5d}'.format(run, variant, reps,
+                                                      weeks))
+    store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,398 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# samplestore.py
+# Created on October 18, 2026.
+"""
+Imports LibSVM files into a sample store, which keeps every unique
+sample once, no matter how many of the files contain it.
+
+Training sets are sliding windows of weeks and SWF-KeepMal retains
+malicious samples forever, so most samples occur in several training
+files and in a test file. The store parses every distinct line only
+once and saves the samples as a single bundle of CSR arrays, labels,
+dates and SHA256 digests (see dataset_cache), together with an array
+of sample numbers for every imported file. A file is then loaded by
+gathering its samples from the memory-mapped bundle.
+
+Samples are told apart by the text of their lines. Feature indices
+are kept as they appear in files and every file remembers its own
+index base, so files of different datasets and feature spaces can
+share one store.
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+import fnmatch
+import hashlib
+import io
+import os
+import shutil
+import sys
+
+import numpy
+
+import dataset_cache
+from datasets import (CHUNK_SIZE, DECOMPRESSORS, iter_libsvm_stream,
+                      open_input)
+
+STORE_VERSION = 1
+SAMPLE_STORE = os.environ.get('HIDOST_SAMPLE_STORE') or None
+
+_ARRAYS = ['data', 'indices', 'indptr', 'labels', 'dates', 'digests']
+_DTYPES = {'data': numpy.float64,
+           'indices': numpy.int32,
+           'indptr': numpy.int64,
+           'labels': numpy.float64,
+           'dates': numpy.dtype('datetime64[D]'),
+           'digests': numpy.dtype('S32')}
+# Smallest feature index of a sample without features
+_NO_INDEX = numpy.iinfo(numpy.int64).max
+
+
+def _is_sample(line):
+    # As in datasets, a line holds a sample unless it is empty or
+    # only a comment
+    if line[:1] and line[:1] not in b'#\r \t':
+        return True
+    return len(line.split(b'#')[0].strip()) > 0
+
+
+class _Growing(object):
+    """
+    An array of integers that grows by appending.
+    """
+    def __init__(self):
+        self.arr = numpy.empty(1024, dtype=numpy.int64)
+        self.size = 0
+
+    def extend(self, values):
+        end = self.size + len(values)
+        if end > len(self.arr):
+            grown = numpy.empty(max(end, 2 * len(self.arr)),
+                                dtype=numpy.int64)
+            grown[:self.size] = self.arr[:self.size]
+            self.arr = grown
+        self.arr[self.size:end] = values
+        self.size = end
+
+    def values(self):
+        return self.arr[:self.size]
+
+
+class _Importer(object):
+    """
+    Writes the samples of LibSVM lines not seen before as raw arrays
+    into directory tmp.
+    """
+    def __init__(self, tmp):
+        self.seen = {}
+        self.n_samples = 0
+        self.nnz = 0
+        self.n_lines = 0
+        # Smallest and largest feature index of every sample
+        self.lo = _Growing()
+        self.hi = _Growing()
+        self.outs = dict((name, open(os.path.join(tmp, name + '.raw'),
+                                     'wb'))
+                         for name in _ARRAYS)
+        numpy.zeros(1, dtype=numpy.int64).tofile(self.outs['indptr'])
+
+    def add_lines(self, block, sha):
+        """
+        Adds the samples of a block of complete lines. Returns their
+        sample numbers and updates hash object sha with the keys of
+        their lines.
+        """
+        lines = [line for line in block.split(b'\n') if _is_sample(line)]
+        rows = numpy.empty(len(lines), dtype=numpy.int64)
+        new = []
+        for i, line in enumerate(lines):
+            key = hashlib.sha1(line.rstrip(b'\r')).digest()
+            row = self.seen.get(key)
+            if row is None:
+                row = self.seen[key] = self.n_samples + len(new)
+                new.append(line)
+            rows[i] = row
+            sha.update(key)
+        self.n_lines += len(lines)
+        if new:
+            self._write(b'\n'.join(new) + b'\n', len(new))
+        return rows
+
+    def _write(self, text, count):
+        written = 0
+        for X, y, dates, digests in iter_libsvm_stream(io.BytesIO(text),
+                                                       len(text) + 1):
+            X.sort_indices()
+            arrays = {'data': X.data,
+                      'indices': X.indices,
+                      'indptr': X.indptr[1:].astype(numpy.int64) + self.nnz,
+                      'labels': y,
+                      'dates': dates,
+                      'digests': digests}
+            for name in _ARRAYS:
+                arrays[name].astype(_DTYPES[name]).tofile(self.outs[name])
+            lengths = numpy.diff(X.indptr)
+            filled = lengths > 0
+            lo = numpy.full(X.shape[0], _NO_INDEX, dtype=numpy.int64)
+            hi = numpy.full(X.shape[0], -1, dtype=numpy.int64)
+            lo[filled] = X.indices[X.indptr[:-1][filled]]
+            hi[filled] = X.indices[X.indptr[1:][filled] - 1]
+            self.lo.extend(lo)
+            self.hi.extend(hi)
+            self.n_samples += X.shape[0]
+            self.nnz += X.nnz
+            written += X.shape[0]
+        if written != count:
+            raise ValueError('Parsed {} samples out of {} lines'
+                             .format(written, count))
+
+    def close(self):
+        for fout in self.outs.values():
+            fout.close()
+
+
+def import_files(root, files, base=None, chunk_size=CHUNK_SIZE):
+    """
+    Builds a sample store in directory root from LibSVM files, each
+    named by its path relative to directory base (default: the
+    current directory). Lines already seen in any of the files are
+    neither parsed nor saved again. Returns the store metadata.
+    """
+    base = os.path.abspath(base or os.curdir)
+    tmp = dataset_cache._make_tmp(root)
+    sets = {}
+    try:
+        importer = _Importer(tmp)
+        for number, infile in enumerate(files):
+            size, mtime = dataset_cache.source_stamp(infile)
+            before = importer.n_samples
+            sha = hashlib.sha256()
+            rows = _Growing()
+            with open_input(infile) as fin:
+                rest = b''
+                while True:
+                    block = fin.read(chunk_size)
+                    if not block:
+                        break
+                    block = rest + block
+                    cut = block.rfind(b'\n') + 1
+                    block, rest = block[:cut], block[cut:]
+                    rows.extend(importer.add_lines(block, sha))
+                rows.extend(importer.add_lines(rest, sha))
+            rows = rows.values()
+            lo = importer.lo.values()[rows].min() if len(rows) \
+                else _NO_INDEX
+            hi = importer.hi.values()[rows].max() if len(rows) else -1
+            # One-based feature indices unless index 0 occurs, as in
+            # dataset_cache.build()
+            offset = -1 if 0 < lo < _NO_INDEX else 0
+            array = 'set{:05d}'.format(number)
+            numpy.save(os.path.join(tmp, array + '.npy'), rows)
+            name = os.path.relpath(os.path.abspath(infile), base)
+            sets[name] = {'array': array,
+                          'source': os.path.abspath(infile),
+                          'source_size': size,
+                          'source_mtime': mtime,
+                          'samples': len(rows),
+                          'n_features': int(hi) + 1 + offset,
+                          'offset': offset,
+                          'digest': sha.hexdigest()}
+            print('Imported {}: {} samples, {} new'.format(
+                name, len(rows), importer.n_samples - before))
+        importer.close()
+        n_samples, nnz = importer.n_samples, importer.nnz
+        idx_dtype = numpy.int32 if nnz < 2 ** 31 else numpy.int64
+        for name in _ARRAYS:
+            count = n_samples + 1 if name == 'indptr' else \
+                nnz if name in ('data', 'indices') else n_samples
+            dataset_cache._finish_array(
+                tmp, name, _DTYPES[name], count,
+                idx_dtype if name in ('indices', 'indptr') else None)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    hi = importer.hi.values()
+    meta = {'version': STORE_VERSION,
+            'shape': [n_samples, int(hi.max()) + 1 if len(hi) else 0],
+            'nnz': nnz,
+            'lines': importer.n_lines,
+            'sets': sets,
+            'arrays': sorted(_ARRAYS + [s['array'] for s in sets.values()])}
+    dataset_cache._commit(tmp, root, meta)
+    return meta
+
+
+def find_files(data_dir, pattern='*.libsvm'):
+    """
+    Returns the sorted paths of all files under directory data_dir
+    with names matching pattern, also when compressed (see
+    datasets.open_input()), skipping binary caches.
+    """
+    found = []
+    for dirpath, dirnames, filenames in os.walk(data_dir):
+        dirnames[:] = sorted(d for d in dirnames
+                             if not d.endswith(dataset_cache.CACHE_SUFFIX))
+        found += [os.path.join(dirpath, f) for f in sorted(filenames)
+                  if fnmatch.fnmatch(f, pattern) or
+                  os.path.splitext(f)[1] in DECOMPRESSORS and
+                  fnmatch.fnmatch(os.path.splitext(f)[0], pattern)]
+    return found
+
+
+def take_rows(arrays, rows):
+    """
+    Gathers rows of a CSR matrix given by a dictionary of 'data',
+    'indices' and 'indptr' arrays. Returns the data, indices and
+    index pointers of the rows.
+    """
+    starts = arrays['indptr'][rows]
+    lengths = arrays['indptr'][rows + 1] - starts
+    indptr = numpy.zeros(len(rows) + 1, dtype=numpy.int64)
+    numpy.cumsum(lengths, out=indptr[1:])
+    gather = numpy.repeat(starts - indptr[:-1], lengths)
+    gather += numpy.arange(indptr[-1], dtype=gather.dtype)
+    return arrays['data'][gather], arrays['indices'][gather], indptr
+
+
+class SampleStore(object):
+    """
+    A sample store in directory root, loading imported files with
+    the same functions as dataset_cache. Files are looked up by
+    absolute path, or else by their path relative to the imported
+    directory, so the store keeps working after the LibSVM files
+    are removed or moved.
+    """
+    def __init__(self, root=None):
+        self.root = root or SAMPLE_STORE
+        if self.root is None:
+            raise ValueError('No sample store given (set '
+                             'HIDOST_SAMPLE_STORE)')
+        self.arrays, self.meta = dataset_cache.load_bundle(
+            self.root, names=_ARRAYS)
+        if self.meta.get('version') != STORE_VERSION:
+            raise ValueError('Sample store {} has version {}, expected {}; '
+                             'import the data again'.format(
+                                 self.root, self.meta.get('version'),
+                                 STORE_VERSION))
+        self.sets = self.meta['sets']
+        self.by_source = dict((s['source'], name)
+                              for name, s in self.sets.items())
+
+    def find(self, infile):
+        """
+        Returns the information on the imported file infile. Raises
+        KeyError if it was not imported and ValueError if it has
+        changed since it was.
+        """
+        path = os.path.abspath(infile)
+        name = self.by_source.get(path)
+        if name is None:
+            found = [n for n in self.sets
+                     if path.endswith(os.sep + n) or infile == n]
+            if len(found) != 1:
+                raise KeyError('{} not in sample store {}'.format(
+                    infile, self.root))
+            name = found[0]
+        info = self.sets[name]
+        if os.path.exists(infile) and list(dataset_cache.source_stamp(
+                infile)) != [info['source_size'], info['source_mtime']]:
+            raise ValueError('{} has changed since it was imported into '
+                             'sample store {}'.format(infile, self.root))
+        return info
+
+    def rows(self, infile):
+        """
+        Returns the sample numbers of the samples of infile.
+        """
+        info = self.find(infile)
+        return numpy.load(os.path.join(self.root, info['array'] + '.npy'),
+                          mmap_mode='r')
+
+    def source_stamp(self, infile):
+        """
+        Returns the (size, mtime) pair of infile when it was imported.
+        """
+        info = self.find(infile)
+        return info['source_size'], info['source_mtime']
+
+    def digest(self, infile):
+        """
+        Returns a SHA256 digest of the samples of infile in order.
+        """
+        return self.find(infile)['digest']
+
+    def load_dataset(self, infile, n_features=None):
+        """
+        Returns the samples of infile as dataset_cache.load_dataset()
+        does, but in memory.
+        """
+        import scipy.sparse
+        info = self.find(infile)
+        rows = self.rows(infile)
+        n_cols = info['n_features']
+        if n_features is not None:
+            if n_features < n_cols:
+                raise ValueError('n_features was set to {}, but input file '
+                                 'contains {} features'.format(n_features,
+                                                               n_cols))
+            n_cols = n_features
+        data, indices, indptr = take_rows(self.arrays, rows)
+        if info['offset']:
+            indices = indices + info['offset']
+        if indptr[-1] < 2 ** 31:
+            indptr = indptr.astype(indices.dtype)
+        X = scipy.sparse.csr_matrix((data, indices, indptr),
+                                    shape=(len(rows), n_cols), copy=False)
+        return (X, self.arrays['labels'][rows], self.arrays['dates'][rows],
+                self.arrays['digests'][rows])
+
+    def load_svmlight(self, infile, n_features=None):
+        return self.load_dataset(infile, n_features)[:2]
+
+    def load_arrays(self, infile, names):
+        rows = self.rows(infile)
+        return [self.arrays[name][rows] for name in names]
+
+    def load_labels(self, infile):
+        return self.load_arrays(infile, ['labels'])[0]
+
+
+def open_source(cache_dir=None, sample_store=None):
+    """
+    Returns the sample store in directory sample_store, if given, or
+    else a dataset_cache.FileSource with binary caches in cache_dir.
+    """
+    if sample_store:
+        return SampleStore(sample_store)
+    return dataset_cache.FileSource(cache_dir)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('data_dir',
+                        help='Directory with LibSVM files to import, '
+                        'searched recursively.')
+    parser.add_argument('store',
+                        help='Where to save the sample store.')
+    parser.add_argument('--pattern',
+                        default='*.libsvm',
+                        help='Names of files to import (default: '
+                        '%(default)s).')
+
+    args = parser.parse_args(argv)
+
+    files = find_files(args.data_dir, args.pattern)
+    if not files:
+        parser.error('No files matching {} in {}'.format(args.pattern,
+                                                        args.data_dir))
+    print('Importing {} files into {}'.format(len(files), args.store))
+    meta = import_files(args.store, files, args.data_dir)
+    print('Sample store: {} unique samples of {} ({:.1f}x fewer)'.format(
+        meta['shape'][0], meta['lines'],
+        float(meta['lines']) / max(meta['shape'][0], 1)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
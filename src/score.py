@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# score.py
+# Created on October 18, 2026.
+"""
+Scores samples in LibSVM files or streamed on standard input with a
+classifier saved by experiment.py --model-store. Prints the SHA256 sum,
+predicted label and decision value of every sample, one per line.
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+import sys
+import time
+
+import dataset_cache
+import datasets
+from experiment import classify_batches
+import models
+
+
+def stream_batches(fin, n_features, batch_size, zero_based=False):
+    """
+    Parses LibSVM data from binary file object fin, e.g. a pipe, in
+    batches of at most batch_size lines, so that the first samples are
+    scored before the rest arrives. Yields a CSR matrix with n_features
+    columns and an array of SHA256 digests for every batch.
+    """
+    for chunk in datasets.iter_libsvm_lines(fin, batch_size):
+        yield _with_columns(chunk, n_features, zero_based)
+
+
+def _with_columns(chunk, n_features, zero_based):
+    import scipy.sparse
+    X, _, _, digests = chunk
+    indices = X.indices if zero_based else X.indices - 1
+    if len(indices) and (indices.min() < 0 or indices.max() >= n_features):
+        raise ValueError('Feature indices out of range of the model '
+                         '({} features)'.format(n_features))
+    return (scipy.sparse.csr_matrix((X.data, indices, X.indptr),
+                                    shape=(X.shape[0], n_features)),
+            digests)
+
+
+def file_batches(infile, n_features, batch_size, cache_dir=None):
+    """
+    Reads LibSVM file infile through its memory-mapped binary cache.
+    Yields a CSR matrix with n_features columns and an array of SHA256
+    digests for every batch of at most batch_size samples.
+    """
+    X, _, _, digests = dataset_cache.load_dataset(infile, n_features,
+                                                  cache_dir)
+    for start in range(0, X.shape[0], batch_size):
+        yield (X[start:start + batch_size],
+               digests[start:start + batch_size])
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('model',
+                        nargs='?',
+                        help='Model name (e.g. pdf/r01/w03), digest or '
+                        'unique digest prefix.')
+    parser.add_argument('files',
+                        nargs='*',
+                        help='LibSVM files to score; - or none for '
+                        'standard input.')
+    parser.add_argument('--store',
+                        default=models.MODEL_STORE,
+                        help='Model store directory (default: '
+                        '$HIDOST_MODEL_STORE).')
+    parser.add_argument('--batch-size',
+                        default=10000,
+                        type=int,
+                        help='How many samples to classify at once, and '
+                        'lines of standard input to read at a time.')
+    parser.add_argument('--zero-based',
+                        default=False,
+                        action='store_true',
+                        help='Feature indices on standard input start at '
+                        'zero instead of one.')
+    parser.add_argument('--cache-dir',
+                        default=None,
+                        help='Where to keep binary caches of data files '
+                        '(default: next to the data files).')
+    parser.add_argument('--list',
+                        default=False,
+                        action='store_true',
+                        help='List the names of stored models and exit.')
+
+    args = parser.parse_args(argv)
+    if args.store is None:
+        parser.error('--store is required unless HIDOST_MODEL_STORE is set')
+    store = models.ModelStore(args.store)
+    if args.list:
+        for name, digest in sorted(store.names().items()):
+            print('{}\t{}'.format(name, digest))
+        return 0
+    if args.model is None:
+        parser.error('a model is required')
+
+    try:
+        clf, meta = store.load(args.model)
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        return 1
+    print('Loaded {} model {} (period starting {}, {} features)'.format(
+        meta['classifier'], meta['digest'][:12], meta['week_start'],
+        meta['n_features']), file=sys.stderr)
+
+    out = sys.stdout
+    n_samples = 0
+    start = time.time()
+    stdin = getattr(sys.stdin, 'buffer', sys.stdin)
+    for f in args.files or ['-']:
+        if f == '-':
+            batches = stream_batches(stdin, meta['n_features'],
+                                     args.batch_size, args.zero_based)
+        else:
+            batches = file_batches(f, meta['n_features'], args.batch_size,
+                                   args.cache_dir)
+        for X, digests in batches:
+            y_pr, y_val = classify_batches(clf, X, meta['classifier'],
+                                           meta['binarize'],
+                                           meta['representation'],
+                                           args.batch_size)
+            out.write(''.join('{}\t{:g}\t{:.6g}\n'.format(h, p, v)
+                              for h, p, v in zip(
+                                  datasets.digests_to_hex(digests),
+                                  y_pr.tolist(), y_val.tolist())))
+            out.flush()
+            n_samples += X.shape[0]
+    elapsed = time.time() - start
+    print('Scored {} samples in {:.1f} s ({:.0f} samples/s)'.format(
+        n_samples, elapsed, n_samples / max(elapsed, 1e-6)), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
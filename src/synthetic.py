@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# synthetic.py
+# Created on October 18, 2026.
+"""
+Generates a synthetic dataset laid out like the real ones: weekly
+LibSVM training and test files with dates and SHA256 sums of samples
+in comments, a feature list (.nppf) per training set and a Python
+shelve file with antivirus detection data.
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+import binascii
+import datetime
+import json
+import os
+import shelve
+import sys
+
+import numpy
+
+# Path components of synthetic structural feature names
+NAME_PARTS = ['Pages', 'Kids', 'Resources', 'Font', 'Annots', 'AA',
+              'OpenAction', 'JS', 'Names', 'Type', 'Subtype', 'Length',
+              'Filter', 'Contents', 'MediaBox', 'Parent', 'Count',
+              'XObject', 'ProcSet', 'Catalog']
+AVS = ['AV{:02d}'.format(i) for i in range(1, 41)]
+META_FILE = 'synthetic.json'
+
+
+def feature_name(fid):
+    """
+    Returns a unique structural path name for feature ID fid.
+    """
+    parts = []
+    while True:
+        fid, r = divmod(fid, len(NAME_PARTS))
+        parts.append(NAME_PARTS[r])
+        if not fid:
+            break
+    return '/'.join(['Root'] + parts[::-1])
+
+
+def sample_features(n_samples, ranks_to_ids, cdf, nnz_mean, binary):
+    """
+    Draws the features of n_samples samples. The number of features of
+    a sample is Poisson-distributed around nnz_mean and their ranks
+    follow the popularity distribution with cumulative distribution
+    cdf. Returns a list of (feature IDs, values) pairs.
+    """
+    counts = numpy.maximum(numpy.random.poisson(nnz_mean, n_samples), 1)
+    owners = numpy.repeat(numpy.arange(n_samples), counts)
+    ranks = numpy.searchsorted(cdf, numpy.random.random(len(owners)))
+    ranks = numpy.minimum(ranks, len(cdf) - 1)
+    keys = numpy.unique(owners * len(cdf) + ranks)
+    owners, ranks = keys // len(cdf), keys % len(cdf)
+    ids = ranks_to_ids[ranks]
+    if binary:
+        values = numpy.ones(len(ids), dtype=int)
+    else:
+        values = numpy.random.geometric(0.3, len(ids))
+    bounds = numpy.searchsorted(owners, numpy.arange(n_samples + 1))
+    return [(ids[s:e], values[s:e]) for s, e in zip(bounds[:-1], bounds[1:])]
+
+
+def generate_weeks(weeks, samples, features, nnz_mean, malicious, drift,
+                   binary, start):
+    """
+    Generates the samples of all weeks. Every week, a drift fraction
+    of features is replaced by new ones. Malicious samples favor
+    different features than benign ones. Returns a list with a list
+    of (label, feature IDs, values, date, SHA256 digest) tuples for
+    every week.
+    """
+    weights = 1.0 / numpy.arange(1, features + 1) ** 1.1
+    cdf = numpy.cumsum(weights) / weights.sum()
+    ranks_to_ids = numpy.arange(features)
+    # Malicious samples move a tenth of features up in popularity
+    top = numpy.random.choice(features, features // 10, replace=False)
+    mal_perm = numpy.concatenate([top, numpy.setdiff1d(numpy.arange(features),
+                                                       top)])
+    next_id = features
+    data = []
+    for w in range(weeks):
+        if w:
+            replaced = numpy.random.choice(features, int(drift * features),
+                                           replace=False)
+            ranks_to_ids[replaced] = numpy.arange(next_id,
+                                                  next_id + len(replaced))
+            next_id += len(replaced)
+        labels = (numpy.random.random(samples) < malicious).astype(int)
+        benign = sample_features(samples, ranks_to_ids, cdf, nnz_mean,
+                                 binary)
+        mal = sample_features(samples, ranks_to_ids[mal_perm], cdf,
+                              nnz_mean, binary)
+        days = numpy.random.randint(0, 7, samples)
+        digests = numpy.random.bytes(32 * samples)
+        week = []
+        for i in range(samples):
+            ids, values = mal[i] if labels[i] else benign[i]
+            date = start + datetime.timedelta(days=7 * w + int(days[i]))
+            week.append((labels[i], ids, values, date,
+                         binascii.hexlify(digests[32 * i:32 * (i + 1)])
+                         .decode('ascii')))
+        data.append(week)
+    return data
+
+
+def write_nppf(outfile, names):
+    """
+    Writes a list of feature names in the format read by
+    feat_drift.get_nppf().
+    """
+    with open(outfile, 'wb') as fout:
+        fout.write('{}\n'.format(len(names)).encode('ascii'))
+        for name in names:
+            fout.write(name.replace('/', '\0').encode('ascii') + b'\0\0\n')
+
+
+def write_libsvm(outfile, samples, columns):
+    """
+    Writes samples in LibSVM format, with features mapped to one-based
+    indices by the dictionary columns. Features not in columns are
+    left out.
+    """
+    with open(outfile, 'w') as fout:
+        for label, ids, values, date, sha in samples:
+            feats = sorted((columns[f], v) for f, v in zip(ids, values)
+                           if f in columns)
+            fout.write('{} {} # {} {}\n'.format(
+                label, ' '.join('{}:{}'.format(c, v) for c, v in feats),
+                date.strftime('%Y/%m/%d'), sha))
+
+
+def write_avstats(outfile, data):
+    """
+    Writes antivirus detection reports of malicious samples into a
+    shelve file. Every antivirus has its own detection rate and some
+    samples have no report.
+    """
+    rates = numpy.random.uniform(0.2, 0.95, len(AVS))
+    avstats = shelve.open(outfile, flag='n', protocol=2)
+    for week in data:
+        for label, _, _, _, sha in week:
+            if label and numpy.random.random() < 0.9:
+                detected = numpy.random.random(len(AVS)) < rates
+                avstats[str(sha)] = {'report': dict(zip(AVS,
+                                                        detected.tolist()))}
+    avstats.close()
+
+
+def generate(outdir, weeks=6, window=4, samples=1000, features=5000,
+             nnz_mean=100, malicious=0.3, drift=0.05, binary=False,
+             seed=0, start=datetime.date(2013, 1, 7), keepmal=False,
+             pool=False):
+    """
+    Generates a synthetic dataset in directory outdir. Samples are
+    generated for the given number of weeks; the training set of
+    period w consists of the window weeks before week w and its test
+    set of week w; with keepmal, it also retains the malicious samples
+    of all earlier weeks, as in SWF-KeepMal. Returns a dictionary
+    describing the dataset, with lists of training, test and feature
+    list files under 'train', 'test' and 'feats' and the shelve file
+    under 'avstats'. With pool, the samples of all weeks are also
+    written into a single file under 'pool', in one feature space of
+    all features. The dataset is not generated again if it exists
+    with the same settings.
+    """
+    settings = {'weeks': weeks, 'window': window, 'samples': samples,
+                'features': features, 'nnz_mean': nnz_mean,
+                'malicious': malicious, 'drift': drift, 'binary': binary,
+                'seed': seed, 'start': start.isoformat()}
+    if keepmal:
+        settings['keepmal'] = True
+    if pool:
+        settings['pool'] = True
+    periods = range(window + 1, weeks + 1)
+    info = dict(settings,
+                train=[os.path.join(outdir, 'w{:02d}-train.libsvm'.format(w))
+                       for w in periods],
+                test=[os.path.join(outdir, 'w{:02d}-test.libsvm'.format(w))
+                      for w in periods],
+                feats=[os.path.join(outdir, 'w{:02d}.nppf'.format(w))
+                       for w in periods],
+                avstats=os.path.join(outdir, 'avstats.shelve'))
+    if pool:
+        info['pool'] = os.path.join(outdir, 'pool.libsvm')
+    meta_f = os.path.join(outdir, META_FILE)
+    try:
+        with open(meta_f) as fin:
+            if json.load(fin) == json.loads(json.dumps(info)):
+                return info
+    except (IOError, OSError, ValueError):
+        pass
+    if not os.path.isdir(outdir):
+        os.makedirs(outdir)
+
+    numpy.random.seed(seed)
+    data = generate_weeks(weeks, samples, features, nnz_mean, malicious,
+                          drift, binary, start)
+    for w, f_tr, f_te, f_feats in zip(periods, info['train'], info['test'],
+                                      info['feats']):
+        train = [s for week in data[w - 1 - window:w - 1] for s in week]
+        if keepmal:
+            train = [s for week in data[:max(w - 1 - window, 0)]
+                     for s in week if s[0]] + train
+        ids = numpy.unique(numpy.concatenate([s[1] for s in train]))
+        columns = dict((f, c) for c, f in enumerate(ids.tolist(), start=1))
+        print('Writing period {}: {} training samples, {} features'
+              .format(w, len(train), len(ids)))
+        write_nppf(f_feats, [feature_name(f) for f in ids.tolist()])
+        write_libsvm(f_tr, train, columns)
+        write_libsvm(f_te, data[w - 1], columns)
+    if pool:
+        samples = [s for week in data for s in week]
+        ids = numpy.unique(numpy.concatenate([s[1] for s in samples]))
+        print('Writing pool: {} samples, {} features'.format(len(samples),
+                                                             len(ids)))
+        write_libsvm(info['pool'], samples,
+                     dict((f, c) for c, f in enumerate(ids.tolist(),
+                                                       start=1)))
+    write_avstats(info['avstats'], data)
+    with open(meta_f, 'w') as fout:
+        json.dump(info, fout, indent=1, sort_keys=True)
+    return info
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('outdir',
+                        help='Where to generate the dataset.')
+    parser.add_argument('--weeks',
+                        default=6,
+                        type=int,
+                        help='For how many weeks to generate samples.')
+    parser.add_argument('--window',
+                        default=4,
+                        type=int,
+                        help='How many weeks of samples to train on.')
+    parser.add_argument('--samples',
+                        default=1000,
+                        type=int,
+                        help='How many samples to generate per week.')
+    parser.add_argument('--features',
+                        default=5000,
+                        type=int,
+                        help='How many features are in use at a time.')
+    parser.add_argument('--nnz',
+                        default=100,
+                        type=int,
+                        help='Mean number of features per sample.')
+    parser.add_argument('--malicious',
+                        default=0.3,
+                        type=float,
+                        help='Fraction of malicious samples.')
+    parser.add_argument('--drift',
+                        default=0.05,
+                        type=float,
+                        help='Fraction of features replaced every week.')
+    parser.add_argument('--binary',
+                        default=False,
+                        action='store_true',
+                        help='Generate binary features.')
+    parser.add_argument('--seed',
+                        default=0,
+                        type=int,
+                        help='Random seed.')
+    parser.add_argument('--keepmal',
+                        default=False,
+                        action='store_true',
+                        help='Retain the malicious samples of all earlier '
+                        'weeks in training sets.')
+    parser.add_argument('--pool',
+                        default=False,
+                        action='store_true',
+                        help='Also write the samples of all weeks into a '
+                        'single file, for experiment.py --pool.')
+
+    args = parser.parse_args(argv)
+    assert 0 < args.window < args.weeks
+
+    generate(args.outdir, args.weeks, args.window, args.samples,
+             args.features, args.nnz, args.malicious, args.drift,
+             args.binary, args.seed, keepmal=args.keepmal, pool=args.pool)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
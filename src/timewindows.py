@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 18, 2026.
+
+Training and test sets of retraining periods, chosen from a single
+pool of dated samples instead of being read from a file per set.
+
+The test set of every period covers a number of weeks and the test
+periods follow each other. The training set of a period holds the
+samples of the weeks right before its test set: benign samples of
+the last few weeks, and malicious samples of as many or, as in
+SWF-KeepMal, of all earlier weeks. Changing the window or the
+retention of either class thus costs neither disk space nor parsing.
+"""
+import numpy
+
+# Retention of all earlier weeks
+ALL = 'all'
+
+
+def parse_weeks(text):
+    """
+    Parses a number of weeks, or ALL for all earlier weeks (returned
+    as None).
+    """
+    if text == ALL:
+        return None
+    weeks = int(text)
+    if weeks < 1:
+        raise ValueError('Weeks must be positive or {!r}: {}'.format(ALL,
+                                                                     text))
+    return weeks
+
+
+def _days(dates):
+    return numpy.asarray(dates).astype('datetime64[D]').astype(numpy.int64)
+
+
+def test_starts(dates, window, test_weeks=1, first_test=None, periods=None):
+    """
+    Returns the first days of the test sets of all periods, as
+    ISO-formatted date strings, for samples with dates. Unless
+    first_test is given, the first test set begins window weeks after
+    the first sample. Periods follow each other every test_weeks
+    weeks until the last sample or, with periods, until there are as
+    many.
+    """
+    dated = numpy.asarray(dates)[~numpy.isnat(dates)]
+    if not len(dated):
+        raise ValueError('No dated samples')
+    first, last = _days(dated).min(), _days(dated).max()
+    if first_test is None:
+        start = first + 7 * window
+    else:
+        start = _days([numpy.datetime64(first_test, 'D')])[0]
+    count = (last - start) // (7 * test_weeks) + 1
+    if periods is not None:
+        count = min(count, periods)
+    if count < 1:
+        raise ValueError('No samples after the first training window')
+    return [str(numpy.datetime64(int(start + 7 * test_weeks * p), 'D'))
+            for p in range(count)]
+
+
+def split(dates, y, start, test_weeks=1, benign=4, malicious=4):
+    """
+    Returns the sorted rows of the training and the test set of the
+    period whose test set begins on date start, for samples with
+    dates and labels y. benign and malicious are the numbers of weeks
+    before start of which samples of either class are trained on,
+    None for all earlier weeks. Samples without dates are left out.
+    """
+    days = _days(dates)
+    dated = ~numpy.isnat(dates)
+    start = _days([numpy.datetime64(start, 'D')])[0]
+    before = dated & (days < start)
+    test = dated & (days >= start) & (days < start + 7 * test_weeks)
+    mal = y > 0.5
+    if benign is not None:
+        before_b = before & (days >= start - 7 * benign)
+    else:
+        before_b = before
+    if malicious is not None:
+        before_m = before & (days >= start - 7 * malicious)
+    else:
+        before_m = before
+    train = numpy.where(~mal, before_b, before_m)
+    return numpy.flatnonzero(train), numpy.flatnonzero(test)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# timing.py
+# Created on October 18, 2026.
+"""
+Summarizes the wall clock time, CPU time and peak memory consumption
+of experiment phases recorded in result files or JSON-lines traces
+(see the --trace option of experiment.py).
+"""
+from __future__ import print_function
+
+from argparse import ArgumentParser
+import collections
+import contextlib
+import json
+import os
+import pickle
+import sys
+import time
+
+import numpy
+
+import memplan
+
+
+def cpu_time():
+    """
+    Returns the CPU time used by this process, its threads and its
+    terminated child processes, in seconds.
+    """
+    t = os.times()
+    return t[0] + t[1] + t[2] + t[3]
+
+
+class PhaseTimer(object):
+    """
+    Records the wall clock time, CPU time and peak resident set size
+    of consecutive (not nested) phases of work in self.records, a
+    list of dictionaries.
+    """
+    def __init__(self):
+        self.records = []
+
+    @contextlib.contextmanager
+    def phase(self, name, **info):
+        """
+        Times the body of a with statement as phase name. Keyword
+        arguments are stored in the record of the phase.
+        """
+        memplan.reset_peak()
+        wall, cpu = time.time(), cpu_time()
+        try:
+            yield
+        finally:
+            record = dict(info, phase=name, wall=time.time() - wall,
+                          cpu=cpu_time() - cpu, peak=memplan.peak_rss())
+            self.records.append(record)
+
+
+def write_trace(fout, records, **info):
+    """
+    Writes phase records as JSON lines into file fout, with keyword
+    arguments added to every record.
+    """
+    for record in records:
+        fout.write(json.dumps(dict(record, **info), sort_keys=True) + '\n')
+    fout.flush()
+
+
+def load_records(infile):
+    """
+    Loads phase records from a JSON-lines trace or a result file of
+    experiment.py. Every record gets the name of the file as 'run'.
+    """
+    run = os.path.splitext(os.path.basename(infile))[0]
+    with open(infile, 'rb') as fin:
+        head = fin.read(1)
+    if head == b'{':
+        with open(infile) as fin:
+            return [dict(json.loads(line), run=run) for line in fin
+                    if line.strip()]
+    output = pickle.load(open(infile, 'rb'))
+    records = []
+    for i, weeks in enumerate(output.get('phases', []), start=1):
+        for w, phases in enumerate(weeks, start=1):
+            records.extend(dict(r, run=run, repetition=i, week=w)
+                           for r in phases)
+    return records
+
+
+def summarize(records):
+    """
+    Prints the total and mean wall clock time, CPU time and maximum
+    peak memory of every phase.
+    """
+    by_phase = collections.OrderedDict()
+    for r in records:
+        by_phase.setdefault(r['phase'], []).append(r)
+    total = sum(r['wall'] for r in records) or 1.0
+    print('{:<14s} {:>6s} {:>10s} {:>6s} {:>10s} {:>10s} {:>6s} {:>10s}'
+          .format('Phase', 'Count', 'Wall (s)', 'Share', 'Mean (s)',
+                  'CPU (s)', 'CPU/W', 'Peak RSS'))
+    for phase, rs in by_phase.items():
+        wall = sum(r['wall'] for r in rs)
+        cpu = sum(r['cpu'] for r in rs)
+        print('{:<14s} {:>6d} {:>10.1f} {:>5.1f}% {:>10.2f} {:>10.1f} '
+              '{:>6.2f} {:>10s}'.format(
+                  phase, len(rs), wall, 100.0 * wall / total, wall / len(rs),
+                  cpu, cpu / max(wall, 1e-6),
+                  memplan.format_size(max(r['peak'] for r in rs))))
+
+
+def outliers(records, factor):
+    """
+    Prints the weeks whose total wall clock time, summed over phases
+    and averaged over repetitions, exceeds factor times the median
+    week of the same run.
+    """
+    weeks = collections.defaultdict(lambda: collections.defaultdict(float))
+    reps = collections.defaultdict(set)
+    for r in records:
+        weeks[r['run']][r['week']] += r['wall']
+        reps[r['run'], r['week']].add(r['repetition'])
+    found = False
+    for run in sorted(weeks):
+        walls = dict((w, t / len(reps[run, w]))
+                     for w, t in weeks[run].items())
+        median = numpy.median(list(walls.values()))
+        for w in sorted(walls):
+            if walls[w] > factor * median:
+                if not found:
+                    print('\nOutlier weeks (over {:g}x the median):'
+                          .format(factor))
+                    found = True
+                print('{}: week {} takes {:.1f} s, median {:.1f} s'
+                      .format(run, w, walls[w], median))
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('files',
+                        nargs='+',
+                        help='Result files or JSON-lines traces.')
+    parser.add_argument('--by-run',
+                        default=False,
+                        action='store_true',
+                        help='Summarize every file separately.')
+    parser.add_argument('--outlier',
+                        default=1.5,
+                        type=float,
+                        help='Report weeks that take more than this many '
+                        'times the median week.')
+
+    args = parser.parse_args(argv)
+
+    records = []
+    for infile in args.files:
+        records += load_records(infile)
+    if not records:
+        print('No phases recorded')
+        return 1
+    if args.by_run:
+        for run in sorted(set(r['run'] for r in records)):
+            print('{:#^79s}'.format(' {} '.format(run)))
+            summarize([r for r in records if r['run'] == run])
+            print()
+    else:
+        summarize(records)
+    outliers(records, args.outlier)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 18, 2026.
+
+Random Forests assembled from per-week sub-forests. The training set
+of every period covers a sliding window of weeks, so consecutive
+training sets share all but one week. A sub-forest is trained on the
+samples of every week and identified by a digest of those samples,
+so that a week still inside the window of the next period reuses its
+sub-forest instead of training it again, and the trees of weeks that
+left the window are dropped.
+
+Sub-forests trained in the feature space of one period classify data
+of another through the feature lists of both periods: features the
+other period does not have are treated as absent (zero).
+"""
+import hashlib
+
+import numpy
+
+import features
+
+# Which samples a week's sub-forest is trained on: 'window' only the
+# week's own samples; 'keepmal' additionally the malicious samples
+# retained from before the week's window, as in SWF-KeepMal
+RETENTION = ('window', 'keepmal')
+
+# Sub-forests trained so far by this process, by key
+_memo = {}
+
+
+class WindowForest(object):
+    """
+    A forest of fitted sub-forests (RandomForestClassifier) with
+    class probabilities averaged over all of their trees, as those of
+    a single forest are. Sub-forest i is given the columns columns[i]
+    of the data, where -1 stands for an absent feature, or all
+    columns if columns[i] is None.
+    """
+    def __init__(self, forests, columns, classes, keys=None):
+        self.forests = forests
+        self.columns = columns
+        self.classes_ = numpy.asarray(classes)
+        self.keys = keys or []
+
+    @property
+    def n_estimators(self):
+        return sum(len(forest.estimators_) for forest in self.forests)
+
+    def predict_proba(self, X):
+        proba = numpy.zeros((X.shape[0], len(self.classes_)))
+        for forest, cols in zip(self.forests, self.columns):
+            Xf = X if cols is None else select_columns(X, cols)
+            # A sub-forest may have seen only some of the classes
+            idx = numpy.searchsorted(self.classes_, forest.classes_)
+            proba[:, idx] += (forest.predict_proba(Xf) *
+                              len(forest.estimators_))
+        return proba / self.n_estimators
+
+    def predict(self, X):
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1))
+
+
+def feature_ids(feature_f, n_features):
+    """
+    Returns an array identifying the first n_features columns of a
+    period's data: the 64-bit hashes of the feature paths in feature
+    list file feature_f, whose i-th feature is column i, or, without
+    a feature list, the column numbers themselves, for datasets that
+    share one feature space.
+    """
+    if feature_f is None:
+        return numpy.arange(n_features, dtype=numpy.uint64)
+    ids = features.load_ordered_hashes(feature_f)
+    if len(ids) < n_features:
+        raise ValueError('{} lists {} features, but the data has {}'
+                         .format(feature_f, len(ids), n_features))
+    return ids[:n_features]
+
+
+def column_map(src, dst):
+    """
+    Returns the columns of data with feature IDs dst that hold the
+    features with IDs src, -1 for features not in dst, or None if
+    src and dst are the same.
+    """
+    if len(src) == len(dst) and numpy.array_equal(src, dst):
+        return None
+    order = numpy.argsort(dst)
+    pos = numpy.searchsorted(dst[order], src).clip(0, max(len(dst) - 1, 0))
+    found = dst[order][pos] == src if len(dst) else numpy.zeros(len(src),
+                                                                bool)
+    return numpy.where(found, order[pos], -1)
+
+
+def select_columns(X, cols):
+    """
+    Returns the columns cols of X, a CSR matrix or a dense array,
+    with zeros in place of columns -1.
+    """
+    import scipy.sparse
+    present = numpy.where(cols >= 0)[0]
+    if scipy.sparse.issparse(X):
+        P = scipy.sparse.csr_matrix(
+            (numpy.ones(len(present), dtype=X.dtype),
+             (cols[present], present)), shape=(X.shape[1], len(cols)))
+        return (X * P).tocsr()
+    Xf = numpy.zeros((X.shape[0], len(cols)), dtype=X.dtype)
+    Xf[:, present] = X[:, cols[present]]
+    return Xf
+
+
+def week_groups(dates, y, start, retention='window'):
+    """
+    Groups training samples with dates and labels y into weeks of the
+    sliding window, with weeks beginning on the weekday of date start
+    (the first day of the test period). The window spans the weeks
+    with benign samples. Returns a list of (first day of the week,
+    sorted rows) pairs, oldest week first, with rows chosen as
+    described for RETENTION. Samples without dates are left out.
+    """
+    if retention not in RETENTION:
+        raise ValueError('Unknown retention policy: {}'.format(retention))
+    dated = ~numpy.isnat(dates)
+    days = dates.astype('datetime64[D]').astype(numpy.int64)
+    offset = numpy.datetime64(start, 'D').astype(numpy.int64) % 7
+    weeks = (days - offset) // 7
+    window = numpy.unique(weeks[dated & (y < 0.5)])
+    if not len(window):
+        raise ValueError('No dated benign training samples')
+    length = window[-1] - window[0] + 1
+    groups = []
+    for week in window.tolist():
+        rows = numpy.where(dated & (weeks == week))[0]
+        if retention == 'keepmal':
+            retained = numpy.where(dated & (y > 0.5) &
+                                   (weeks <= week - length))[0]
+            rows = numpy.union1d(rows, retained)
+        groups.append((numpy.datetime64(int(week * 7 + offset), 'D'), rows))
+    return groups
+
+
+def group_digest(digests, y, rows):
+    """
+    Returns the hexadecimal SHA256 digest of the SHA256 sums and labels
+    of samples rows, regardless of their order.
+    """
+    order = numpy.argsort(digests[rows], kind='mergesort')
+    sha = hashlib.sha256()
+    sha.update(numpy.ascontiguousarray(digests[rows][order]).tobytes())
+    sha.update(numpy.ascontiguousarray(y[rows][order],
+                                       dtype=numpy.int8).tobytes())
+    return sha.hexdigest()
+
+
+def lookup(key, fit_cache=None):
+    """
+    Returns the (sub-forest, feature IDs) pair trained under key by
+    this process or found in FitCache fit_cache, or None.
+    """
+    if key in _memo:
+        return _memo[key]
+    found = fit_cache.get(key) if fit_cache is not None else None
+    if found is not None:
+        _memo[key] = found
+    return found
+
+
+def store(key, forest, ids, fit_cache=None):
+    _memo[key] = (forest, ids)
+    if fit_cache is not None:
+        fit_cache.put(key, (forest, ids))
+
+
+def retain_only(keys):
+    """
+    Forgets the sub-forests of this process other than those under
+    keys, which the next period may reuse.
+    """
+    keys = set(keys)
+    for key in list(_memo):
+        if key not in keys:
+            del _memo[key]
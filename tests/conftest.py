@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 18, 2026.
+
+The modules under test live in src/ and import each other by name, as
+the scripts do when run from there.
+"""
+import os
+import sys
+
+# Plots are rendered without a display
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
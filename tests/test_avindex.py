@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import binascii
+import shelve
+
+import numpy
+
+import avindex
+
+SHAS = ['{:064x}'.format(i) for i in (7, 3, 5)]
+REPORTS = [{'A': True, 'B': False, 'C': True},
+           {'A': True, 'B': True},
+           {'C': False}]
+
+
+def digest(sha):
+    return binascii.unhexlify(sha)
+
+
+def make_shelve(path):
+    db = shelve.open(path, flag='n')
+    for sha, report in zip(SHAS, REPORTS):
+        db[sha] = {'report': report}
+    db['not a digest'] = {'report': {'A': True}}
+    db.close()
+    return path
+
+
+def check_counts(index):
+    counts = index.count([digest(SHAS[0]), digest(SHAS[1]),
+                          digest(SHAS[2]), digest('{:064x}'.format(9))])
+    assert counts == {'Total': 4, 'A': 2, 'B': 1, 'C': 1}
+    assert index.count([digest(SHAS[2])]) == {'Total': 1}
+    assert index.count([]) == {'Total': 0}
+
+
+def test_count_joins_on_digests(tmp_path):
+    index = avindex.AVIndex.from_shelve(make_shelve(str(tmp_path / 'av')))
+    assert len(index.digests) == 3
+    assert index.digests.tolist() == sorted(index.digests.tolist())
+    check_counts(index)
+
+
+def test_saved_index(tmp_path):
+    index = avindex.AVIndex.from_shelve(make_shelve(str(tmp_path / 'av')))
+    index.save(str(tmp_path / 'av.avidx'))
+    loaded = avindex.open_avstats(str(tmp_path / 'av.avidx'))
+    assert loaded.avs == index.avs
+    check_counts(loaded)
+
+
+def test_empty_index():
+    index = avindex.AVIndex(numpy.zeros(0, dtype='S32'),
+                            numpy.zeros((0, 0), dtype=numpy.uint8), [])
+    assert index.count([digest(SHAS[0])]) == {'Total': 1}
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import numpy
+import pytest
+
+import dataset_cache
+
+
+def write(path, text):
+    path.write_bytes(text.encode('ascii'))
+    return str(path)
+
+
+def test_one_based_indices_are_shifted(tmp_path):
+    infile = write(tmp_path / 'one.libsvm',
+                   '1 1:1 4:2 # 2013/01/07\n'
+                   '0 2:3\n')
+    X, y, dates, digests = dataset_cache.load_dataset(
+        infile, cache_dir=str(tmp_path / 'cache'))
+    assert X.shape == (2, 4)
+    assert X.toarray().tolist() == [[1, 0, 0, 2], [0, 3, 0, 0]]
+    assert y.tolist() == [1, 0]
+    assert dates.astype(str).tolist() == ['2013-01-07', 'NaT']
+
+
+def test_zero_based_indices_are_kept(tmp_path):
+    infile = write(tmp_path / 'zero.libsvm', '1 0:1 3:2\n0 2:3\n')
+    X, _, _, _ = dataset_cache.load_dataset(
+        infile, cache_dir=str(tmp_path / 'cache'))
+    assert X.shape == (2, 4)
+    assert X.toarray().tolist() == [[1, 0, 0, 2], [0, 0, 3, 0]]
+
+
+def test_n_features(tmp_path):
+    infile = write(tmp_path / 'one.libsvm', '1 1:1 4:2\n0 2:3\n')
+    cache_dir = str(tmp_path / 'cache')
+    X, _ = dataset_cache.load_svmlight(infile, 6, cache_dir)
+    assert X.shape == (2, 6)
+    with pytest.raises(ValueError):
+        dataset_cache.load_svmlight(infile, 3, cache_dir)
+
+
+def test_cache_follows_the_file(tmp_path):
+    infile = write(tmp_path / 'one.libsvm', '1 1:1\n')
+    cache_dir = str(tmp_path / 'cache')
+    path = dataset_cache.ensure(infile, cache_dir)
+    assert dataset_cache.is_fresh(infile, path)
+    write(tmp_path / 'one.libsvm', '1 1:1\n0 1:2 2:1\n')
+    labels = dataset_cache.load_labels(infile, cache_dir)
+    assert numpy.asarray(labels).tolist() == [1, 0]
+    assert dataset_cache.load_meta(path)['shape'] == [2, 2]
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import binascii
+import gzip
+import io
+import lzma
+import subprocess
+
+import numpy
+import pytest
+
+import datasets
+
+SHA_A = 'a' * 64
+SHA_B = '0123456789abcdef' * 4
+SHA_C = 'f' * 64
+
+# Samples interleaved with lines that are not samples: a comment with a
+# date and SHA256 sum of its own, an empty line and a blank one
+TEXT = ('1 1:1 3:2 # 2013/01/07 ' + SHA_A + '\n'
+        '# 2012/12/31 ' + SHA_C + '\n'
+        '\n'
+        '0 2:0.5 # ' + SHA_B + ' 2013/01/08\n'
+        '   \n'
+        '1 4:1\n'
+        '0 1:1 # 2013/01/09\n').encode('ascii')
+
+
+def digest(sha):
+    return binascii.unhexlify(sha)
+
+
+def check_samples(X, y, dates, digests):
+    assert X.shape[0] == 4
+    assert y.tolist() == [1, 0, 1, 0]
+    assert dates.astype(str).tolist() == ['2013-01-07', '2013-01-08',
+                                          'NaT', '2013-01-09']
+    # Zeros, which numpy strips from bytes
+    assert digests.tolist() == [digest(SHA_A), digest(SHA_B), b'', b'']
+    assert X[2].indices.tolist() == [4]
+
+
+def test_scan_chunk_aligns_comments_with_samples():
+    check_samples(*datasets._scan_chunk(TEXT))
+
+
+def test_scan_chunk_with_leading_whitespace():
+    text = TEXT.replace(b'0 2:0.5', b'  0 2:0.5').replace(b'# 2012',
+                                                        b'\t# 2012')
+    check_samples(*datasets._scan_chunk(text))
+
+
+def test_scan_chunk_of_comments_only():
+    X, y, dates, digests = datasets._scan_chunk(b'# ' + SHA_A.encode() +
+                                                b'\n\n')
+    assert X.shape[0] == len(y) == len(dates) == len(digests) == 0
+
+
+def concatenate(chunks):
+    chunks = list(chunks)
+    indices = numpy.concatenate([X.indices for X, _, _, _ in chunks])
+    return ([c[1] for c in chunks], [c[2] for c in chunks],
+            [c[3] for c in chunks], indices)
+
+
+def test_streams_split_anywhere():
+    whole = datasets._scan_chunk(TEXT)
+    # Chunks end in the middle of lines and may hold no samples at all
+    for chunk_size in (1, 7, 16, len(TEXT)):
+        y, dates, digests, indices = concatenate(
+            datasets.iter_libsvm_stream(io.BytesIO(TEXT), chunk_size))
+        assert numpy.concatenate(y).tolist() == whole[1].tolist()
+        assert numpy.concatenate(digests).tolist() == whole[3].tolist()
+        assert indices.tolist() == whole[0].indices.tolist()
+    for lines in (1, 2, 3, 100):
+        y, dates, digests, indices = concatenate(
+            datasets.iter_libsvm_lines(io.BytesIO(TEXT), lines))
+        assert numpy.concatenate(dates).tolist() == whole[2].tolist()
+        assert numpy.concatenate(digests).tolist() == whole[3].tolist()
+
+
+def test_stream_without_final_newline():
+    y, _, _, _ = concatenate(
+        datasets.iter_libsvm_stream(io.BytesIO(TEXT.rstrip(b'\n')), 5))
+    assert numpy.concatenate(y).tolist() == [1, 0, 1, 0]
+
+
+def compressed(tmp_path, suffix):
+    path = str(tmp_path / ('data.libsvm' + suffix))
+    if suffix == '.gz':
+        with gzip.open(path, 'wb') as fout:
+            fout.write(TEXT)
+    elif suffix == '.xz':
+        with lzma.open(path, 'wb') as fout:
+            fout.write(TEXT)
+    else:
+        with open(path, 'wb') as fout:
+            fout.write(subprocess.check_output(['zstd', '-qc'], input=TEXT))
+    return path
+
+
+@pytest.mark.parametrize('suffix', ['.gz', '.xz', '.zst'])
+@pytest.mark.parametrize('command', [True, False])
+def test_compressed_inputs(tmp_path, monkeypatch, suffix, command):
+    if suffix == '.zst' and not datasets.find_command('zstd'):
+        pytest.skip('zstd is not installed')
+    path = compressed(tmp_path, suffix)
+    if not command:
+        # Without decompression commands, modules decompress
+        monkeypatch.setattr(datasets, 'DECOMPRESSORS', dict(
+            (s, [['no-such-command']]) for s in datasets.DECOMPRESSORS))
+        if suffix == '.zst':
+            with pytest.raises(IOError):
+                datasets.open_input(path)
+            return
+    with datasets.open_input(path) as fin:
+        assert fin.read() == TEXT
+    X, y, dates, digests = datasets.scan_libsvm(path, zero_based=True,
+                                                chunk_size=16)
+    check_samples(X, y, dates, digests)
+
+
+def test_corrupt_compressed_input(tmp_path):
+    path = tmp_path / 'data.libsvm.gz'
+    path.write_bytes(gzip.compress(TEXT)[:-12])
+    with pytest.raises(IOError):
+        datasets.scan_libsvm(str(path))
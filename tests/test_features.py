@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import pickle
+
+import numpy
+import pytest
+
+import features
+
+
+def write_nppf(path, paths):
+    with open(str(path), 'wb') as fout:
+        fout.write(b'2201\n')
+        for p in paths:
+            fout.write(p.replace(b'/', b'\0') + b'\n')
+    return str(path)
+
+
+def write_pickle(path, paths):
+    with open(str(path), 'wb') as fout:
+        pickle.dump([p.decode('ascii') for p in paths], fout, protocol=2)
+    return str(path)
+
+
+OLD = [b'Root/Pages', b'Root/Kids', b'Root/Font', b'Root/Kids']
+NEW = [b'Root/Pages', b'Root/Type', b'Root/Kids']
+
+
+def test_formats_give_the_same_hashes(tmp_path):
+    nppf_f = write_nppf(tmp_path / 'old.nppf', OLD)
+    pickle_f = write_pickle(tmp_path / 'old.pickle', OLD)
+    assert features.detect_format(nppf_f) == features.NPPF
+    assert features.detect_format(pickle_f) == features.PICKLE
+    hashes, total = features.load_hashes(nppf_f)
+    assert total == 4 and len(hashes) == 3
+    assert (numpy.diff(hashes.astype(float)) > 0).all()
+    p_hashes, p_total = features.load_hashes(pickle_f)
+    numpy.testing.assert_array_equal(hashes, p_hashes)
+    assert p_total == total
+    # Reading in small chunks splits lines across reads
+    c_hashes, c_total = features.load_hashes(nppf_f, chunk_size=7)
+    numpy.testing.assert_array_equal(hashes, c_hashes)
+    assert c_total == total
+
+
+def test_unknown_format(tmp_path):
+    bad_f = tmp_path / 'bad'
+    bad_f.write_bytes(b'x' * 5000)
+    with pytest.raises(ValueError):
+        features.detect_format(str(bad_f))
+
+
+def test_drift(tmp_path):
+    old = features.load_hashes(write_nppf(tmp_path / 'old.nppf', OLD))
+    new = features.load_hashes(write_pickle(tmp_path / 'new.pickle', NEW))
+    assert features.drift(old, new) == {'OLD': 4, 'Add': 1, 'Del': 1,
+                                        'Same': 2, 'NEW': 3}
+
+
+def test_drift_series_loads_every_file_once(tmp_path):
+    infiles = [write_nppf(tmp_path / 'w{}.nppf'.format(i), paths)
+               for i, paths in enumerate([OLD, NEW, NEW[:1]])]
+    loaded = []
+
+    def load(infile):
+        loaded.append(infile)
+        return features.load_hashes(infile)
+
+    series = features.drift_series(infiles, load)
+    assert loaded == infiles
+    assert sorted(series) == sorted(features.DRIFT_STATS)
+    numpy.testing.assert_array_equal(series['OLD'], [4, 3])
+    numpy.testing.assert_array_equal(series['Add'], [1, 0])
+    numpy.testing.assert_array_equal(series['Del'], [1, 2])
+    numpy.testing.assert_array_equal(series['Same'], [2, 1])
+    numpy.testing.assert_array_equal(series['NEW'], [3, 1])
+    assert len(features.drift_series(infiles[:1])['Add']) == 0
+
+
+def test_drift_matrix_matches_pairwise_drift(tmp_path):
+    infiles = [write_nppf(tmp_path / 'w{}.nppf'.format(i), paths)
+               for i, paths in enumerate([OLD, NEW, NEW[:1], []])]
+    matrix = features.drift_matrix(infiles)
+    hashes = [features.load_hashes(infile) for infile in infiles]
+    for i, old in enumerate(hashes):
+        for j, new in enumerate(hashes):
+            d = features.drift(old, new)
+            assert matrix['Same'][i, j] == d['Same']
+            assert matrix['Add'][i, j] == d['Add']
+            assert matrix['Del'][i, j] == d['Del']
+    assert matrix['Jaccard'][0, 1] == pytest.approx(2.0 / 4)
+    assert matrix['Jaccard'][1, 2] == pytest.approx(1.0 / 3)
+    # The similarity of two empty sets is 1, to an empty set 0
+    assert matrix['Jaccard'][3, 3] == 1.0
+    assert matrix['Jaccard'][0, 3] == 0.0
+    numpy.testing.assert_array_equal(matrix['Jaccard'],
+                                     matrix['Jaccard'].T)
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import os
+
+import fitcache
+
+
+def test_fit_key_depends_on_all_parts():
+    key = fitcache.fit_key(samples='abc', params={'n_estimators': 10},
+                           seed=1)
+    assert key == fitcache.fit_key(seed=1, samples='abc',
+                                   params={'n_estimators': 10})
+    assert key != fitcache.fit_key(samples='abc', params={'n_estimators': 10},
+                                   seed=2)
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = fitcache.FitCache(str(tmp_path), 10 ** 9)
+    keys = [fitcache.fit_key(n=n) for n in range(3)]
+    for n, key in enumerate(keys):
+        cache.put(key, {'model': n, 'payload': list(range(1000))})
+        # Last used in the order of n, whatever the file system's
+        # resolution of modification times
+        os.utime(cache.path(key), (1000 + n, 1000 + n))
+    size = os.path.getsize(cache.path(keys[0]))
+    assert cache.get(keys[0])['model'] == 0
+    cache.max_size = 2 * size
+    cache.evict()
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0])['model'] == 0
+    assert cache.get(keys[2])['model'] == 2
+    assert len(cache.entries()) == 2
+
+
+def test_put_evicts_beyond_the_size(tmp_path):
+    cache = fitcache.FitCache(str(tmp_path), 1)
+    cache.put(fitcache.fit_key(n=0), 'model')
+    assert cache.entries() == []
+    assert cache.get(fitcache.fit_key(n=0)) is None
+
+
+def test_data_digest_follows_the_file(tmp_path):
+    cache = fitcache.FitCache(str(tmp_path / 'cache'), 10 ** 9)
+    infile = tmp_path / 'data.libsvm'
+    infile.write_bytes(b'1 1:1\n')
+    first = cache.data_digest(str(infile))
+    assert cache.data_digest(str(infile)) == first
+    infile.write_bytes(b'1 1:1\n0 2:1\n')
+    assert cache.data_digest(str(infile)) != first
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+import benchmark
+import hidost
+
+
+def test_help_imports_no_heavy_module():
+    # Every command prints its help in a fresh interpreter
+    count, _ = benchmark.stage_startup({})
+    assert count == len(hidost.COMMANDS) + 1
+
+
+def test_unknown_command(capsys):
+    assert hidost.main(['missing']) == 2
+    assert 'unknown command: missing' in capsys.readouterr().err
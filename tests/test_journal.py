@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import os
+
+from journal import Journal
+
+
+def test_resume_keeps_records(tmp_path):
+    path = str(tmp_path / 'exp.journal')
+    journal = Journal(path, {'train': ['a']})
+    journal.append((1, 1), 'first')
+    journal.append((1, 2), 'second')
+    journal.close()
+    journal = Journal(path, {'train': ['a']}, resume=True)
+    assert journal.records == {(1, 1): 'first', (1, 2): 'second'}
+    assert (1, 2) in journal and (2, 1) not in journal
+    journal.append((2, 1), 'third')
+    journal.close()
+    assert len(Journal(path, {'train': ['a']}, resume=True).records) == 3
+
+
+def test_partial_record_is_dropped(tmp_path):
+    path = str(tmp_path / 'exp.journal')
+    journal = Journal(path, 'header')
+    journal.append('done', 1)
+    journal.append('interrupted', 2)
+    journal.close()
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 3)
+    journal = Journal(path, 'header', resume=True)
+    assert journal.records == {'done': 1}
+    journal.append('interrupted', 3)
+    journal.close()
+    assert Journal(path, 'header', resume=True).records == {
+        'done': 1, 'interrupted': 3}
+
+
+def test_other_header_starts_over(tmp_path):
+    path = str(tmp_path / 'exp.journal')
+    journal = Journal(path, {'seed': 1})
+    journal.append('done', 1)
+    journal.close()
+    assert Journal(path, {'seed': 2}, resume=True).records == {}
+    # Without resume, the journal is started over as well
+    Journal(path, {'seed': 2}).close()
+    assert Journal(path, {'seed': 2}, resume=True).records == {}
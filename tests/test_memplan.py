@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import memplan
+
+MB = 1 << 20
+# 20000 training samples of 5000 features, 1% of them non-zero
+SHAPE_TRAIN, NNZ_TRAIN = (20000, 5000), 1000000
+SHAPE_TEST, NNZ_TEST = (5000, 5000), 250000
+
+
+@pytest.fixture(autouse=True)
+def in_use(monkeypatch):
+    # Memory already in use by the process, counted against the budget
+    monkeypatch.setattr(memplan, 'current_rss', lambda: 100 * MB)
+
+
+def plan(budget, classifier='RF', **kwargs):
+    return memplan.plan(classifier, SHAPE_TRAIN, NNZ_TRAIN, SHAPE_TEST,
+                        NNZ_TEST, budget, **kwargs)
+
+
+def estimate(rep, n_train=SHAPE_TRAIN[0], nnz=NNZ_TRAIN):
+    return 100 * MB + memplan.estimate('RF', rep, n_train, SHAPE_TRAIN[1],
+                                       nnz, SHAPE_TEST[0], NNZ_TEST)
+
+
+def test_sizes():
+    assert memplan.parse_size('16G') == 16 << 30
+    assert memplan.parse_size('1.5kb') == 1536
+    assert memplan.parse_size('100') == 100
+    assert memplan.format_size(3 * MB) == '3.0 MB'
+    assert memplan.format_size(12) == '12 B'
+
+
+def test_estimates_order_representations():
+    dense64, dense32, sparse = [estimate(rep)
+                                for rep in memplan.REPRESENTATIONS]
+    assert dense64 > dense32 > sparse
+
+
+def test_without_budget_nothing_changes():
+    result = plan(None, representation='sparse', subsample=0.5)
+    assert result['representation'] == 'sparse'
+    assert result['subsample'] == 0.5
+    assert not result['stratified']
+
+
+def test_first_representation_that_fits():
+    assert plan(estimate('dense64'))['representation'] == 'dense64'
+    assert plan(estimate('dense64') - 1)['representation'] == 'dense32'
+    result = plan(estimate('dense32') - 1)
+    assert result['representation'] == 'sparse'
+    assert result['subsample'] is False
+    assert result['estimate'] <= estimate('dense32') - 1
+
+
+def test_subsampling_to_the_largest_fraction_that_fits():
+    budget = estimate('sparse', SHAPE_TRAIN[0] // 2, NNZ_TRAIN // 2)
+    result = plan(budget)
+    assert result['stratified']
+    assert 0.4 < result['subsample'] <= 0.5
+    assert result['estimate'] <= budget
+
+
+def test_budget_below_memory_in_use():
+    with pytest.raises(ValueError):
+        plan(50 * MB)
+    # Chunked training is not subsampled either
+    with pytest.raises(ValueError):
+        plan(50 * MB, classifier='RF-inc', chunk_size=1000)
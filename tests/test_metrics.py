@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import numpy
+import pytest
+
+import metrics
+
+
+def naive_auc(y, score):
+    pos, neg = score[y > 0.5], score[y < 0.5]
+    greater = (pos[:, None] > neg[None, :]).sum()
+    tied = (pos[:, None] == neg[None, :]).sum()
+    return (greater + 0.5 * tied) / float(len(pos) * len(neg))
+
+
+@pytest.fixture
+def samples():
+    rng = numpy.random.RandomState(1)
+    n = 200
+    y = (rng.random_sample(n) < 0.4).astype(float)
+    # Two repetitions, with rounded scores to produce ties
+    score = numpy.round(rng.normal(size=(2, n)) + y, 1)
+    pred = (score > 0.5).astype(float)
+    groups = numpy.repeat([0, 1, 2], [50, 70, 80])
+    return y, pred, score, groups
+
+
+def test_evaluate_matches_counts_per_period(samples):
+    y, pred, score, groups = samples
+    res = metrics.evaluate(y, pred, score, groups)
+    assert res['acc'].shape == (1, 2, 3)
+    for r in range(2):
+        for g in range(3):
+            sel = groups == g
+            yt, yp, ys = y[sel], pred[r, sel], score[r, sel]
+            tp = ((yt > 0.5) & (yp > 0.5)).sum()
+            fp = ((yt < 0.5) & (yp > 0.5)).sum()
+            assert res['tp'][0, r, g] == tp
+            assert res['fp'][0, r, g] == fp
+            assert res['acc'][0, r, g] == pytest.approx(
+                (yt == yp).mean())
+            assert res['TPR'][0, r, g] == pytest.approx(
+                tp / float((yt > 0.5).sum()))
+            assert res['AUC'][0, r, g] == pytest.approx(naive_auc(yt, ys))
+
+
+def test_evaluate_weights_duplicate_samples(samples):
+    y, pred, score, groups = samples
+    counts = numpy.random.RandomState(2).poisson(1.0, len(y))
+    weighted = metrics.evaluate(y, pred, score, groups,
+                                counts[None, :].astype(float))
+    rows = numpy.repeat(numpy.arange(len(y)), counts)
+    repeated = metrics.evaluate(y[rows], pred[:, rows], score[:, rows],
+                                groups[rows])
+    for stat in metrics.STATS + ['tp', 'fp', 'tn', 'fn']:
+        numpy.testing.assert_allclose(weighted[stat], repeated[stat])
+
+
+def test_evaluate_tpr_at_fixed_fpr():
+    y = numpy.array([1, 1, 1, 0, 0, 0, 0], dtype=float)
+    score = numpy.array([0.9, 0.8, 0.3, 0.7, 0.2, 0.1, 0.0])
+    res = metrics.evaluate(y, score > 0.5, score, fixed_fpr=0.0)
+    assert res['TPR@FPR'][0, 0, 0] == pytest.approx(2.0 / 3)
+    res = metrics.evaluate(y, score > 0.5, score, fixed_fpr=0.25)
+    assert res['TPR@FPR'][0, 0, 0] == pytest.approx(1.0)
+
+
+def test_evaluate_undefined_metrics_are_nan():
+    y = numpy.zeros(4)
+    score = numpy.array([0.1, 0.6, 0.2, 0.3])
+    res = metrics.evaluate(y, score > 0.5, score)
+    assert numpy.isnan(res['AUC'][0, 0, 0])
+    assert numpy.isnan(res['TPR'][0, 0, 0])
+    assert res['FPR'][0, 0, 0] == pytest.approx(0.25)
+
+
+def test_bootstrap_intervals_contain_estimate(samples):
+    y, pred, score, groups = samples
+    ci = metrics.bootstrap(y, pred, score, groups, resamples=200, seed=3)
+    point = metrics.evaluate(y, pred, score, groups)
+    assert sorted(ci) == sorted(metrics.STATS)
+    for stat in ['acc', 'AUC', 'TPR', 'FPR']:
+        lower, upper = ci[stat]
+        assert lower.shape == upper.shape == (3,)
+        mean = point[stat][0].mean(axis=0)
+        assert (lower <= mean).all() and (mean <= upper).all()
+        assert (lower < upper).all()
+
+
+def test_bootstrap_is_reproducible_and_blocked(samples):
+    y, pred, score, groups = samples
+    whole = metrics.bootstrap(y, pred, score, groups, resamples=50, seed=4)
+    blocked = metrics.bootstrap(y, pred, score, groups, resamples=50,
+                                seed=4, block_bytes=1)
+    for stat in metrics.STATS:
+        numpy.testing.assert_allclose(whole[stat], blocked[stat])
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import pytest
+
+import pipeline
+
+# Appends a line to a log of runs and copies or creates the output;
+# sleeps to make running jobs overlap
+SCRIPT = '''
+import sys, time
+log, out, inputs = sys.argv[1], sys.argv[2], sys.argv[3:]
+with open(log, 'a') as f:
+    f.write('start {} {}\\n'.format(out, time.time()))
+time.sleep(0.2)
+text = ''.join(open(i).read() for i in inputs) + out
+with open(out, 'w') as f:
+    f.write(text)
+with open(log, 'a') as f:
+    f.write('end {} {}\\n'.format(out, time.time()))
+'''
+
+
+class Machine(object):
+    def __init__(self, root):
+        self.root = root
+        self.log = str(root / 'runs.log')
+
+    def path(self, name):
+        return str(self.root / name)
+
+    def job(self, name, inputs=(), cpus=1, script=SCRIPT):
+        inputs = [self.path(i) for i in inputs]
+        return pipeline.Job(name, [self.path(name)], inputs,
+                            [sys.executable, '-c', script, self.log,
+                             self.path(name)] + inputs,
+                            cpus=cpus, memory=1)
+
+    def run(self, jobs, targets=(), cpus=2, keep_going=False):
+        p = pipeline.Pipeline(jobs, cpus, 10, self.path('state.json'),
+                              self.path('logs'))
+        return p.run(targets, keep_going=keep_going, poll=0.02)
+
+    def runs(self):
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log) as fin:
+            lines = [line.split() for line in fin]
+        os.remove(self.log)
+        return [(kind, os.path.basename(out), float(t))
+                for kind, out, t in lines]
+
+    def started(self):
+        return sorted(out for kind, out, _ in self.runs() if kind == 'start')
+
+
+@pytest.fixture
+def machine(tmp_path):
+    (tmp_path / 'data').write_text(u'data')
+    return Machine(tmp_path)
+
+
+def chain(machine):
+    return [machine.job('plot', ['result']),
+            machine.job('result', ['data']),
+            machine.job('other', ['data'])]
+
+
+def test_targets_in_dependency_order(machine):
+    p = pipeline.Pipeline(chain(machine), 1, 1, machine.path('state.json'),
+                          machine.path('logs'))
+    assert [j.name for j in p.select(['plot'])] == ['result', 'plot']
+    assert [j.name for j in p.select([machine.path('result')])] == [
+        'result']
+    with pytest.raises(KeyError):
+        p.select(['missing'])
+
+
+def test_unchanged_jobs_are_skipped(machine):
+    jobs = chain(machine)
+    assert machine.run(jobs) == []
+    assert machine.started() == ['other', 'plot', 'result']
+    with open(machine.path('plot')) as fin:
+        assert fin.read() == 'data' + machine.path('result') + \
+            machine.path('plot')
+    assert machine.run(jobs) == []
+    assert machine.started() == []
+    # A changed input runs the jobs depending on it
+    (machine.root / 'data').write_text(u'new data')
+    assert machine.run(jobs, ['result']) == []
+    assert machine.started() == ['result']
+    assert machine.run(jobs) == []
+    assert machine.started() == ['other', 'plot']
+    # So does a changed command
+    jobs[2] = machine.job('other', ['data'], script=SCRIPT + '# changed')
+    assert machine.run(jobs) == []
+    assert machine.started() == ['other']
+
+
+def test_failed_jobs_stop_their_dependents(machine):
+    jobs = chain(machine)
+    jobs[1].command = [sys.executable, '-c', 'import sys; sys.exit(3)']
+    assert machine.run(jobs, ['result', 'plot'],
+                       keep_going=True) == ['result', 'plot']
+    assert machine.run(jobs, keep_going=True) == ['result', 'plot']
+    assert machine.started() == ['other']
+
+
+def test_jobs_run_concurrently_within_the_cpus(machine):
+    jobs = [machine.job('a', ['data']), machine.job('b', ['data']),
+            machine.job('c', ['data'], cpus=2)]
+    assert machine.run(jobs) == []
+    times = dict(((kind, out), t) for kind, out, t in machine.runs())
+    # a and b fit together, c needs the whole machine
+    assert times['start', 'b'] < times['end', 'a']
+    assert times['start', 'a'] < times['end', 'b']
+    assert times['start', 'c'] >= max(times['end', 'a'], times['end', 'b'])
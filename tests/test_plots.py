@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Smoke tests of plotting, in draft mode, which needs no LaTeX.
+"""
+import os
+
+import numpy
+import pylab
+import pytest
+
+import dataset_partitioning
+import feat_drift
+import plots
+import synthetic
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    outdir = str(tmp_path_factory.mktemp('synthetic'))
+    return synthetic.generate(outdir, weeks=6, window=3, samples=60,
+                              features=300, nnz_mean=20)
+
+
+def check_files(plotfs):
+    pylab.close('all')
+    for f in plotfs:
+        assert os.path.getsize(f) > 0
+
+
+def test_dataset_partitioning(dataset, tmp_path):
+    plotfs = [str(tmp_path / 'data.pdf'), str(tmp_path / 'data.png')]
+    assert dataset_partitioning.main(
+        ['--train'] + dataset['train'] + ['--test'] + dataset['test'] +
+        ['--cache-dir', str(tmp_path / 'cache'), '--draft',
+         '--data-plot'] + plotfs) == 0
+    check_files(plotfs)
+
+
+def test_feature_drift(dataset, tmp_path):
+    plotfs = [str(tmp_path / 'drift.pdf')]
+    assert feat_drift.main(['--first'] + dataset['feats'] +
+                           ['--second'] + dataset['feats'] +
+                           ['--methods', 'A', 'B', '--metrics', 'Add',
+                            'Del', '--draft', '--plot'] + plotfs) == 0
+    check_files(plotfs)
+    plotfs = [str(tmp_path / 'drift-matrix.pdf')]
+    feat_drift.main(['--matrix', '--first'] + dataset['feats'] +
+                    ['--methods', 'A', '--draft', '--plot'] + plotfs)
+    check_files(plotfs)
+
+
+def test_comparison(tmp_path):
+    plots.init_eurasip_style(figure_width=222.5, horizontal=False,
+                             draft=True)
+    rng = numpy.random.RandomState(0)
+    datas = [[rng.random_sample(3) for _ in range(2)] for _ in range(2)]
+    # Every format of the figure is saved
+    plotfs = [str(tmp_path / 'comparison.pdf'),
+              str(tmp_path / 'comparison.png')]
+    plots.sorted_multicomparison(datas=datas, methods=['A', 'B'],
+                                 ylabels=['AUC', 'acc'], xlabel='Period',
+                                 xticklabels=['1', '2', '3'],
+                                 legend='best/1', plotfs=plotfs)
+    check_files(plotfs)
+
+
+def test_avstats(tmp_path):
+    plots.init_eurasip_style(figure_width=222.5, horizontal=False,
+                             draft=True)
+    plotfs = [str(tmp_path / 'avstats.pdf')]
+    plots.plot_avstats({'AV01': 3, 'AV02': 1, 'Hidost': 5, 'Total': 9},
+                       plotfs[0])
+    check_files(plotfs)
+
+
+def test_comparison_with_intervals(tmp_path):
+    plots.init_eurasip_style(figure_width=222.5, horizontal=False,
+                             draft=True)
+    rng = numpy.random.RandomState(0)
+    datas = [[rng.random_sample(3) for _ in range(2)] for _ in range(2)]
+    intervals = [[(d - 0.1, d + 0.1) for d in metric] for metric in datas]
+    plotfs = [str(tmp_path / 'comparison.pdf')]
+    plots.sorted_multicomparison(datas=datas, methods=['A', 'B'],
+                                 ylabels=['AUC', 'acc'], xlabel='Period',
+                                 xticklabels=['1', '2', '3'],
+                                 legend='best/1', plotfs=plotfs,
+                                 intervals=intervals)
+    check_files(plotfs)
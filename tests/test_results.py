@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import datetime
+import pickle
+
+import numpy
+import pytest
+
+import results
+
+STATS = ['acc', 'AUC', 'TPR']
+
+
+def make_output(nan=True):
+    # Two repetitions of three periods
+    res = numpy.arange(18, dtype=float).reshape((2, 9)) / 20.0
+    if nan:
+        # No positives in the second period of the first repetition
+        res[0, 3 + STATS.index('TPR')] = numpy.nan
+    return {'stats': STATS,
+            'res': res,
+            'avstats': [{'AV01': 2, 'Total': 4}, {'AV01': 1, 'AV02': 3,
+                                                  'Total': 4}],
+            'key_dates': [datetime.date(2013, 1, 7 * w + 7)
+                          for w in range(3)],
+            'ci': {'level': 0.95,
+                   'lower': {'acc': numpy.array([0.1, numpy.nan, 0.3])},
+                   'upper': {'acc': numpy.array([0.2, numpy.nan, 0.4])}}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = results.ResultStore(str(tmp_path / 'results.db'))
+    store.add('run', make_output(), 'numerical')
+    store.add('run', make_output(nan=False), 'binary')
+    yield store
+    store.close()
+
+
+def test_means_match_result_files(store, tmp_path):
+    res_f = str(tmp_path / 'run.pickle')
+    with open(res_f, 'wb') as fout:
+        pickle.dump(make_output(), fout)
+    means, avstats, key_dates = results.load_averaged(res_f)
+    db_means, db_avstats, db_key_dates = store.averaged('run', 'numerical')
+    assert sorted(db_means) == sorted(means) == sorted(STATS)
+    for stat in STATS:
+        numpy.testing.assert_allclose(db_means[stat], means[stat])
+    assert dict(db_avstats) == pytest.approx(dict(avstats))
+    assert db_key_dates == key_dates
+
+
+def test_nan_in_any_repetition_makes_the_mean_nan(store):
+    tpr = store.mean_series('run', 'TPR', 'numerical')
+    assert tpr.dtype == float
+    assert numpy.isnan(tpr[1])
+    assert not numpy.isnan(tpr[[0, 2]]).any()
+    assert not numpy.isnan(store.mean_series('run', 'TPR', 'binary')).any()
+    assert numpy.isnan(store.mean_stats('run', 'numerical')['TPR'][1])
+
+
+def test_runs_and_variants(store):
+    assert store.runs() == [('run', 'binary', 2, 3),
+                            ('run', 'numerical', 2, 3)]
+    with pytest.raises(KeyError):
+        store.mean_series('run', 'acc')
+    store.add('run', make_output(), 'numerical')
+    assert len(store.runs()) == 2
+
+
+def test_intervals(store):
+    ci = store.intervals('run', 'numerical')
+    lower, upper = ci['acc']
+    numpy.testing.assert_allclose(lower, [0.1, numpy.nan, 0.3])
+    numpy.testing.assert_allclose(upper, [0.2, numpy.nan, 0.4])
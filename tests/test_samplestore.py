@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import numpy
+import pytest
+
+import dataset_cache
+import samplestore
+
+SHARED = '1 1:1 3:2 # 2013/01/07 ' + 'a' * 64 + '\n'
+
+
+def write(path, text):
+    path.write_bytes(text.encode('ascii'))
+    return str(path)
+
+
+def test_shared_samples_are_kept_once(tmp_path):
+    train = write(tmp_path / 'w01-train.libsvm',
+                  '# header\n' + SHARED + '0 2:1\n')
+    test = write(tmp_path / 'w01-test.libsvm',
+                 SHARED + '0 2:1 5:1 # 2013/01/08\n' + SHARED)
+    root = str(tmp_path / 'samples.store')
+    meta = samplestore.import_files(root, [train, test], base=str(tmp_path),
+                                    chunk_size=8)
+    assert meta['lines'] == 5
+    assert meta['shape'][0] == 3
+    store = samplestore.SampleStore(root)
+    assert store.rows(test).tolist() == [0, 2, 0]
+    for infile in (train, test):
+        X, y, dates, digests = store.load_dataset(infile)
+        X_c, y_c, dates_c, digests_c = dataset_cache.load_dataset(
+            infile, cache_dir=str(tmp_path / 'cache'))
+        assert X.shape == X_c.shape
+        assert (X != X_c).nnz == 0
+        assert numpy.array_equal(y, y_c)
+        assert numpy.array_equal(dates.astype(str), dates_c.astype(str))
+        assert numpy.array_equal(digests, digests_c)
+
+
+def test_files_are_found_by_relative_path(tmp_path):
+    train = write(tmp_path / 'w01-train.libsvm', SHARED)
+    root = str(tmp_path / 'samples.store')
+    samplestore.import_files(root, [train], base=str(tmp_path))
+    store = samplestore.SampleStore(root)
+    assert store.load_labels('w01-train.libsvm').tolist() == [1]
+    write(tmp_path / 'w01-train.libsvm', SHARED + SHARED)
+    with pytest.raises(ValueError):
+        store.find(train)
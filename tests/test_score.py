@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import io
+import sys
+
+import numpy
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import models
+import score
+
+SHA = ['{:064x}'.format(i) for i in range(1, 7)]
+# Feature 1 decides the label
+TEXT = ''.join('{} {}:1 3:{} # 2013/01/07 {}\n'.format(label, 2 - label,
+                                                      i, sha)
+               for i, (label, sha) in enumerate(zip([1, 0, 1, 0, 1, 0],
+                                                    SHA))).encode('ascii')
+
+
+def train():
+    rng = numpy.random.RandomState(0)
+    X = rng.randint(0, 2, (40, 3)).astype(float)
+    y = X[:, 0].astype(int)
+    return RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = models.ModelStore(str(tmp_path / 'models'))
+    store.put(train(), {'classifier': 'RF', 'binarize': False,
+                        'representation': 'dense64', 'n_features': 3,
+                        'week_start': '2013-01-07'}, 'pdf/r01/w01')
+    return store
+
+
+def test_store_round_trip(store):
+    digest = store.names()['pdf/r01/w01']
+    clf, meta = store.load('pdf/r01/w01')
+    assert meta['digest'] == digest and meta['n_features'] == 3
+    assert store.resolve(digest[:6]) == digest
+    assert clf.predict(numpy.eye(3)).tolist() == [1, 0, 0]
+    # The same model is stored once, under any number of names
+    assert store.put(train(), {}, 'pdf/r01/w02') == digest
+    assert sorted(store.names()) == ['pdf/r01/w01', 'pdf/r01/w02']
+    with pytest.raises(KeyError):
+        store.resolve('pdf/r01/w03')
+
+
+def scored(capsys):
+    out = capsys.readouterr().out
+    # Scores, but no messages such as that of caching a file
+    return [line.split('\t')[:2] for line in out.splitlines()
+            if '\t' in line]
+
+
+def test_score_files_and_standard_input(store, tmp_path, capsys,
+                                        monkeypatch):
+    data_f = tmp_path / 'test.libsvm'
+    data_f.write_bytes(TEXT)
+    expected = [[sha, str(label)] for sha, label in zip(SHA, [1, 0] * 3)]
+    assert score.main(['pdf/r01/w01', str(data_f), '--store',
+                       store.root, '--batch-size', '4',
+                       '--cache-dir', str(tmp_path / 'cache')]) == 0
+    assert scored(capsys) == expected
+    stdin = io.TextIOWrapper(io.BytesIO(TEXT))
+    monkeypatch.setattr(sys, 'stdin', stdin)
+    assert score.main(['pdf/r01/w01', '--store', store.root,
+                       '--batch-size', '4']) == 0
+    assert scored(capsys) == expected
+    assert score.main(['--list', '--store', store.root]) == 0
+    assert scored(capsys) == [['pdf/r01/w01',
+                               store.names()['pdf/r01/w01']]]
+
+
+def test_stream_batches_check_feature_indices():
+    batches = list(score.stream_batches(io.BytesIO(TEXT), 3, 4))
+    assert [X.shape for X, _ in batches] == [(4, 3), (2, 3)]
+    with pytest.raises(ValueError):
+        list(score.stream_batches(io.BytesIO(TEXT), 2, 4))
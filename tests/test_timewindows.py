@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import numpy
+import pytest
+
+import timewindows
+
+
+def dates(*days):
+    return numpy.array([numpy.datetime64(d, 'D') if d else
+                        numpy.datetime64('NaT', 'D') for d in days])
+
+
+def test_parse_weeks():
+    assert timewindows.parse_weeks('3') == 3
+    assert timewindows.parse_weeks(timewindows.ALL) is None
+    with pytest.raises(ValueError):
+        timewindows.parse_weeks('0')
+
+
+def test_test_starts_follow_the_first_window():
+    d = dates('2013-01-07', '2013-01-20', None, '2013-02-18')
+    assert timewindows.test_starts(d, window=2) == [
+        '2013-01-21', '2013-01-28', '2013-02-04', '2013-02-11',
+        '2013-02-18']
+    assert timewindows.test_starts(d, window=2, test_weeks=2,
+                                   periods=2) == ['2013-01-21',
+                                                  '2013-02-04']
+    assert timewindows.test_starts(d, window=2,
+                                   first_test='2013-02-11') == [
+        '2013-02-11', '2013-02-18']
+    with pytest.raises(ValueError):
+        timewindows.test_starts(d, window=10)
+    with pytest.raises(ValueError):
+        timewindows.test_starts(dates(None), window=1)
+
+
+def test_split_retains_either_class_separately():
+    d = dates('2013-01-01', '2013-01-08', '2013-01-09', '2013-01-15',
+              '2013-01-16', '2013-01-22', '2013-01-28', '2013-01-29', None)
+    y = numpy.array([1, 0, 1, 0, 1, 0, 1, 0, 0], dtype=float)
+    start = '2013-01-22'
+    train, test = timewindows.split(d, y, start, benign=1, malicious=1)
+    assert train.tolist() == [3, 4]
+    assert test.tolist() == [5, 6]
+    train, _ = timewindows.split(d, y, start, benign=1, malicious=None)
+    assert train.tolist() == [0, 2, 3, 4]
+    train, _ = timewindows.split(d, y, start, benign=2, malicious=1)
+    assert train.tolist() == [1, 3, 4]
+    _, test = timewindows.split(d, y, start, test_weeks=2)
+    assert test.tolist() == [5, 6, 7]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import pickle
+import time
+
+import pytest
+
+import timing
+
+
+def test_phases_are_recorded_in_order():
+    timer = timing.PhaseTimer()
+    with timer.phase('load'):
+        time.sleep(0.01)
+    with pytest.raises(RuntimeError):
+        with timer.phase('fit', week='2013-01-07'):
+            raise RuntimeError()
+    load, fit = timer.records
+    assert load['phase'] == 'load' and fit['phase'] == 'fit'
+    # A failed phase is recorded as well, with its keyword arguments
+    assert fit['week'] == '2013-01-07'
+    assert load['wall'] >= 0.01
+    assert load['cpu'] >= 0 and load['peak'] > 0
+
+
+def test_trace_round_trip(tmp_path):
+    timer = timing.PhaseTimer()
+    with timer.phase('load'):
+        pass
+    with timer.phase('fit'):
+        pass
+    trace_f = str(tmp_path / 'swf.trace')
+    with open(trace_f, 'w') as fout:
+        timing.write_trace(fout, timer.records, repetition=1, week=2)
+        timing.write_trace(fout, timer.records[:1], repetition=2, week=2)
+    records = timing.load_records(trace_f)
+    assert [(r['phase'], r['repetition']) for r in records] == [
+        ('load', 1), ('fit', 1), ('load', 2)]
+    assert all(r['run'] == 'swf' and r['week'] == 2 for r in records)
+    assert records[1]['wall'] == timer.records[1]['wall']
+
+
+def test_records_of_result_files(tmp_path):
+    phase = {'phase': 'fit', 'wall': 1.0, 'cpu': 2.0, 'peak': 1 << 20}
+    res_f = str(tmp_path / 'pdf.pickle')
+    with open(res_f, 'wb') as fout:
+        # Two repetitions of two weeks
+        pickle.dump({'phases': [[[phase], [phase, phase]],
+                                [[phase], []]]}, fout)
+    records = timing.load_records(res_f)
+    assert [(r['repetition'], r['week']) for r in records] == [
+        (1, 1), (1, 2), (1, 2), (2, 1)]
+    assert all(r['run'] == 'pdf' for r in records)
+
+
+def test_outlier_weeks(capsys):
+    records = [{'run': 'swf', 'repetition': i, 'week': w, 'wall': wall}
+               for i in (1, 2)
+               for w, wall in ((1, 1.0), (2, 1.2), (3, 5.0))]
+    timing.outliers(records, 1.5)
+    out = capsys.readouterr().out
+    assert 'week 3 takes 5.0 s' in out
+    assert 'week 2' not in out
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import numpy
+import pytest
+import scipy.sparse
+
+import experiment
+import features
+import timing
+import windowforest
+
+# Mondays of four consecutive weeks
+WEEKS = numpy.array(['2013-01-07', '2013-01-14', '2013-01-21',
+                     '2013-01-28'], dtype='datetime64[D]')
+VARIANT = {'classifier': 'RF-window', 'binarize': False, 'subsample': 0.5,
+           'stratified': True}
+
+
+@pytest.fixture(autouse=True)
+def forget_sub_forests():
+    windowforest.retain_only([])
+    yield
+    windowforest.retain_only([])
+
+
+def make_data(weeks, per_week=20):
+    """
+    Returns samples of the given weeks, per_week of them in each: their
+    features, labels, dates and digests. Feature 0 is the label.
+    """
+    rng = numpy.random.RandomState(0)
+    n = len(weeks) * per_week
+    y = numpy.tile([0.0, 1.0], n // 2)
+    X = rng.randint(0, 2, (n, 4)).astype(float)
+    X[:, 0] = y
+    dates = numpy.repeat(weeks, per_week).astype('datetime64[s]')
+    digests = numpy.array([b'%032d' % (i + 1) for i in range(n)],
+                          dtype='S32')
+    return X, y, dates, digests
+
+
+def test_week_groups_and_retention():
+    X, y, dates, digests = make_data(WEEKS[:3], 4)
+    # The last week has malicious samples only and two samples no date
+    y[8:] = 1
+    dates[[0, 1]] = numpy.datetime64('NaT')
+    groups = windowforest.week_groups(dates, y, '2013-01-28')
+    assert [str(week) for week, _ in groups] == ['2013-01-07',
+                                                 '2013-01-14']
+    assert [rows.tolist() for _, rows in groups] == [[2, 3], [4, 5, 6, 7]]
+    # Weeks begin on the weekday of the test period
+    groups = windowforest.week_groups(dates, y, '2013-01-30')
+    assert [str(week) for week, _ in groups] == ['2013-01-02',
+                                                 '2013-01-09']
+    # KeepMal retains malicious samples of weeks before the window
+    dates[:4] = numpy.datetime64('2012-12-10')
+    y[:] = [1, 1, 1, 1, 0, 1, 0, 1, 0, 1, 0, 1]
+    groups = windowforest.week_groups(dates, y, '2013-01-21')
+    assert [rows.tolist() for _, rows in groups] == [[4, 5, 6, 7],
+                                                     [8, 9, 10, 11]]
+    groups = windowforest.week_groups(dates, y, '2013-01-21', 'keepmal')
+    assert [rows.tolist() for _, rows in groups] == [
+        [0, 1, 2, 3, 4, 5, 6, 7], [0, 1, 2, 3, 8, 9, 10, 11]]
+    with pytest.raises(ValueError):
+        windowforest.week_groups(dates, y, '2013-01-21', 'keepall')
+
+
+def test_group_digest_ignores_order():
+    _, y, _, digests = make_data(WEEKS[:1], 6)
+    rows = numpy.array([0, 1, 2, 3])
+    digest = windowforest.group_digest(digests, y, rows)
+    assert windowforest.group_digest(digests, y, rows[::-1]) == digest
+    assert windowforest.group_digest(digests, y, rows[:3]) != digest
+    y[0] = 1
+    assert windowforest.group_digest(digests, y, rows) != digest
+
+
+def test_feature_ids(tmp_path):
+    feature_f = tmp_path / 'w01.nppf'
+    feature_f.write_bytes(b'3\nRoot\0Pages\nRoot\0Kids\nRoot\0Font\n')
+    ids = windowforest.feature_ids(str(feature_f), 2)
+    numpy.testing.assert_array_equal(
+        ids, features.hash_paths([b'Root/Pages', b'Root/Kids']))
+    assert windowforest.feature_ids(None, 2).tolist() == [0, 1]
+    with pytest.raises(ValueError):
+        windowforest.feature_ids(str(feature_f), 4)
+
+
+def test_columns_of_other_feature_spaces():
+    src = numpy.array([10, 20, 30], dtype=numpy.uint64)
+    dst = numpy.array([30, 5, 10], dtype=numpy.uint64)
+    assert windowforest.column_map(src, src) is None
+    cols = windowforest.column_map(src, dst)
+    assert cols.tolist() == [2, -1, 0]
+    X = numpy.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+    expected = [[3.0, 0.0, 1.0], [6.0, 0.0, 4.0]]
+    assert windowforest.select_columns(X, cols).tolist() == expected
+    Xs = windowforest.select_columns(scipy.sparse.csr_matrix(X), cols)
+    assert Xs.toarray().tolist() == expected
+
+
+def fit(X, y, dates, digests, start, seed=1):
+    window = {'dates': dates, 'digests': digests, 'start': start,
+              'ids': numpy.arange(X.shape[1], dtype=numpy.uint64),
+              'retention': 'window', 'seed': seed, 'repetition': 1,
+              'trees': 3}
+    return experiment.fit_window_forest(
+        scipy.sparse.csr_matrix(X), y, VARIANT, 'dense64', 1,
+        timing.PhaseTimer(), window)
+
+
+def test_sub_forests_are_reused_while_in_the_window():
+    X, y, dates, digests = make_data(WEEKS)
+    # Periods training on the first three weeks and on the last three
+    rows, first = fit(X[:60], y[:60], dates[:60], digests[:60],
+                      '2013-01-28')
+    assert len(first.forests) == 3 and first.n_estimators == 9
+    # Subsampled halves of every week
+    assert len(rows) == 30
+    state = numpy.random.get_state()[1].copy()
+    _, second = fit(X[20:], y[20:], dates[20:], digests[20:], '2013-02-04')
+    # Sub-forests are seeded locally, not through the global generator
+    numpy.testing.assert_array_equal(numpy.random.get_state()[1], state)
+    assert second.forests[:2] == first.forests[1:]
+    assert second.forests[2] not in first.forests
+    assert second.predict(X[60:]).tolist() == y[60:].tolist()
+    proba = second.predict_proba(X[60:])
+    numpy.testing.assert_allclose(proba.sum(axis=1), 1.0)
+    # Weeks that left the window are forgotten, their forests retrained
+    windowforest.retain_only(second.keys)
+    _, third = fit(X[:60], y[:60], dates[:60], digests[:60], '2013-01-28')
+    assert third.forests[0] not in first.forests
+    assert third.forests[1:] == first.forests[1:]
+    assert third.keys == first.keys
+
+
+def test_sub_forests_do_not_depend_on_the_period():
+    X, y, dates, digests = make_data(WEEKS[:2])
+    _, first = fit(X, y, dates, digests, '2013-01-21')
+    windowforest.retain_only([])
+    _, again = fit(X, y, dates, digests, '2013-01-21')
+    for a, b in zip(first.forests, again.forests):
+        assert a is not b
+        numpy.testing.assert_array_equal(a.predict_proba(X),
+                                         b.predict_proba(X))
+    windowforest.retain_only([])
+    _, other = fit(X, y, dates, digests, '2013-01-21', seed=2)
+    assert other.keys != first.keys